@@ -3,7 +3,10 @@
 Coordinates the feedback loop between LLM, Kroki validation, and design analysis.
 """
 
-from typing import Dict, Any
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, cast
+import threading
 import time
 import logging
 import sys
@@ -11,8 +14,27 @@ from pathlib import Path
 import click
 
 from diag_agent.llm.client import LLMClient
-from diag_agent.kroki.client import KrokiClient, KrokiRenderError
+from diag_agent.kroki.client import (
+    KrokiClient,
+    KrokiRenderError,
+    KrokiRenderTimeout,
+    KrokiUnavailableError,
+    OutputFormat,
+)
+from diag_agent.kroki.balancer import KrokiBalancer
+from diag_agent.kroki.breaker import get_breaker
+from diag_agent.kroki.cache import CacheHitCounter, HttpCache, RenderCache
+from diag_agent.kroki.capabilities import CapabilityRegistry
+from diag_agent.kroki.discovery import DiscoveryCache, DiscoveryState
+from diag_agent.kroki.docker_api import DockerApi
+from diag_agent.kroki.errors import KrokiErrorDetails
+from diag_agent.kroki.keepalive import Heartbeat
+from diag_agent.kroki.limiter import limiter_metrics
 from diag_agent.kroki.manager import KrokiManager, KrokiManagerError
+from diag_agent.kroki.retry import RetryBudget, RetryPolicy
+from diag_agent.kroki.timeouts import TimeoutPolicy
+from diag_agent.kroki.warmup import WarmupTiming
+from diag_agent.utils.files import atomic_write_bytes
 
 
 class Orchestrator:
@@ -25,26 +47,266 @@ class Orchestrator:
     - Iteration limits and timeouts
     """
     
-    def __init__(self, settings: Any) -> None:
+    MAX_OUTPUT_WORKERS = 4  # concurrent output format renders
+    
+    def __init__(
+        self,
+        settings: Any,
+        kroki_client: KrokiClient | None = None,
+        kroki_manager: KrokiManager | None = None
+    ) -> None:
         """Initialize orchestrator with settings.
         
         Args:
             settings: Application settings (Settings instance)
+            kroki_client: Optional shared KrokiClient (e.g., from a long-lived
+                MCP server) whose connection pool is reused. If omitted, a new
+                client is created and owned (closed) by this orchestrator.
+            kroki_manager: Manager of the local Kroki container(s) behind a
+                shared kroki_client (starts companion containers on demand)
         """
         self.settings = settings
         # Initialize LLM client for diagram generation
         self.llm_client = LLMClient(settings)
         
-        # Initialize Kroki client with auto-mode support
-        kroki_url = self._determine_kroki_url(settings)
-        self.kroki_client = KrokiClient(kroki_url)
+        # Reuse a shared Kroki client if given, otherwise create one with auto-mode support
+        self._owns_kroki_client = kroki_client is None
+        self._kroki_client_future: "Future[KrokiClient]" = Future()
+        # JVM warm-up of a container started by auto mode (runs in the background)
+        self.kroki_warmup: "Future[dict[str, list[WarmupTiming]]] | None" = None
+        # Set by discovery if renders go to local containers managed by us
+        self.kroki_manager = kroki_manager
+        if kroki_client is None:
+            self.render_cache = self._create_render_cache(settings)
+            # Kroki discovery (docker ps/run, health check) and the first connection
+            # run in the background while the first LLM calls are in flight
+            self._kroki_client_future = self._run_in_background(self._connect_kroki, settings)
+        else:
+            self.render_cache = kroki_client.render_cache
+            self._kroki_client_future.set_result(kroki_client)
+
+    @property
+    def kroki_client(self) -> KrokiClient:
+        """Kroki client; waits for background Kroki discovery on first access.
+
+        Raises:
+            KrokiManagerError: If discovery failed in local mode
+        """
+        return self._kroki_client_future.result()
+
+    @staticmethod
+    def _run_in_background(function: Callable[..., Any], *args: Any) -> "Future[Any]":
+        """Run function(*args) in a daemon thread and return a future for its result.
+
+        A daemon thread (unlike a ThreadPoolExecutor worker) does not delay
+        interpreter exit if e.g. `docker run` is still pending when the
+        CLI fails early.
+        """
+        future: "Future[Any]" = Future()
+
+        def run() -> None:
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="kroki-discovery", daemon=True).start()
+        return future
+
+    def _connect_kroki(self, settings: Any) -> KrokiClient:
+        """Discover Kroki, create the client and open its first connection.
+
+        Args:
+            settings: Application settings
+
+        Returns:
+            KrokiClient for the discovered (or configured) endpoints
+        """
+        # Explicitly configured or local replicas are load-balanced; otherwise discover one URL
+        endpoints = getattr(settings, "kroki_endpoints", None) or []
+        replicas = getattr(settings, "kroki_replicas", None) or 1
+        discovery = None
+        if not endpoints and settings.kroki_mode in ("auto", "local"):
+            discovery = self._discovery_cache(settings)
+        cached = None
+        if discovery is not None:
+            discovery_key = {
+                "mode": settings.kroki_mode,
+                "local_url": settings.kroki_local_url,
+                "remote_url": settings.kroki_remote_url,
+                "replicas": replicas,
+            }
+            cached = discovery.load(discovery_key)
+
+        # A recent discovery of an earlier run only needs a health ping
+        if discovery is not None and cached is not None:
+            kroki_client = self._create_kroki_client(settings, cached.urls)
+            if kroki_client.warm_up():
+                if cached.local:
+                    self.kroki_manager = KrokiManager(
+                        docker_api=DockerApi.from_environment(), replicas=replicas
+                    )
+                cached.healthy_at = time.time()
+                discovery.save(cached)
+                return kroki_client
+            kroki_client.close()
+            discovery.invalidate()
+
+        if not endpoints and replicas > 1 and settings.kroki_mode in ("auto", "local"):
+            endpoints = self._determine_replica_urls(settings, replicas)
+        kroki_url = endpoints[0] if endpoints else self._determine_kroki_url(settings)
+        kroki_client = self._create_kroki_client(settings, endpoints or [kroki_url])
+        # An auto-mode fallback to remote is not persisted: the next run checks
+        # local Kroki again instead of sticking to the fallback
+        if kroki_client.warm_up() and discovery is not None and self.kroki_manager is not None:
+            discovery.save(DiscoveryState(
+                key=discovery_key,
+                urls=endpoints or [kroki_url],
+                local=True,
+                healthy_at=time.time()
+            ))
+        return kroki_client
+
+    def _create_kroki_client(self, settings: Any, kroki_urls: list[str]) -> KrokiClient:
+        """Create the Kroki client for the given endpoint(s).
+
+        Args:
+            settings: Application settings
+            kroki_urls: Kroki endpoint(s); the first is the primary
+
+        Returns:
+            KrokiClient (failover across kroki_urls if there are several)
+        """
+        options = self._kroki_client_options(settings)
+        options.update(self._failover_options(settings, kroki_urls))
+        if self.render_cache is not None:
+            options["render_cache"] = self.render_cache
+        return KrokiClient(kroki_urls[0], **options)
+
+    @staticmethod
+    def _discovery_cache(settings: Any) -> DiscoveryCache | None:
+        """Create the persisted discovery cache, or None if disabled."""
+        discovery_file = getattr(settings, "kroki_discovery_file", None)
+        ttl = getattr(settings, "kroki_discovery_ttl", None)
+        if not discovery_file or not ttl:
+            return None
+        return DiscoveryCache(discovery_file, ttl)
+
+    def close(self) -> None:
+        """Release resources held by the orchestrator.
+
+        Closes the Kroki connection pool unless the client was shared
+        by the caller (who is then responsible for closing it).
+        """
+        if self._owns_kroki_client:
+            try:
+                kroki_client = self.kroki_client
+            except KrokiManagerError:
+                # Discovery failed - no client was created
+                return
+            kroki_client.close()
+
+    def __enter__(self) -> "Orchestrator":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _kroki_client_options(self, settings: Any) -> dict[str, Any]:
+        """Collect optional KrokiClient tuning options from settings.
+        
+        Only options configured in settings are forwarded, so KrokiClient
+        defaults apply for everything else.
+        
+        Args:
+            settings: Application settings
+            
+        Returns:
+            Keyword arguments for KrokiClient
+        """
+        options: dict[str, Any] = {}
+        max_connections = getattr(settings, "kroki_max_connections", None)
+        if max_connections is not None:
+            options["max_connections"] = max_connections
+        if getattr(settings, "kroki_http2", False):
+            options["http2"] = True
+        if getattr(settings, "kroki_request_method", "post") == "get":
+            # GET renders are revalidated against a local HTTP cache (ETag/Cache-Control)
+            options["request_method"] = "get"
+            options["max_get_url_length"] = settings.kroki_max_get_url_length
+            options["http_cache"] = HttpCache(
+                settings.http_cache_dir,
+                max_bytes=settings.render_cache_max_mb * 1024 * 1024
+            )
+        max_retries = getattr(settings, "kroki_max_retries", None)
+        if max_retries is not None:
+            options["retry_policy"] = RetryPolicy(max_retries=max_retries)
+        if getattr(settings, "kroki_adaptive_concurrency", False):
+            options["adaptive_concurrency"] = True
+            options["max_concurrency"] = settings.kroki_max_concurrency
+        capabilities_dir = getattr(settings, "capabilities_dir", None)
+        if capabilities_dir is not None:
+            options["capabilities"] = CapabilityRegistry(capabilities_dir)
+        timeouts = getattr(settings, "kroki_timeouts", None)
+        if timeouts is not None:
+            options["timeout_policy"] = TimeoutPolicy(
+                overrides=timeouts,
+                adaptive=settings.kroki_adaptive_timeouts,
+                floor=settings.kroki_timeout_floor,
+                ceiling=settings.kroki_timeout_ceiling
+            )
+        return options
+
+    def _failover_options(self, settings: Any, kroki_urls: list[str]) -> dict[str, Any]:
+        """Configure circuit breaking, load balancing and failover for the Kroki URLs.
+        
+        Breakers are shared process-wide per URL. Several URLs are
+        load-balanced, ejecting replicas whose breaker is open. In auto mode
+        Kroki that stops responding mid-run fails over to the remote URL
+        until a half-open probe finds a local instance healthy again.
+        
+        Args:
+            settings: Application settings
+            kroki_urls: Kroki URL(s) chosen for this run
+            
+        Returns:
+            Keyword arguments for KrokiClient (empty if not configured)
+        """
+        threshold = getattr(settings, "kroki_breaker_threshold", None)
+        if threshold is None:
+            return {}
+        reset_timeout = settings.kroki_breaker_reset_seconds
+        options: dict[str, Any] = {}
+        if len(kroki_urls) > 1:
+            options["balancer"] = KrokiBalancer.for_urls(kroki_urls, threshold, reset_timeout)
+        else:
+            options["circuit_breaker"] = get_breaker(kroki_urls[0], threshold, reset_timeout)
+        if settings.kroki_mode == "auto" and settings.kroki_remote_url not in kroki_urls:
+            options["fallback_url"] = settings.kroki_remote_url
+        return options
+
+    def _create_render_cache(self, settings: Any) -> RenderCache | None:
+        """Create the on-disk render cache if enabled in settings.
+        
+        Args:
+            settings: Application settings
+            
+        Returns:
+            RenderCache instance, or None if caching is disabled
+        """
+        if not getattr(settings, "render_cache_enabled", False):
+            return None
+        return RenderCache(
+            settings.render_cache_dir,
+            max_bytes=settings.render_cache_max_mb * 1024 * 1024
+        )
     
     def _determine_kroki_url(self, settings: Any) -> str:
         """Determine which Kroki URL to use based on mode and availability.
         
         Auto-mode logic:
         - Try to use local Kroki (Docker) if available
-        - Start container if needed
+        - Start container if needed and wait until it is healthy
         - Fallback to remote (kroki.io) if local unavailable
         
         Local-mode: Use local Kroki only (no fallback)
@@ -65,15 +327,26 @@ class Orchestrator:
         # Auto-mode or Local-mode: Try to use local Kroki
         if mode in ("auto", "local"):
             try:
-                manager = KrokiManager()
+                manager = KrokiManager(docker_api=DockerApi.from_environment())
                 
                 # Check if container is running
-                if not manager.is_running():
-                    # Try to start container
+                if manager.is_running():
+                    # Verify container is healthy. A parallel run may have just started
+                    # it - then wait for its JVM, but fall back at once if it is hung
+                    healthy = manager.health_check() or (
+                        manager.is_starting(getattr(settings, "kroki_startup_timeout", None))
+                        and self._wait_until_healthy(manager, settings)
+                    )
+                else:
+                    # Try to start container and wait for the JVM to boot. A parallel
+                    # run starting it too waits for the lifecycle lock in start()
                     manager.start()
-                
-                # Verify container is healthy
-                if manager.health_check():
+                    healthy = self._wait_until_healthy(manager, settings)
+                    if healthy and mode == "auto":
+                        self._start_warmup(manager, settings)
+
+                if healthy:
+                    self.kroki_manager = manager
                     return settings.kroki_local_url
                 
                 # Health check failed
@@ -82,6 +355,7 @@ class Orchestrator:
                     return settings.kroki_remote_url
                 else:
                     # Local-mode: Use local even if unhealthy (explicit choice)
+                    self.kroki_manager = manager
                     return settings.kroki_local_url
                     
             except KrokiManagerError:
@@ -96,6 +370,182 @@ class Orchestrator:
         # Default fallback (shouldn't reach here)
         return settings.kroki_local_url
     
+    @staticmethod
+    def _wait_until_healthy(manager: KrokiManager, settings: Any) -> bool:
+        """Wait for started Kroki container(s) to become healthy.
+
+        Args:
+            manager: Manager of the started container(s)
+            settings: Application settings (kroki_startup_timeout)
+
+        Returns:
+            True if healthy within the startup timeout
+        """
+        startup_timeout = getattr(settings, "kroki_startup_timeout", None)
+        if startup_timeout:
+            return manager.wait_until_healthy(startup_timeout) is not None
+        return manager.wait_until_healthy() is not None
+
+    def _determine_replica_urls(self, settings: Any, replicas: int) -> list[str]:
+        """Start missing local Kroki replicas and get the URLs of healthy ones.
+
+        Args:
+            settings: Application settings
+            replicas: Number of local Kroki containers to run
+
+        Returns:
+            URLs of healthy replicas. In auto mode without any healthy
+            replica: the remote URL. In local mode: all replica URLs
+            (explicit choice, as for a single container).
+
+        Raises:
+            KrokiManagerError: If Docker is not available in local mode
+        """
+        try:
+            manager = KrokiManager(docker_api=DockerApi.from_environment(), replicas=replicas)
+            statuses = manager.replica_status()
+            missing = [
+                status["index"] for status in statuses
+                if status["index"] < replicas and not status["running"]
+            ]
+            if missing:
+                for index in missing:
+                    manager.start_replica(index)
+                # The JVMs boot in parallel - wait for all of them at once
+                self._wait_until_healthy(manager, settings)
+                statuses = manager.replica_status()
+                if settings.kroki_mode == "auto":
+                    self._start_warmup(manager, settings)
+        except KrokiManagerError:
+            if settings.kroki_mode == "auto":
+                return [settings.kroki_remote_url]
+            raise
+
+        healthy = [
+            status["url"] for status in statuses
+            if status["index"] < replicas and status["healthy"]
+        ]
+        if healthy:
+            self.kroki_manager = manager
+            return healthy
+        if settings.kroki_mode == "auto":
+            return [settings.kroki_remote_url]
+        self.kroki_manager = manager
+        return manager.endpoints
+
+    def _start_warmup(self, manager: KrokiManager, settings: Any) -> None:
+        """Warm up freshly started Kroki containers in the background (if enabled).
+
+        Renders are not blocked by the warm-up; its timings are logged to
+        generation.log once it finished.
+
+        Args:
+            manager: Manager of the started container(s)
+            settings: Application settings
+        """
+        if not getattr(settings, "kroki_warmup", None):
+            return
+        self.kroki_warmup = self._run_in_background(
+            manager.warm_up,
+            settings.kroki_warmup_types,
+            settings.kroki_warmup_formats,
+            settings.kroki_warmup_rounds
+        )
+
+    def _record_heartbeat(self, diagram_type: str) -> None:
+        """Record the use of the local Kroki container for `diag-agent kroki keepalive`."""
+        heartbeat_file = getattr(self.settings, "kroki_heartbeat_file", None)
+        if self.kroki_manager is None or not heartbeat_file:
+            return
+        Heartbeat(heartbeat_file).beat(diagram_type)
+
+    def _use_local_kroki(self, diagram_type: str) -> "Future[float | None]":
+        """Record the use of local Kroki and start the companion a diagram type needs.
+
+        Runs in the background: whether renders go to local containers
+        (kroki_manager) is only known once Kroki discovery has finished.
+
+        Args:
+            diagram_type: Type of diagram about to be rendered
+
+        Returns:
+            Future for the seconds until the companion was ready (0 if no
+            companion had to be started), or None if it did not get ready
+        """
+        def run() -> float | None:
+            try:
+                # Waits for discovery, which sets kroki_manager for local containers
+                self.kroki_client
+            except KrokiManagerError:
+                # The render reports the discovery failure
+                return 0.0
+            self._record_heartbeat(diagram_type)
+            return self._start_companion(diagram_type)
+
+        return self._run_in_background(run)
+
+    def _start_companion(self, diagram_type: str) -> float | None:
+        """Start the companion container a diagram type needs.
+
+        Args:
+            diagram_type: Type of diagram about to be rendered
+
+        Returns:
+            Seconds until the companion was ready (0 if it was running or no
+            local companion is involved), or None if it did not get ready
+        """
+        if self.kroki_manager is None or not getattr(self.settings, "kroki_companions", None):
+            return 0.0
+        manager = self.kroki_manager
+        if manager.companion_for(diagram_type) is None:
+            return 0.0
+        idle_timeout = self.settings.kroki_companion_idle_seconds
+        # Uses by all diag-agent processes decide which other companions are idle
+        heartbeat_file = getattr(self.settings, "kroki_heartbeat_file", None)
+        last_used = Heartbeat(heartbeat_file).read()["types"] if heartbeat_file else None
+        return manager.ensure_companion(
+            diagram_type, idle_timeout=idle_timeout, last_used=last_used
+        )
+
+    def _await_companion(self, companion: "Future[float | None]", logger: logging.Logger) -> None:
+        """Wait for a companion started by _use_local_kroki and log the outcome."""
+        try:
+            ready_after = companion.result()
+        except KrokiManagerError as e:
+            # The render reports the actual failure
+            logger.info(f"Kroki companion: FAILED ({e})")
+            return
+        if ready_after is None:
+            logger.info("Kroki companion: NOT READY")
+        elif ready_after > 0:
+            logger.info(f"Kroki companion: started, ready after {ready_after:.1f}s")
+
+    def _log_warmup(self, logger: logging.Logger) -> None:
+        """Log the timings of a finished Kroki warm-up (once)."""
+        if self.kroki_warmup is None or not self.kroki_warmup.done():
+            return
+        warmup, self.kroki_warmup = self.kroki_warmup, None
+        try:
+            results = warmup.result()
+        except Exception as e:
+            logger.info(f"Kroki warm-up: FAILED ({e})")
+            return
+        for url, timings in results.items():
+            logger.info(f"Kroki warm-up ({url}):")
+            for timing in timings:
+                logger.info(f"  {timing.summary()}")
+
+    def _log_concurrency(self, logger: logging.Logger) -> None:
+        """Log the adaptive concurrency limit of each Kroki endpoint (if enabled)."""
+        if not getattr(self.settings, "kroki_adaptive_concurrency", False):
+            return
+        for url, metrics in limiter_metrics().items():
+            logger.info(
+                f"Kroki concurrency ({url}): limit {metrics['limit']}, "
+                f"in flight {metrics['in_flight']}, queued {metrics['queue_depth']}, "
+                f"completed {metrics['completed']}"
+            )
+
     def _setup_file_logger(self, log_file: Path) -> logging.Logger:
         """Setup file logger for generation.log.
         
@@ -228,6 +678,36 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
             return f"{prompt}\n\nReference example:\n{example_content}"
         return prompt
 
+    def _build_focused_fix_prompt(
+        self,
+        diagram_type: str,
+        description: str,
+        diagram_source: str,
+        details: KrokiErrorDetails
+    ) -> str:
+        """Build a syntax fix prompt from a structured Kroki error.
+
+        Only the error summary and the offending lines are sent instead of
+        the raw Kroki error body and the syntax example, which keeps the
+        prompt small and points the LLM at the exact location.
+
+        Args:
+            diagram_type: Type of diagram
+            description: Original diagram description
+            diagram_source: Source that failed to render
+            details: Structured error with a line number
+
+        Returns:
+            Prompt for the LLM
+        """
+        prompt = f"Fix the following {diagram_type} diagram. Kroki reported: {details.summary()}"
+        if details.snippet:
+            prompt += f"\\n\\nOffending lines:\\n{details.snippet}"
+        return (
+            prompt
+            + f"\\n\\nOriginal request: {description}\\n\\nPrevious source:\\n{diagram_source}"
+        )
+
     def execute(
         self,
         description: str,
@@ -236,7 +716,7 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
         output_formats: str = "png,svg,source",
         progress_callback: Any = None,
         skip_validation: bool = False
-    ) -> Dict[str, Any]:
+    ) -> dict[str, Any]:
         """Execute diagram generation workflow with iteration limits.
         
         Args:
@@ -252,6 +732,11 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
             - iterations_used: Number of iterations performed
             - elapsed_seconds: Total time elapsed
             - stopped_reason: Why iteration stopped (max_iterations | max_time | success)
+            - render_cache_hits: Renders served from the render cache
+            - format_timings: Seconds spent producing each output format
+
+        Raises:
+            KrokiUnavailableError: If Kroki stays unreachable after retries
         """
         # Setup logging to file
         output_path_obj = Path(output_dir)
@@ -292,10 +777,21 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
         # Track iteration state
         iterations_used = 0
         start_time = time.time()
+        # Counted per run - the render cache may be shared with concurrent runs
+        cache_hits = CacheHitCounter()
+        # Each run gets its own budget for retrying transient Kroki failures
+        max_retries = getattr(self.settings, "kroki_retry_budget", None)
+        retry_budget = RetryBudget(
+            RetryBudget.DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        )
+        # A companion container (e.g., for mermaid) boots while the LLM generates the first source
+        companion: "Future[float | None] | None" = self._use_local_kroki(diagram_type)
         stopped_reason = "success"
         diagram_source = ""  # Will be set by LLM
         validation_error = None  # Track validation errors for refinement
+        validation_details = None  # Structured Kroki error (line, snippet) if parsed
         design_feedback = None  # Track design feedback for refinement
+        rendered: dict[str, bytes] = {}  # Kroki output for current diagram_source, by format
         
         # Get limits from settings
         max_iterations = self.settings.max_iterations
@@ -320,7 +816,18 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
                 break
             
             # Build prompt for diagram generation
-            if validation_error:
+            if (
+                validation_error and validation_details is not None
+                and validation_details.line is not None
+            ):
+                # Focused refinement prompt: compact error + offending lines
+                # instead of the raw Kroki body
+                prompt = self._build_focused_fix_prompt(
+                    diagram_type, description, diagram_source, validation_details
+                )
+                logger.info(f"LLM Prompt (focused syntax fix):")
+                logger.info(f"  {prompt}")
+            elif validation_error:
                 # Refinement prompt with syntax error details
                 prompt = f"Fix the following {diagram_type} diagram. Previous attempt had this error: {validation_error}\\n\\nOriginal request: {description}\\n\\nPrevious source:\\n{diagram_source}"
                 prompt = self._append_example_to_prompt(prompt, example_content)
@@ -342,17 +849,27 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
             # Call LLM to generate diagram source
             diagram_source = self.llm_client.generate(prompt)
             logger.info(f"LLM Response: {len(diagram_source)} characters")
+            # New source - renders of the previous attempt no longer apply
+            rendered = {}
             
+            if companion is not None:
+                self._await_companion(companion, logger)
+                companion = None
+
             # Validate syntax with Kroki
             try:
                 # Use SVG for validation (universally supported by all diagram types)
                 validation_bytes = self.kroki_client.render_diagram(
                     diagram_source=diagram_source,
                     diagram_type=diagram_type,
-                    output_format="svg"
+                    output_format="svg",
+                    retry_budget=retry_budget,
+                    cache_hits=cache_hits
                 )
                 # Validation successful - diagram is syntactically valid
                 validation_error = None
+                validation_details = None
+                rendered["svg"] = validation_bytes
                 logger.info("Kroki Validation: SUCCESS")
                 
                 # Design validation (if enabled)
@@ -363,8 +880,11 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
                         png_bytes = self.kroki_client.render_diagram(
                             diagram_source=diagram_source,
                             diagram_type=diagram_type,
-                            output_format="png"
+                            output_format="png",
+                            retry_budget=retry_budget,
+                            cache_hits=cache_hits
                         )
+                        rendered["png"] = png_bytes
                         # Analyze design with vision-capable LLM
                         design_criteria_prompt = "Analyze this diagram for layout quality, readability, and spacing. If the design is good, respond with 'approved'. Otherwise, provide specific improvement suggestions."
                         feedback = self.llm_client.vision_analyze(png_bytes, design_criteria_prompt)
@@ -383,6 +903,17 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
                             logger.info(f"  {feedback}")
                             logger.info(f"Iteration {iterations_used}/{max_iterations} - COMPLETE (design improvement needed)")
                             # Continue to next iteration
+                    except KrokiUnavailableError:
+                        raise
+                    except KrokiRenderTimeout:
+                        # Valid (SVG rendered) but too slow as PNG - finish without the design check
+                        logger.info("Design Analysis: SKIPPED (PNG render timed out)")
+                        design_feedback = None
+                        logger.info(
+                            f"Iteration {iterations_used}/{max_iterations} - "
+                            f"COMPLETE (syntax valid, design validation skipped)"
+                        )
+                        break
                     except KrokiRenderError:
                         # PNG not supported by this diagram type - skip design validation
                         logger.info("Design Analysis: SKIPPED (diagram type does not support PNG format required by Vision API)")
@@ -394,9 +925,16 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
                     logger.info(f"Iteration {iterations_used}/{max_iterations} - COMPLETE (syntax valid)")
                     break
                     
+            except KrokiUnavailableError:
+                # Kroki itself is failing (retries exhausted) - another LLM attempt cannot fix that
+                logger.info("Kroki Validation: UNAVAILABLE")
+                self._cleanup_logger(logger)
+                raise
             except KrokiRenderError as e:
-                # Validation failed - save error for refinement prompt
+                # Validation failed (including a render timeout of an overly
+                # complex diagram) - save error for refinement prompt
                 validation_error = str(e)
+                validation_details = getattr(e, "details", None)
                 logger.info("Kroki Validation: ERROR")
                 logger.info(f"  {validation_error}")
                 logger.info(f"Iteration {iterations_used}/{max_iterations} - COMPLETE (validation error)")
@@ -413,27 +951,20 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
         
         # Parse output formats (comma-separated)
         formats = [fmt.strip() for fmt in output_formats.split(",")]
-        primary_output_path = None
         
-        for fmt in formats:
-            if fmt == "source":
-                # Write source file with appropriate extension
-                extension = self._get_source_extension(diagram_type)
-                file_path = output_path_obj / f"diagram{extension}"
-                file_path.write_text(diagram_source)
-            else:
-                # Render diagram via Kroki
-                rendered_bytes = self.kroki_client.render_diagram(
-                    diagram_source=diagram_source,
-                    diagram_type=diagram_type,
-                    output_format=fmt
-                )
-                file_path = output_path_obj / f"diagram.{fmt}"
-                file_path.write_bytes(rendered_bytes)
-            
-            # Track first file as primary output
-            if primary_output_path is None:
-                primary_output_path = str(file_path)
+        # Render and write all formats concurrently - wall time is set by the slowest format
+        output_paths, format_timings = self._write_outputs(
+            diagram_source, diagram_type, formats, output_path_obj, rendered,
+            retry_budget, cache_hits, logger
+        )
+        # First format is the primary output
+        primary_output_path = output_paths[0] if output_paths else None
+        
+        # Renders served from the on-disk cache (no Kroki round-trip)
+        render_cache_hits = cache_hits.count
+        logger.info(f"Render cache hits: {render_cache_hits}")
+        self._log_concurrency(logger)
+        self._log_warmup(logger)
         
         # Cleanup logger
         self._cleanup_logger(logger)
@@ -443,9 +974,103 @@ Respond with ONLY the subtype name (one word, lowercase). If unsure, respond wit
             "output_path": primary_output_path,
             "iterations_used": iterations_used,
             "elapsed_seconds": elapsed_seconds,
-            "stopped_reason": stopped_reason
+            "stopped_reason": stopped_reason,
+            "render_cache_hits": render_cache_hits,
+            "format_timings": format_timings
         }
 
+    def _write_outputs(
+        self,
+        diagram_source: str,
+        diagram_type: str,
+        formats: list[str],
+        output_dir: Path,
+        rendered: dict[str, bytes],
+        retry_budget: RetryBudget,
+        cache_hits: CacheHitCounter,
+        logger: logging.Logger
+    ) -> tuple[list[str], dict[str, float]]:
+        """Render and write all requested output formats concurrently.
+        
+        Formats already rendered during the iteration loop are written
+        directly; the others are streamed from Kroki to disk in a bounded
+        thread pool. Every file is written atomically (temp file + rename).
+        Formats the Kroki server is known not to support for the diagram
+        type are skipped without a request.
+        
+        Args:
+            diagram_source: Final diagram source code
+            diagram_type: Type of diagram (plantuml, mermaid, etc.)
+            formats: Output formats in requested order ("source" writes the source file)
+            output_dir: Directory to write files to
+            rendered: Bytes already rendered for diagram_source, by format
+            retry_budget: Retry budget of the current run
+            cache_hits: Render cache hit counter of the current run
+            logger: Generation logger
+            
+        Returns:
+            Tuple of (file paths in format order, seconds spent per format);
+            skipped formats are omitted
+            
+        Raises:
+            KrokiRenderError: If rendering any format fails
+        """
+        def write_output(fmt: str) -> tuple[str, float]:
+            format_start = time.perf_counter()
+            if fmt == "source":
+                # Write source file with appropriate extension
+                extension = self._get_source_extension(diagram_type)
+                file_path = output_dir / f"diagram{extension}"
+                atomic_write_bytes(file_path, diagram_source.encode("utf-8"))
+            else:
+                # Reuse bytes already rendered for validation/design check,
+                # only formats not seen yet go to Kroki
+                file_path = output_dir / f"diagram.{fmt}"
+                rendered_bytes = rendered.get(fmt)
+                if rendered_bytes is None:
+                    # Stream large outputs straight to disk instead of into memory
+                    self.kroki_client.render_to_path(
+                        diagram_source=diagram_source,
+                        diagram_type=diagram_type,
+                        output_format=cast(OutputFormat, fmt),
+                        path=file_path,
+                        retry_budget=retry_budget,
+                        cache_hits=cache_hits
+                    )
+                else:
+                    logger.info(f"Output {fmt}: reusing validated render")
+                    atomic_write_bytes(file_path, rendered_bytes)
+            return str(file_path), time.perf_counter() - format_start
+        
+        # Formats the Kroki server is known not to support would only fail
+        skipped = [
+            fmt for fmt in formats
+            if fmt != "source" and fmt not in rendered
+            and self.kroki_client.supports_format(diagram_type, fmt) is False
+        ]
+        for fmt in skipped:
+            logger.info(
+                f"Output {fmt}: SKIPPED (not supported for {diagram_type} by this Kroki server)"
+            )
+        formats = [fmt for fmt in formats if fmt not in skipped]
+        
+        if not formats:
+            return [], {}
+        
+        with ThreadPoolExecutor(max_workers=min(len(formats), self.MAX_OUTPUT_WORKERS)) as pool:
+            futures = [pool.submit(write_output, fmt) for fmt in formats]
+        
+        output_paths = []
+        format_timings: dict[str, float] = {}
+        for fmt, future in zip(formats, futures):
+            # Re-raises the render error of a failed format
+            file_path, seconds = future.result()
+            output_paths.append(file_path)
+            format_timings[fmt] = seconds
+            logger.info(f"Output {fmt}: {seconds:.2f}s")
+        
+        return output_paths, format_timings
+
     def _get_source_extension(self, diagram_type: str) -> str:
         """Get file extension for source format based on diagram type.
         
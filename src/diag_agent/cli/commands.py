@@ -4,13 +4,23 @@ Entry point for the command-line interface using Click framework.
 """
 
 import click
+import json
 import subprocess
+import time
 from pathlib import Path
-from typing import List, Tuple
 
 from diag_agent.config.settings import Settings
 from diag_agent.agent.orchestrator import Orchestrator
+from diag_agent.kroki.docker_api import DockerApi
+from diag_agent.kroki.discovery import DiscoveryCache
+from diag_agent.kroki.keepalive import Heartbeat, KeepaliveSupervisor
 from diag_agent.kroki.manager import KrokiManager, KrokiManagerError
+from diag_agent.kroki.monitor import StatusMonitor, format_sample
+from diag_agent.kroki.warmup import (
+    DEFAULT_WARMUP_FORMATS,
+    DEFAULT_WARMUP_ROUNDS,
+    DEFAULT_WARMUP_TYPES,
+)
 
 
 @click.group()
@@ -79,14 +89,18 @@ def create(description: str, diagram_type: str, output: str, output_format: str,
         sys.stdout.flush()
     
     # Execute diagram generation with progress updates
-    result = orchestrator.execute(
-        description=description,
-        diagram_type=diagram_type,
-        output_dir=output,
-        output_formats=output_format,
-        progress_callback=progress_callback,
-        skip_validation=force
-    )
+    try:
+        result = orchestrator.execute(
+            description=description,
+            diagram_type=diagram_type,
+            output_dir=output,
+            output_formats=output_format,
+            progress_callback=progress_callback,
+            skip_validation=force
+        )
+    finally:
+        # Release the Kroki connection pool
+        orchestrator.close()
     
     # Clear progress line and show final result
     click.echo(f"\r{'✓ Diagram generated: ' + result['output_path']}")
@@ -114,7 +128,7 @@ def _get_examples_dir() -> Path:
     return examples_dir
 
 
-def _list_examples(diagram_type: str = None) -> List[Tuple[str, str]]:
+def _list_examples(diagram_type: str = None) -> list[tuple[str, str]]:
     """List all available examples, optionally filtered by type.
 
     Args:
@@ -293,22 +307,43 @@ def kroki():
 
 
 @kroki.command(name="start")
-def start_kroki():
-    """Start the Kroki Docker container.
+@click.option(
+    "--replicas",
+    "-r",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of Kroki containers (JVMs) on consecutive ports"
+)
+def start_kroki(replicas: int):
+    """Start the Kroki Docker container(s).
 
     Launches a Docker container running the Kroki diagram rendering service.
     The container runs in detached mode and is accessible at http://localhost:8000.
+    With --replicas N, N containers run on ports 8000..8000+N-1 and
+    renders are load-balanced across them (set DIAG_AGENT_KROKI_REPLICAS=N).
 
     Examples:
 
         diag-agent kroki start
+
+        diag-agent kroki start --replicas 3
     """
     try:
-        manager = KrokiManager()
+        manager = KrokiManager(docker_api=DockerApi.from_environment(), replicas=replicas)
         manager.start()
         click.echo("✓ Kroki container started successfully")
         click.echo(f"  URL: {manager.kroki_url}")
         click.echo(f"  Container: {manager.CONTAINER_NAME}")
+        if replicas > 1:
+            click.echo(f"  Replicas: {', '.join(manager.endpoints)}")
+
+        # The JVM needs a few seconds to boot - report when renders are possible
+        ready_after = manager.wait_until_healthy()
+        if ready_after is not None:
+            click.echo(f"  Ready after: {ready_after:.1f}s")
+        else:
+            click.echo(f"  Health: Not ready after {manager.STARTUP_TIMEOUT:.0f}s ✗")
 
     except KrokiManagerError as e:
         click.echo(f"Error: {e}", err=True)
@@ -320,18 +355,21 @@ def start_kroki():
 
 @kroki.command(name="stop")
 def stop_kroki():
-    """Stop and remove the Kroki Docker container.
+    """Stop and remove the Kroki Docker container(s).
 
-    Stops the running Kroki container and removes it to free resources.
-    Gracefully handles the case where the container is not running.
+    Stops the running Kroki containers (all replicas and companions) and
+    removes them to free resources. Gracefully handles the case where the container is not running.
 
     Examples:
 
         diag-agent kroki stop
     """
     try:
-        manager = KrokiManager()
-        manager.stop()
+        manager = KrokiManager(docker_api=DockerApi.from_environment())
+        manager.stop(all_replicas=True)
+        manager.stop_companions()
+        # Later runs must not reuse the endpoint of the stopped container
+        DiscoveryCache(Settings().kroki_discovery_file).invalidate()
         click.echo("✓ Kroki container stopped successfully")
 
     except KrokiManagerError as e:
@@ -342,32 +380,237 @@ def stop_kroki():
         raise click.Abort()
 
 
+@kroki.command(name="restart")
+def restart_kroki():
+    """Restart the Kroki replicas one at a time (rolling restart).
+
+    Each replica must be healthy again before the next one is restarted,
+    so the other replicas keep serving renders.
+
+    Examples:
+
+        diag-agent kroki restart
+    """
+    try:
+        manager = KrokiManager(docker_api=DockerApi.from_environment())
+        ready_after = manager.rolling_restart()
+        for name, seconds in ready_after.items():
+            click.echo(f"✓ {name} restarted (ready after {seconds:.1f}s)")
+
+    except KrokiManagerError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+    except Exception as e:
+        click.echo(f"Unexpected error: {e}", err=True)
+        raise click.Abort()
+
+
+@kroki.command(name="warmup")
+@click.option(
+    "--types",
+    "-t",
+    default=",".join(DEFAULT_WARMUP_TYPES),
+    show_default=True,
+    help="Comma-separated diagram types to warm up"
+)
+@click.option(
+    "--formats",
+    "-f",
+    default=",".join(DEFAULT_WARMUP_FORMATS),
+    show_default=True,
+    help="Comma-separated output formats to render"
+)
+@click.option(
+    "--rounds",
+    "-n",
+    type=click.IntRange(min=1),
+    default=DEFAULT_WARMUP_ROUNDS,
+    show_default=True,
+    help="Renders per diagram type and format"
+)
+def warmup_kroki(types: str, formats: str, rounds: int):
+    """Warm up the JVM of the running Kroki container(s).
+
+    Renders a small example of each diagram type and format several
+    times, so the first real renders do not pay for JIT compilation and
+    class loading. Shows the first (cold) and last (warm) render time.
+    Auto mode does this automatically after starting a container.
+
+    Examples:
+
+        diag-agent kroki warmup
+
+        diag-agent kroki warmup --types plantuml,mermaid --formats svg --rounds 5
+    """
+    try:
+        manager = KrokiManager(docker_api=DockerApi.from_environment())
+        urls = [status["url"] for status in manager.replica_status() if status["healthy"]]
+        if not urls:
+            click.echo(
+                "Error: No healthy Kroki container. Use 'diag-agent kroki start' first.", err=True
+            )
+            raise click.Abort()
+
+        results = manager.warm_up(
+            diagram_types=[item.strip() for item in types.split(",") if item.strip()],
+            output_formats=[item.strip() for item in formats.split(",") if item.strip()],
+            rounds=rounds,
+            urls=urls
+        )
+        for url, timings in results.items():
+            click.echo(f"Kroki warm-up ({url}):")
+            for timing in timings:
+                mark = "✓" if timing.error is None else "✗"
+                click.echo(f"  {mark} {timing.summary()}")
+
+    except click.Abort:
+        raise
+    except KrokiManagerError as e:
+        click.echo(f"Error: {e}", err=True)
+        raise click.Abort()
+    except Exception as e:
+        click.echo(f"Unexpected error: {e}", err=True)
+        raise click.Abort()
+
+
+@kroki.command(name="keepalive")
+@click.option(
+    "--idle-minutes",
+    type=click.IntRange(min=1),
+    default=None,
+    help=(
+        "Stop Kroki after this many minutes without use "
+        "[default: DIAG_AGENT_KROKI_IDLE_MINUTES or 30]"
+    )
+)
+@click.option(
+    "--lead-minutes",
+    type=click.IntRange(min=0),
+    default=None,
+    help=(
+        "Start Kroki this many minutes before expected use "
+        "[default: DIAG_AGENT_KROKI_PREWARM_MINUTES or 10]"
+    )
+)
+@click.option(
+    "--interval",
+    type=click.IntRange(min=1),
+    default=60,
+    show_default=True,
+    help="Seconds between usage checks"
+)
+def keepalive_kroki(idle_minutes: int, lead_minutes: int, interval: int):
+    """Stop idle Kroki containers and pre-warm them before expected use.
+
+    Watches the heartbeat file written by diag-agent runs. Stops the
+    container (and its companions) after an idle period, and starts and
+    warms it up shortly before work usually starts - e.g., a docs build
+    that ran around the same time on earlier days. Runs until Ctrl+C.
+
+    Examples:
+
+        diag-agent kroki keepalive
+
+        diag-agent kroki keepalive --idle-minutes 15 --lead-minutes 5
+    """
+    settings = Settings()
+    idle_minutes = idle_minutes or settings.kroki_idle_minutes
+    lead_minutes = settings.kroki_prewarm_minutes if lead_minutes is None else lead_minutes
+    manager = KrokiManager(
+        docker_api=DockerApi.from_environment(), replicas=settings.kroki_replicas
+    )
+    supervisor = KeepaliveSupervisor(
+        manager,
+        Heartbeat(settings.kroki_heartbeat_file),
+        idle_timeout=idle_minutes * 60,
+        lead_time=lead_minutes * 60,
+        warmup_types=settings.kroki_warmup_types,
+        warmup_formats=settings.kroki_warmup_formats,
+        warmup_rounds=settings.kroki_warmup_rounds,
+        discovery=DiscoveryCache(settings.kroki_discovery_file)
+    )
+    click.echo(
+        f"Kroki keepalive: stopping after {idle_minutes} min idle, "
+        f"pre-warming {lead_minutes} min ahead (Ctrl+C to exit)"
+    )
+    try:
+        supervisor.run(
+            interval=interval,
+            on_action=lambda action: click.echo(f"[{time.strftime('%H:%M:%S')}] {action}")
+        )
+    except KeyboardInterrupt:
+        click.echo("Kroki keepalive stopped")
+
+
 @kroki.command(name="status")
-def status_kroki():
-    """Show the status of the Kroki Docker container.
+@click.option(
+    "--watch",
+    "-w",
+    is_flag=True,
+    help="Refresh continuously with resource usage, render latency and throughput",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.5),
+    default=5.0,
+    show_default=True,
+    help="Seconds between refreshes in watch mode",
+)
+@click.option(
+    "--types",
+    "-t",
+    default=",".join(DEFAULT_WARMUP_TYPES),
+    show_default=True,
+    help="Comma-separated diagram types to measure render latency for (watch mode)",
+)
+@click.option(
+    "--json-lines",
+    "json_lines",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Append each sample as a JSON line to this file (watch mode)",
+)
+@click.option(
+    "--count",
+    "-n",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Stop after this many samples in watch mode (0 = until Ctrl+C)",
+)
+def status_kroki(watch: bool, interval: float, types: str, json_lines: Path | None, count: int):
+    """Show the status of the Kroki Docker container(s).
 
-    Displays whether the container is running and if the service is healthy.
+    Displays whether each replica container is running and if its
+    service is healthy. With --watch, the status refreshes on an interval
+    and also shows CPU/memory (Docker stats), network throughput and the
+    latency of a small render per diagram type.
 
     Examples:
 
         diag-agent kroki status
+
+        diag-agent kroki status --watch --interval 10
+
+        diag-agent kroki status -w -t plantuml,mermaid --json-lines kroki-stats.jsonl
     """
     try:
-        manager = KrokiManager()
-        is_running = manager.is_running()
+        manager = KrokiManager(docker_api=DockerApi.from_environment())
+        if watch:
+            diagram_types = [item.strip() for item in types.split(",") if item.strip()]
+            _watch_status(manager, interval, diagram_types, json_lines, count)
+            return
 
-        if is_running:
-            # Container is running - check health
-            is_healthy = manager.health_check()
+        statuses = manager.replica_status()
 
-            click.echo("Kroki Status:")
-            click.echo(f"  Container: Running ✓")
-            click.echo(f"  Health: {'Healthy ✓' if is_healthy else 'Unhealthy ✗'}")
-            click.echo(f"  URL: {manager.kroki_url}")
-        else:
-            # Container is not running
-            click.echo("Kroki Status:")
-            click.echo(f"  Container: Stopped")
+        click.echo("Kroki Status:")
+        for status in statuses:
+            if status["running"]:
+                health = "Healthy ✓" if status["healthy"] else "Unhealthy ✗"
+                click.echo(f"  {status['name']}: Running ✓, {health} - {status['url']}")
+            else:
+                click.echo(f"  {status['name']}: Stopped")
+
+        if not any(status["running"] for status in statuses):
             click.echo(f"\nUse 'diag-agent kroki start' to start the container.")
 
     except Exception as e:
@@ -375,6 +618,33 @@ def status_kroki():
         raise click.Abort()
 
 
+def _watch_status(
+    manager: KrokiManager,
+    interval: float,
+    diagram_types: list[str],
+    json_lines: Path | None,
+    count: int
+) -> None:
+    """Sample and print the Kroki status until interrupted (or count samples)."""
+    monitor = StatusMonitor(manager, diagram_types)
+    samples = 0
+    try:
+        while True:
+            sample = monitor.sample()
+            click.clear()
+            for line in format_sample(sample):
+                click.echo(line)
+            if json_lines is not None:
+                with open(json_lines, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(sample, sort_keys=True) + "\n")
+            samples += 1
+            if count and samples >= count:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
 @kroki.command(name="logs")
 @click.option(
     "--follow",
@@ -8,6 +8,7 @@ Loads settings from multiple sources with precedence:
 
 import os
 from dataclasses import dataclass
+from pathlib import Path
 from dotenv import load_dotenv
 
 
@@ -27,6 +28,42 @@ class Settings:
     kroki_mode: str
     kroki_local_url: str
     kroki_remote_url: str
+    kroki_endpoints: list[str]
+    kroki_max_connections: int
+    kroki_http2: bool
+    kroki_request_method: str
+    kroki_max_get_url_length: int
+    kroki_max_retries: int
+    kroki_retry_budget: int
+    kroki_breaker_threshold: int
+    kroki_breaker_reset_seconds: int
+    kroki_startup_timeout: int
+    kroki_replicas: int
+    kroki_warmup: bool
+    kroki_warmup_types: list[str]
+    kroki_warmup_formats: list[str]
+    kroki_warmup_rounds: int
+    kroki_companions: bool
+    kroki_companion_idle_seconds: int
+    kroki_adaptive_concurrency: bool
+    kroki_max_concurrency: int
+    kroki_timeouts: dict[str, float]
+    kroki_adaptive_timeouts: bool
+    kroki_timeout_floor: int
+    kroki_timeout_ceiling: int
+    
+    # Caching
+    cache_dir: str
+    render_cache_enabled: bool
+    render_cache_dir: str
+    render_cache_max_mb: int
+    http_cache_dir: str
+    capabilities_dir: str
+    kroki_heartbeat_file: str
+    kroki_discovery_file: str
+    kroki_discovery_ttl: int
+    kroki_idle_minutes: int
+    kroki_prewarm_minutes: int
     
     # Agent Configuration
     max_iterations: int
@@ -55,6 +92,88 @@ class Settings:
             "DIAG_AGENT_KROKI_REMOTE_URL",
             "https://kroki.io"
         )
+        # Comma-separated Kroki replicas to load-balance across (overrides local/remote discovery)
+        self.kroki_endpoints = self._get_list_env("DIAG_AGENT_KROKI_ENDPOINTS")
+        self.kroki_max_connections = self._get_int_env("DIAG_AGENT_KROKI_MAX_CONNECTIONS", 10)
+        self.kroki_http2 = self._get_bool_env("DIAG_AGENT_KROKI_HTTP2", False)
+        # "post" (JSON body) or "get" (encoded URL, cacheable by HTTP caches/proxies)
+        self.kroki_request_method = os.getenv("DIAG_AGENT_KROKI_REQUEST_METHOD", "post").lower()
+        self.kroki_max_get_url_length = self._get_int_env(
+            "DIAG_AGENT_KROKI_MAX_GET_URL_LENGTH", 4096
+        )
+        # Retries for transient failures (timeouts, resets, 502/503/504):
+        # per request, and in total per run
+        self.kroki_max_retries = self._get_int_env("DIAG_AGENT_KROKI_MAX_RETRIES", 2)
+        self.kroki_retry_budget = self._get_int_env("DIAG_AGENT_KROKI_RETRY_BUDGET", 10)
+        # Circuit breaker: consecutive transport failures before an endpoint is
+        # skipped (auto mode fails over to remote), and seconds until it is probed again
+        self.kroki_breaker_threshold = self._get_int_env("DIAG_AGENT_KROKI_BREAKER_THRESHOLD", 3)
+        self.kroki_breaker_reset_seconds = self._get_int_env(
+            "DIAG_AGENT_KROKI_BREAKER_RESET_SECONDS", 30
+        )
+        # Seconds auto/local mode waits for a freshly started container to become healthy
+        self.kroki_startup_timeout = self._get_int_env("DIAG_AGENT_KROKI_STARTUP_TIMEOUT", 60)
+        # Local Kroki containers (JVMs) on consecutive ports, load-balanced by the client
+        self.kroki_replicas = self._get_int_env("DIAG_AGENT_KROKI_REPLICAS", 1)
+        # JVM warm-up renders after auto mode started a container
+        self.kroki_warmup = self._get_bool_env("DIAG_AGENT_KROKI_WARMUP", True)
+        self.kroki_warmup_types = self._get_list_env("DIAG_AGENT_KROKI_WARMUP_TYPES") or [
+            "plantuml", "c4plantuml", "mermaid", "bpmn"
+        ]
+        self.kroki_warmup_formats = (
+            self._get_list_env("DIAG_AGENT_KROKI_WARMUP_FORMATS") or ["svg", "png"]
+        )
+        self.kroki_warmup_rounds = self._get_int_env("DIAG_AGENT_KROKI_WARMUP_ROUNDS", 3)
+        # Companion containers (mermaid, bpmn, ...) started on first use, stopped when idle
+        self.kroki_companions = self._get_bool_env("DIAG_AGENT_KROKI_COMPANIONS", True)
+        self.kroki_companion_idle_seconds = self._get_int_env(
+            "DIAG_AGENT_KROKI_COMPANION_IDLE_SECONDS", 900
+        )
+        # Latency-driven limit of concurrent renders per Kroki endpoint (opt-in)
+        self.kroki_adaptive_concurrency = self._get_bool_env(
+            "DIAG_AGENT_KROKI_ADAPTIVE_CONCURRENCY", False
+        )
+        self.kroki_max_concurrency = self._get_int_env("DIAG_AGENT_KROKI_MAX_CONCURRENCY", 32)
+        # Render timeouts in seconds by "type" or "type/format", e.g. "mermaid=10,bpmn/png=90"
+        self.kroki_timeouts = self._get_timeouts_env("DIAG_AGENT_KROKI_TIMEOUTS")
+        # Adaptive timeouts: a multiple of the observed p99 latency per type/format,
+        # clamped to [floor, ceiling] seconds
+        self.kroki_adaptive_timeouts = self._get_bool_env(
+            "DIAG_AGENT_KROKI_ADAPTIVE_TIMEOUTS", False
+        )
+        self.kroki_timeout_floor = self._get_int_env("DIAG_AGENT_KROKI_TIMEOUT_FLOOR", 2)
+        self.kroki_timeout_ceiling = self._get_int_env("DIAG_AGENT_KROKI_TIMEOUT_CEILING", 120)
+        
+        # Caching
+        self.cache_dir = os.getenv("DIAG_AGENT_CACHE_DIR", self._default_cache_dir())
+        self.render_cache_enabled = self._get_bool_env("DIAG_AGENT_RENDER_CACHE", True)
+        self.render_cache_dir = os.getenv(
+            "DIAG_AGENT_RENDER_CACHE_DIR",
+            str(Path(self.cache_dir) / "renders")
+        )
+        self.render_cache_max_mb = self._get_int_env("DIAG_AGENT_RENDER_CACHE_MAX_MB", 256)
+        self.http_cache_dir = os.getenv(
+            "DIAG_AGENT_HTTP_CACHE_DIR",
+            str(Path(self.cache_dir) / "http")
+        )
+        # Supported (diagram type, output format) pairs per Kroki server and version
+        self.capabilities_dir = os.getenv(
+            "DIAG_AGENT_CAPABILITIES_DIR",
+            str(Path(self.cache_dir) / "capabilities")
+        )
+        # Usage record of the local Kroki container for `diag-agent kroki keepalive`
+        self.kroki_heartbeat_file = os.getenv(
+            "DIAG_AGENT_KROKI_HEARTBEAT_FILE",
+            str(Path(self.cache_dir) / "kroki-heartbeat.json")
+        )
+        self.kroki_idle_minutes = self._get_int_env("DIAG_AGENT_KROKI_IDLE_MINUTES", 30)
+        # Kroki endpoint chosen by auto/local-mode discovery, reused by later runs for the TTL
+        self.kroki_discovery_file = os.getenv(
+            "DIAG_AGENT_KROKI_DISCOVERY_FILE",
+            str(Path(self.cache_dir) / "kroki-discovery.json")
+        )
+        self.kroki_discovery_ttl = self._get_int_env("DIAG_AGENT_KROKI_DISCOVERY_TTL", 300)
+        self.kroki_prewarm_minutes = self._get_int_env("DIAG_AGENT_KROKI_PREWARM_MINUTES", 10)
         
         # Agent Configuration
         self.max_iterations = self._get_int_env("DIAG_AGENT_MAX_ITERATIONS", 5)
@@ -79,6 +198,52 @@ class Settings:
         # Default to local (mode=="local" or invalid mode)
         return self.kroki_local_url
 
+    @staticmethod
+    def _default_cache_dir() -> str:
+        """Get the per-user cache directory for diag-agent.
+
+        Follows the XDG Base Directory convention ($XDG_CACHE_HOME or ~/.cache).
+
+        Returns:
+            Path of the diag-agent cache directory
+        """
+        cache_home = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+        return str(Path(cache_home) / "diag-agent")
+
+    @staticmethod
+    def _get_list_env(key: str) -> list[str]:
+        """Get a comma-separated list from an environment variable.
+        
+        Args:
+            key: Environment variable name
+            
+        Returns:
+            Non-empty, stripped list items (empty list if ENV var not set)
+        """
+        value = os.getenv(key, "")
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    @staticmethod
+    def _get_timeouts_env(key: str) -> dict[str, float]:
+        """Get per-diagram-type timeouts from an environment variable.
+        
+        Args:
+            key: Environment variable name
+            
+        Returns:
+            Timeouts in seconds by "type" or "type/format" key; entries
+            that cannot be parsed are skipped
+        """
+        timeouts: dict[str, float] = {}
+        for item in Settings._get_list_env(key):
+            name, _, seconds = item.partition("=")
+            try:
+                timeouts[name.strip().lower()] = float(seconds)
+            except ValueError:
+                # Invalid entry, ignore it
+                continue
+        return timeouts
+
     @staticmethod
     def _get_int_env(key: str, default: int) -> int:
         """Get integer value from environment variable with fallback to default.
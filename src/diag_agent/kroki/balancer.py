@@ -0,0 +1,115 @@
+"""Client-side load balancing across several Kroki endpoints."""
+
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from diag_agent.kroki.breaker import CircuitBreaker, get_breaker
+
+
+@dataclass
+class Endpoint:
+    """A Kroki endpoint managed by KrokiBalancer."""
+
+    url: str
+    breaker: CircuitBreaker
+    outstanding: int = 0  # requests currently in flight
+    health: float = 1.0  # moving success rate in [MIN_HEALTH, 1.0]
+    requests: int = 0  # total requests sent
+
+
+class KrokiBalancer:
+    """Picks the Kroki endpoint with the fewest outstanding requests, weighted by health.
+
+    Each endpoint is scored as (outstanding + 1) / health, so a replica
+    that recently failed receives less traffic than an equally busy
+    healthy one. Endpoints whose circuit breaker is open are ejected from
+    the rotation until the breaker lets a half-open probe through; a
+    successful probe readmits them.
+    """
+
+    HEALTH_DECAY = 0.8  # weight of the previous health value per request
+    MIN_HEALTH = 0.1
+
+    def __init__(self, endpoints: Sequence[Endpoint]) -> None:
+        """Initialize balancer.
+
+        Args:
+            endpoints: Endpoints to balance across (at least one)
+
+        Raises:
+            ValueError: If no endpoints are given
+        """
+        if not endpoints:
+            raise ValueError("KrokiBalancer needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_urls(
+        cls,
+        urls: Sequence[str],
+        failure_threshold: int = CircuitBreaker.DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = CircuitBreaker.DEFAULT_RESET_TIMEOUT
+    ) -> "KrokiBalancer":
+        """Create a balancer using the process-wide circuit breaker of each URL.
+
+        Args:
+            urls: Kroki base URLs
+            failure_threshold: Consecutive failures that eject an endpoint
+            reset_timeout: Seconds before an ejected endpoint is probed
+
+        Returns:
+            KrokiBalancer across the given URLs
+        """
+        return cls([
+            Endpoint(url.rstrip("/"), get_breaker(url, failure_threshold, reset_timeout))
+            for url in urls
+        ])
+
+    @property
+    def urls(self) -> list[str]:
+        """Base URLs of all endpoints."""
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def acquire(self) -> Endpoint | None:
+        """Pick an endpoint for a request and count it as outstanding.
+
+        Returns:
+            Chosen endpoint, or None if all endpoints are ejected
+        """
+        with self._lock:
+            # Ties (e.g., sequential requests) rotate by total requests sent
+            ranked = sorted(
+                self.endpoints,
+                key=lambda endpoint: (
+                    (endpoint.outstanding + 1) / endpoint.health, endpoint.requests
+                )
+            )
+            for endpoint in ranked:
+                # allow_request() hands out the half-open probe of an ejected
+                # endpoint, so only ask endpoints we would actually use
+                if endpoint.breaker.allow_request():
+                    endpoint.outstanding += 1
+                    endpoint.requests += 1
+                    return endpoint
+            return None
+
+    def release(self, endpoint: Endpoint, healthy: bool) -> None:
+        """Finish a request acquired from this balancer.
+
+        Args:
+            endpoint: Endpoint returned by acquire()
+            healthy: False if the request failed at the transport level
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            sample = 1.0 if healthy else 0.0
+            endpoint.health = max(
+                self.MIN_HEALTH,
+                endpoint.health * self.HEALTH_DECAY + sample * (1 - self.HEALTH_DECAY)
+            )
+        if healthy:
+            endpoint.breaker.record_success()
+        else:
+            endpoint.breaker.record_failure()
@@ -0,0 +1,123 @@
+"""Circuit breaker for Kroki endpoints."""
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class CircuitBreaker:
+    """Tracks consecutive transport failures of one Kroki endpoint.
+
+    States:
+    - closed: requests go to the endpoint
+    - open: the endpoint is considered down; requests are not sent to it
+      until reset_timeout has passed
+    - half-open: after reset_timeout a single probe request is let through;
+      success closes the breaker, failure opens it again
+
+    Only transport-level failures (KrokiUnavailableError) should be recorded
+    as failures - a rendering error means the endpoint is up.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    DEFAULT_FAILURE_THRESHOLD = 3
+    DEFAULT_RESET_TIMEOUT = 30.0  # seconds
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Initialize circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before a probe
+            clock: Monotonic time source (injectable for testing)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        """Current breaker state (closed, open or half-open)."""
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent to the endpoint.
+
+        While open, this returns True exactly once after reset_timeout has
+        passed (the half-open probe); concurrent callers keep being refused
+        until the probe has been recorded.
+
+        Returns:
+            True if the request should go to the endpoint
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a request the endpoint answered; closes the breaker."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Record a transport failure; may open the breaker."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+# Breakers are shared by all clients of a process, keyed by endpoint URL,
+# so a long-lived process (e.g., the MCP server) remembers a dead endpoint
+# across runs instead of rediscovering it with a timeout per run.
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(
+    kroki_url: str,
+    failure_threshold: int = CircuitBreaker.DEFAULT_FAILURE_THRESHOLD,
+    reset_timeout: float = CircuitBreaker.DEFAULT_RESET_TIMEOUT
+) -> CircuitBreaker:
+    """Get the process-wide circuit breaker for a Kroki endpoint.
+
+    Args:
+        kroki_url: Base URL of the Kroki endpoint
+        failure_threshold: Consecutive failures that open a new breaker
+        reset_timeout: Seconds a new breaker stays open before a probe
+
+    Returns:
+        Existing breaker for the endpoint, or a newly created one
+    """
+    key = kroki_url.rstrip("/")
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold, reset_timeout)
+            _breakers[key] = breaker
+        return breaker
+
+
+def reset_breakers() -> None:
+    """Forget all endpoint breakers (e.g., after reconfiguration or in tests)."""
+    with _breakers_lock:
+        _breakers.clear()
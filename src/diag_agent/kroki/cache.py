@@ -0,0 +1,493 @@
+"""Content-addressed on-disk cache for rendered Kroki output.
+
+Rendered diagrams are stored under a SHA-256 key of the normalized source,
+diagram type, output format and Kroki server version, so unchanged diagrams
+are served from disk without contacting Kroki.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+from diag_agent.utils.files import atomic_write_bytes, atomic_write_stream, iter_file_chunks
+
+
+def normalize_source(diagram_source: str) -> str:
+    """Normalize diagram source for cache keys.
+
+    Line endings, trailing whitespace and surrounding blank lines do not
+    change the rendered output, so they must not change the cache key.
+
+    Args:
+        diagram_source: Raw diagram source code
+
+    Returns:
+        Normalized diagram source
+    """
+    lines = diagram_source.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def render_cache_key(
+    diagram_source: str,
+    diagram_type: str,
+    output_format: str,
+    server_version: str = ""
+) -> str:
+    """Compute the cache key for a render request.
+
+    Args:
+        diagram_source: Source code of the diagram
+        diagram_type: Type of diagram (plantuml, c4plantuml, mermaid, etc.)
+        output_format: Output format (png, svg, pdf, jpeg)
+        server_version: Kroki server version (renders differ between versions);
+            empty to identify only the request content (e.g., for in-flight coalescing)
+
+    Returns:
+        Hex SHA-256 digest identifying the rendered output
+    """
+    digest = hashlib.sha256()
+    for part in (server_version, diagram_type, output_format, normalize_source(diagram_source)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CacheHitCounter:
+    """Counts the render cache hits of one run.
+
+    A RenderCache may be shared by concurrent runs (e.g., in the MCP
+    server), so its own hits counter cannot tell them apart.
+    """
+
+    def __init__(self) -> None:
+        """Initialize hit counter."""
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self) -> None:
+        """Count one cache hit."""
+        with self._lock:
+            self.count += 1
+
+
+class RenderCache:
+    """Size-capped, least-recently-used on-disk cache of rendered diagrams.
+
+    Entries are files named by their cache key. Reads refresh the file's
+    modification time, which is used as LRU order when the cache grows
+    beyond max_bytes. All writes are atomic, so concurrent diag-agent
+    processes can safely share one cache directory.
+
+    The total size is scanned from disk once and then kept as a running
+    total of this instance's writes; the directory is only listed again
+    when that total crosses max_bytes (which also picks up entries
+    written by other processes).
+    """
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+    SERVER_VERSION_TTL = 3600.0  # seconds a remembered Kroki version is trusted
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """Initialize render cache.
+
+        Args:
+            cache_dir: Directory holding cached renders (created if missing)
+            max_bytes: Maximum total size of cached renders before eviction
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: int | None = None  # approximate total size, None until scanned
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key: str) -> Path:
+        # Two-character fan-out keeps directories small for large caches
+        return self.cache_dir / key[:2] / key
+
+    def get(self, key: str, hits: CacheHitCounter | None = None) -> bytes | None:
+        """Look up a cached render.
+
+        Args:
+            key: Cache key from render_cache_key()
+            hits: Optional counter of the caller's run to count a hit in
+
+        Returns:
+            Cached bytes, or None on a cache miss
+        """
+        path = self._entry_path(key)
+        try:
+            data = path.read_bytes()
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        if hits is not None:
+            hits.record()
+        return data
+
+    def get_path(self, key: str, hits: CacheHitCounter | None = None) -> Path | None:
+        """Look up a cached render by file path (for streaming large outputs).
+
+        Args:
+            key: Cache key from render_cache_key()
+            hits: Optional counter of the caller's run to count a hit in
+
+        Returns:
+            Path of the cached render, or None on a cache miss
+        """
+        path = self._entry_path(key)
+        try:
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        if hits is not None:
+            hits.record()
+        return path
+
+    def put_file(self, key: str, source_path: str | Path) -> None:
+        """Store a rendered file by streaming it into the cache.
+
+        Args:
+            key: Cache key from render_cache_key()
+            source_path: File containing the rendered output
+        """
+        self.put_chunks(key, iter_file_chunks(source_path))
+
+    def put_chunks(self, key: str, chunks: Iterable[bytes]) -> None:
+        """Store a render by streaming its chunks into the cache.
+
+        Args:
+            key: Cache key from render_cache_key()
+            chunks: Byte chunks of the rendered output, in order
+        """
+        path = self._entry_path(key)
+        replaced = self._file_size(path)
+        size, _ = atomic_write_stream(path, chunks)
+        self._account(size - replaced)
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a render and evict least recently used entries if over the size cap.
+
+        Args:
+            key: Cache key from render_cache_key()
+            data: Rendered bytes
+        """
+        path = self._entry_path(key)
+        replaced = self._file_size(path)
+        atomic_write_bytes(path, data)
+        self._account(len(data) - replaced)
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    def _account(self, added: int) -> None:
+        """Add a write to the running size total and evict once it exceeds max_bytes."""
+        with self._lock:
+            if self._size is None:
+                # The first write scans the directory (and includes itself)
+                self._size = self._evict()
+                return
+            self._size += added
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _evict(self) -> int:
+        """Delete least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            Total size of the remaining entries
+        """
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("??/*"):
+            # Skip in-progress temp files of concurrent writers
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return total
+
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return total
+
+    def _version_path(self, kroki_url: str) -> Path:
+        url_hash = hashlib.sha256(kroki_url.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / "versions" / url_hash
+
+    def get_server_version(self, kroki_url: str) -> str | None:
+        """Return the remembered Kroki version for a server, if still fresh.
+
+        Remembering the version lets cache hits skip the network entirely
+        instead of asking Kroki for its version on every CLI invocation.
+
+        Args:
+            kroki_url: Base URL of the Kroki server
+
+        Returns:
+            Server version, or None if unknown or older than SERVER_VERSION_TTL
+        """
+        path = self._version_path(kroki_url)
+        try:
+            if time.time() - path.stat().st_mtime > self.SERVER_VERSION_TTL:
+                return None
+            return path.read_text().strip() or None
+        except OSError:
+            return None
+
+    def set_server_version(self, kroki_url: str, version: str) -> None:
+        """Remember the Kroki version of a server.
+
+        Args:
+            kroki_url: Base URL of the Kroki server
+            version: Version reported by the server
+        """
+        atomic_write_bytes(self._version_path(kroki_url), version.encode("utf-8"))
+
+
+@dataclass
+class HttpCacheEntry:
+    """Cached HTTP response with its validators and freshness lifetime."""
+
+    content: bytes
+    content_type: str
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+    # Set by HttpCache.get_file(): the body is read from this file when needed
+    body_path: Path | None = None
+    body_offset: int = 0
+
+    def is_fresh(self) -> bool:
+        """Whether the entry may be used without revalidating with the server."""
+        return time.time() < self.expires_at
+
+    def iter_content(self) -> Iterator[bytes]:
+        """Response body in chunks, streamed from the cache file if not loaded."""
+        if self.body_path is None:
+            return iter([self.content])
+        return iter_file_chunks(self.body_path, offset=self.body_offset)
+
+
+def parse_cache_control(value: str) -> dict[str, str | None]:
+    """Parse a Cache-Control header into its directives.
+
+    Args:
+        value: Cache-Control header value (e.g., "public, max-age=3600")
+
+    Returns:
+        Mapping of lowercase directive name to its value (None for flags)
+    """
+    directives: dict[str, str | None] = {}
+    for part in value.split(","):
+        name, _, directive_value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = directive_value.strip('"') or None
+    return directives
+
+
+class HttpCache:
+    """On-disk HTTP cache for GET renders honouring ETag and Cache-Control.
+
+    Fresh entries (within max-age) are served without a request; stale
+    entries are revalidated with If-None-Match/If-Modified-Since so an
+    unchanged diagram costs a 304 instead of a full render. Storage and
+    LRU eviction are delegated to a RenderCache keyed by the request URL.
+    """
+
+    def __init__(
+        self, cache_dir: str | Path, max_bytes: int = RenderCache.DEFAULT_MAX_BYTES
+    ) -> None:
+        """Initialize HTTP cache.
+
+        Args:
+            cache_dir: Directory holding cached responses (created if missing)
+            max_bytes: Maximum total size of cached responses before eviction
+        """
+        self._store = RenderCache(cache_dir, max_bytes=max_bytes)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> HttpCacheEntry | None:
+        """Look up the cached response for a URL.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            Cached entry (fresh or stale), or None if not cached
+        """
+        data = self._store.get(self._key(url))
+        if data is None:
+            return None
+        # Entry layout: JSON metadata line, then the raw response body
+        header, _, content = data.partition(b"\n")
+        return self._parse_entry(header, content)
+
+    def get_file(self, url: str) -> HttpCacheEntry | None:
+        """Look up the cached response for a URL without reading its body.
+
+        The body of the returned entry is streamed from the cache file by
+        HttpCacheEntry.iter_content() (for large outputs).
+
+        Args:
+            url: Request URL
+
+        Returns:
+            Cached entry (fresh or stale) without content, or None if not cached
+        """
+        path = self._store.get_path(self._key(url))
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as file:
+                header = file.readline()
+        except OSError:
+            return None
+        entry = self._parse_entry(header.rstrip(b"\n"), b"")
+        if entry is not None:
+            entry.body_path = path
+            entry.body_offset = len(header)
+        return entry
+
+    @staticmethod
+    def _parse_entry(header: bytes, content: bytes) -> HttpCacheEntry | None:
+        try:
+            meta = json.loads(header)
+        except ValueError:
+            return None
+        return HttpCacheEntry(
+            content=content,
+            content_type=meta.get("content_type", ""),
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            expires_at=meta.get("expires_at", 0.0)
+        )
+
+    def store(self, url: str, headers: Mapping[str, str], content: bytes) -> None:
+        """Cache a successful response if its headers allow it.
+
+        Responses marked no-store, and responses that are neither fresh
+        for some time nor revalidatable (no ETag/Last-Modified), are skipped.
+
+        Args:
+            url: Request URL
+            headers: Response headers
+            content: Response body
+        """
+        entry = self._entry(headers, content)
+        if entry is not None:
+            self._write(url, entry)
+
+    def store_file(self, url: str, headers: Mapping[str, str], path: str | Path) -> None:
+        """Cache a successful response whose body was streamed to a file (see store()).
+
+        Args:
+            url: Request URL
+            headers: Response headers
+            path: File holding the response body
+        """
+        entry = self._entry(headers, b"")
+        if entry is not None:
+            self._store.put_chunks(
+                self._key(url), itertools.chain([self._header(entry)], iter_file_chunks(path))
+            )
+
+    def _entry(self, headers: Mapping[str, str], content: bytes) -> HttpCacheEntry | None:
+        """Build the cache entry for a response, or None if it must not be cached."""
+        directives = parse_cache_control(headers.get("Cache-Control", ""))
+        if "no-store" in directives:
+            return None
+
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        max_age = self._max_age(directives)
+        if max_age <= 0 and not etag and not last_modified:
+            return None
+
+        return HttpCacheEntry(
+            content=content,
+            content_type=headers.get("Content-Type", ""),
+            etag=etag,
+            last_modified=last_modified,
+            expires_at=time.time() + max_age
+        )
+
+    def refresh(self, url: str, entry: HttpCacheEntry, headers: Mapping[str, str]) -> None:
+        """Renew a stale entry after the server confirmed it (HTTP 304).
+
+        Args:
+            url: Request URL
+            entry: Revalidated cache entry
+            headers: Headers of the 304 response
+        """
+        entry.etag = headers.get("ETag", entry.etag)
+        entry.expires_at = time.time() + self._max_age(
+            parse_cache_control(headers.get("Cache-Control", ""))
+        )
+        self._write(url, entry)
+
+    @staticmethod
+    def _max_age(directives: Mapping[str, str | None]) -> float:
+        if "no-cache" in directives:
+            return 0.0
+        try:
+            return float(directives.get("max-age") or 0)
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def _header(entry: HttpCacheEntry) -> bytes:
+        # Entry layout: JSON metadata line, then the raw response body
+        return json.dumps({
+            "content_type": entry.content_type,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "expires_at": entry.expires_at
+        }).encode("utf-8") + b"\n"
+
+    def _write(self, url: str, entry: HttpCacheEntry) -> None:
+        header = self._header(entry)
+        if entry.body_path is None:
+            self._store.put(self._key(url), header + entry.content)
+            return
+        # The new file replaces the one the body is read from only once complete
+        self._store.put_chunks(self._key(url), itertools.chain([header], entry.iter_content()))
+        entry.body_offset = len(header)
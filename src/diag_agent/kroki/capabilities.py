@@ -0,0 +1,128 @@
+"""Registry of output formats supported by a Kroki server per diagram type."""
+
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+
+from diag_agent.utils.files import atomic_write_bytes
+
+
+# Kroki rejects unsupported formats before rendering, e.g.
+# "Unsupported output format: png for bpmn. Must be one of svg."
+UNSUPPORTED_FORMAT_PATTERN = re.compile(r"unsupported output format", re.IGNORECASE)
+
+
+def is_unsupported_format_error(message: str) -> bool:
+    """Check whether a Kroki error message reports an unsupported output format.
+
+    Args:
+        message: Error body or KrokiRenderError message
+
+    Returns:
+        True if the format is not supported for the diagram type
+    """
+    return bool(UNSUPPORTED_FORMAT_PATTERN.search(message))
+
+
+class CapabilityRegistry:
+    """Remembers which (diagram_type, output_format) pairs a Kroki server supports.
+
+    Entries are learned from renders (the first "Unsupported output
+    format" error, or a successful render) or by probing, and persisted
+    as one small JSON file per Kroki server (URL + version) in cache_dir.
+    Known-unsupported pairs can then be skipped without a round-trip.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None) -> None:
+        """Initialize capability registry.
+
+        Args:
+            cache_dir: Directory for the persisted matrices; None keeps
+                them in memory only
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._servers: dict[str, dict[str, bool]] = {}
+        self._lock = threading.Lock()
+
+    def supports(self, server: str, diagram_type: str, output_format: str) -> bool | None:
+        """Look up whether a server supports an output format for a diagram type.
+
+        Args:
+            server: Server identity (Kroki URL and version)
+            diagram_type: Type of diagram (plantuml, bpmn, ...)
+            output_format: Output format (png, svg, pdf, jpeg)
+
+        Returns:
+            True/False if known, None if the pair has not been seen yet
+        """
+        with self._lock:
+            return self._matrix(server).get(self._key(diagram_type, output_format))
+
+    def record(self, server: str, diagram_type: str, output_format: str, supported: bool) -> None:
+        """Record whether a server supports an output format for a diagram type.
+
+        Args:
+            server: Server identity (Kroki URL and version)
+            diagram_type: Type of diagram
+            output_format: Output format
+            supported: Whether Kroki accepted the format
+        """
+        key = self._key(diagram_type, output_format)
+        with self._lock:
+            matrix = self._matrix(server)
+            if matrix.get(key) == supported:
+                return
+            matrix[key] = supported
+            self._save(server, matrix)
+
+    def matrix(self, server: str) -> dict[str, bool]:
+        """Get all known entries for a server.
+
+        Args:
+            server: Server identity (Kroki URL and version)
+
+        Returns:
+            Mapping of "type/format" to supported flag
+        """
+        with self._lock:
+            return dict(self._matrix(server))
+
+    @staticmethod
+    def _key(diagram_type: str, output_format: str) -> str:
+        """Matrix key of a (diagram_type, output_format) pair."""
+        return f"{diagram_type.lower()}/{output_format.lower()}"
+
+    def _path(self, server: str) -> Path | None:
+        """File the matrix of a server is persisted in (None without cache_dir)."""
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{hashlib.sha256(server.encode('utf-8')).hexdigest()[:16]}.json"
+
+    def _matrix(self, server: str) -> dict[str, bool]:
+        """Get the in-memory matrix of a server, loading it on first use."""
+        matrix = self._servers.get(server)
+        if matrix is None:
+            matrix = {}
+            path = self._path(server)
+            if path is not None and path.exists():
+                try:
+                    matrix = dict(json.loads(path.read_text(encoding="utf-8"))["formats"])
+                except (OSError, ValueError, KeyError, TypeError):
+                    # Corrupt file - relearn
+                    matrix = {}
+            self._servers[server] = matrix
+        return matrix
+
+    def _save(self, server: str, matrix: dict[str, bool]) -> None:
+        """Persist the matrix of a server; caller holds the lock."""
+        path = self._path(server)
+        if path is None:
+            return
+        data = json.dumps({"server": server, "formats": matrix}, indent=2, sort_keys=True)
+        try:
+            atomic_write_bytes(path, data.encode("utf-8"))
+        except OSError:
+            # Persisting is an optimization only
+            pass
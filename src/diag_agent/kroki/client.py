@@ -1,43 +1,472 @@
 """Kroki HTTP client for diagram rendering."""
 
-from typing import Literal
+import asyncio
+import base64
+import time
+import zlib
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Literal, TypeVar
 import httpx
 
+from diag_agent.kroki.balancer import Endpoint, KrokiBalancer
+from diag_agent.kroki.breaker import CircuitBreaker
+from diag_agent.kroki.cache import (
+    CacheHitCounter,
+    HttpCache,
+    HttpCacheEntry,
+    RenderCache,
+    render_cache_key,
+)
+from diag_agent.kroki.capabilities import CapabilityRegistry, is_unsupported_format_error
+from diag_agent.kroki.errors import KrokiErrorDetails, parse_kroki_error
+from diag_agent.kroki.limiter import AdaptiveLimiter, Workload, get_limiter
+from diag_agent.kroki.retry import RetryBudget, RetryPolicy
+from diag_agent.kroki.singleflight import AsyncSingleFlight, SingleFlight
+from diag_agent.kroki.timeouts import TimeoutPolicy
+from diag_agent.utils.files import CHUNK_SIZE, atomic_write_stream, iter_file_chunks
+
 
 OutputFormat = Literal["png", "svg", "pdf", "jpeg"]
+RequestMethod = Literal["post", "get"]
+
+# A single render request for batch APIs: (diagram_source, diagram_type, output_format)
+RenderRequest = tuple[str, str, OutputFormat]
+
+# Gateway/availability errors are transient; other statuses come from the
+# renderer itself (e.g., syntax errors) and fail the same way on every retry
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+T = TypeVar("T")
 
 
 class KrokiRenderError(Exception):
     """Exception raised when Kroki diagram rendering fails.
-    
+
     This wraps HTTP errors from Kroki service with additional context
-    about the diagram type and error details.
+    about the diagram type and error details. Errors reported by the
+    renderer carry `details` (error class, line/column and the offending
+    source lines) parsed from the Kroki response.
+    """
+
+    def __init__(self, message: str, details: KrokiErrorDetails | None = None) -> None:
+        """Initialize render error.
+
+        Args:
+            message: Error message
+            details: Structured error parsed from the Kroki response, if any
+        """
+        super().__init__(message)
+        self.details = details
+
+
+class KrokiUnavailableError(KrokiRenderError):
+    """Exception raised when Kroki cannot be reached or is temporarily failing.
+
+    Covers transport errors (timeouts, refused or reset connections) and
+    gateway/availability responses (502, 503, 504). These are retried by
+    the client; this error is raised once retries are exhausted. Unlike a
+    plain KrokiRenderError it says nothing about the diagram source.
+    """
+    pass
+
+
+class KrokiRenderTimeout(KrokiRenderError):
+    """Exception raised when Kroki does not answer a render within its read timeout.
+
+    The request reached Kroki, but rendering took longer than the timeout
+    of the TimeoutPolicy while Kroki still answers /health - typically a
+    diagram too large or complex to render. Retrying would time out the
+    same way, so it is not retried, and it does not count against the
+    endpoint's circuit breaker or concurrency limit. (If /health does not
+    answer either, Kroki is stalled and KrokiUnavailableError is raised.)
+    """
+    pass
+
+
+class KrokiUnsupportedFormatError(KrokiRenderError):
+    """Exception raised when Kroki does not support an output format for a diagram type.
+
+    Raised without contacting Kroki when the capability registry already
+    knows the (diagram_type, output_format) pair is unsupported.
     """
     pass
 
 
+@dataclass
+class RenderResult:
+    """Outcome of rendering a diagram directly to a file."""
+
+    path: Path
+    size: int  # bytes written
+    sha256: str  # hex digest of the written content
+
+
+def encode_diagram(diagram_source: str) -> str:
+    """Encode diagram source for Kroki GET URLs (deflate + base64url).
+
+    Args:
+        diagram_source: Source code of the diagram
+
+    Returns:
+        URL-safe encoded source as expected by Kroki's GET API
+    """
+    compressed = zlib.compress(diagram_source.encode("utf-8"), 9)
+    return base64.urlsafe_b64encode(compressed).decode("ascii")
+
+
+def _pool_limits(
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float
+) -> httpx.Limits:
+    """Build connection pool limits shared by the sync and async clients."""
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry
+    )
+
+
+def _http2_enabled(http2: bool) -> bool:
+    """HTTP/2 support is an optional extra - fall back to HTTP/1.1 without it."""
+    return http2 and find_spec("h2") is not None
+
+
+def _response_content(
+    response: httpx.Response,
+    diagram_type: str,
+    diagram_source: str | None = None
+) -> bytes:
+    """Extract rendered bytes from a Kroki response.
+
+    Args:
+        response: HTTP response returned by Kroki
+        diagram_type: Type of diagram (used for error context)
+        diagram_source: Source code of the diagram (used for error snippets)
+
+    Returns:
+        Rendered diagram as bytes
+
+    Raises:
+        KrokiRenderError: If Kroki returned an error status or a text/plain error body
+    """
+    try:
+        # Raise exception if request failed
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        # Convert HTTP errors to custom exception with context
+        error_class = (
+            KrokiUnavailableError
+            if e.response.status_code in RETRYABLE_STATUS_CODES
+            else KrokiRenderError
+        )
+        details = None
+        if error_class is KrokiRenderError:
+            details = parse_kroki_error(diagram_type, e.response.text, diagram_source)
+        raise error_class(
+            f"Kroki rendering failed for diagram type '{diagram_type}': "
+            f"HTTP {e.response.status_code} - {e.response.text}",
+            details
+        ) from e
+
+    # Check Content-Type for error responses (Kroki returns text/plain on errors)
+    content_type = response.headers.get('Content-Type', '')
+    if 'text/plain' in content_type:
+        error_message = response.text
+        raise KrokiRenderError(
+            f"Kroki rendering failed for diagram type '{diagram_type}': {error_message}",
+            parse_kroki_error(diagram_type, error_message, diagram_source)
+        )
+
+    return response.content
+
+
+def _revalidation_headers(entry: HttpCacheEntry | None) -> dict[str, str]:
+    """Conditional request headers for a stale HTTP cache entry.
+
+    An unchanged diagram then costs a 304 instead of a render.
+    """
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+def _transport_error(
+    error: httpx.TransportError, diagram_type: str, timeout: float
+) -> KrokiRenderError:
+    """Wrap an httpx transport error (timeout, connection reset, ...).
+
+    A read timeout means Kroki accepted the request but did not finish
+    rendering in time (KrokiRenderTimeout; KrokiClient turns it into a
+    KrokiUnavailableError if /health does not answer either); every other
+    transport error means Kroki is unavailable (KrokiUnavailableError).
+    """
+    if isinstance(error, httpx.ReadTimeout):
+        return KrokiRenderTimeout(
+            f"Kroki rendering timed out for diagram type '{diagram_type}' after {timeout:g}s "
+            f"(diagram too large or complex?)"
+        )
+    return KrokiUnavailableError(
+        f"Kroki request failed for diagram type '{diagram_type}': "
+        f"{type(error).__name__}: {error}"
+    )
+
+
+def _try_acquire(retry_budget: RetryBudget | None) -> bool:
+    """Take one retry from an optional retry budget (no budget = no cap)."""
+    return retry_budget is None or retry_budget.try_acquire()
+
+
 class KrokiClient:
     """HTTP client for interacting with Kroki diagram rendering service.
 
     Kroki supports multiple diagram types (PlantUML, C4, Mermaid, etc.)
     and output formats (PNG, SVG, PDF).
+
+    The client holds a long-lived connection pool, so repeated renders
+    (validation, design check, output formats) reuse keep-alive connections
+    instead of opening a new TCP/TLS connection per request. Call close()
+    or use the client as a context manager to release the pool.
     """
 
     DEFAULT_TIMEOUT = 30.0  # seconds
+    DEFAULT_MAX_CONNECTIONS = 10
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+    DEFAULT_KEEPALIVE_EXPIRY = 30.0  # seconds
+    DEFAULT_MAX_GET_URL_LENGTH = 4096  # characters; longer requests fall back to POST
+    HEALTH_PROBE_TIMEOUT = 5.0  # seconds for /health after a render timed out
+    UNKNOWN_SERVER_VERSION = "unknown"
 
-    def __init__(self, kroki_url: str) -> None:
+    def __init__(
+        self,
+        kroki_url: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+        render_cache: RenderCache | None = None,
+        request_method: RequestMethod = "post",
+        max_get_url_length: int = DEFAULT_MAX_GET_URL_LENGTH,
+        http_cache: HttpCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        fallback_url: str | None = None,
+        balancer: KrokiBalancer | None = None,
+        adaptive_concurrency: bool = False,
+        max_concurrency: int = AdaptiveLimiter.DEFAULT_MAX_LIMIT,
+        timeout_policy: TimeoutPolicy | None = None,
+        capabilities: CapabilityRegistry | None = None,
+        transport: httpx.BaseTransport | None = None
+    ) -> None:
         """Initialize Kroki client.
 
         Args:
             kroki_url: Base URL of Kroki service (e.g., http://localhost:8000)
+            max_connections: Maximum number of concurrent connections in the pool
+            max_keepalive_connections: Maximum number of idle keep-alive connections
+            keepalive_expiry: Seconds an idle keep-alive connection is kept open
+            http2: Enable HTTP/2 (requires the optional 'h2' package, otherwise
+                HTTP/1.1 is used)
+            render_cache: Optional on-disk render cache; cached renders are
+                returned without contacting Kroki
+            request_method: "post" (JSON body) or "get" (encoded source in the
+                URL, cacheable by HTTP caches and reverse proxies)
+            max_get_url_length: Longest GET URL to send; longer requests use POST
+            http_cache: Optional HTTP cache for GET responses (ETag/Cache-Control)
+            retry_policy: Backoff for transient failures (transport errors,
+                502/503/504); defaults to RetryPolicy()
+            circuit_breaker: Optional breaker for kroki_url; while it is open,
+                requests fail fast or go to fallback_url
+            fallback_url: Kroki URL to use while the circuit breaker is open
+                (or while all balancer endpoints are ejected)
+            balancer: Optional balancer spreading renders across several Kroki
+                replicas; kroki_url is then only used for version lookups
+            adaptive_concurrency: Limit concurrent renders per endpoint with a
+                latency-driven AdaptiveLimiter shared across the process;
+                excess renders wait locally (off by default)
+            max_concurrency: Upper bound for the adaptive concurrency limit
+            timeout_policy: Per-type/per-format (optionally adaptive) render
+                timeouts; defaults to DEFAULT_TIMEOUT for every render
+            capabilities: Optional registry of supported (type, format) pairs;
+                known-unsupported renders fail without contacting Kroki
+            transport: Optional custom httpx transport (e.g., for testing)
         """
         self.kroki_url = kroki_url.rstrip("/")
+        self.capabilities = capabilities
+        self.fallback_url = fallback_url.rstrip("/") if fallback_url else None
+        self.circuit_breaker = circuit_breaker
+        if balancer is None and circuit_breaker is not None:
+            # A single guarded endpoint is a balancer with one member
+            balancer = KrokiBalancer([Endpoint(self.kroki_url, circuit_breaker)])
+        self.balancer = balancer
+        self.adaptive_concurrency = adaptive_concurrency
+        self.max_concurrency = max_concurrency
+        self.timeout_policy = timeout_policy or TimeoutPolicy(default=self.DEFAULT_TIMEOUT)
+        self.render_cache = render_cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.request_method = request_method
+        self.max_get_url_length = max_get_url_length
+        self.http_cache = http_cache
+        self._server_version: str | None = None
+        # Identical concurrent renders share one Kroki request
+        self._single_flight = SingleFlight()
+        self._http = httpx.Client(
+            timeout=self.DEFAULT_TIMEOUT,
+            limits=_pool_limits(max_connections, max_keepalive_connections, keepalive_expiry),
+            http2=_http2_enabled(http2),
+            transport=transport
+        )
+
+    def close(self) -> None:
+        """Close the connection pool and release all open connections."""
+        self._http.close()
+
+    def __enter__(self) -> "KrokiClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _with_retries(
+        self,
+        send: Callable[[str], T],
+        workload: Workload,
+        retry_budget: RetryBudget | None = None
+    ) -> T:
+        """Call send(base_url), retrying transient failures with backoff.
+
+        Only KrokiUnavailableError is retried, and only while both the
+        per-request retry limit and the caller's retry budget (if any)
+        allow it.
+        Each attempt picks its endpoint anew, so a retry goes to the
+        fallback once the circuit breaker has opened. If the breaker opens
+        on the last attempt, the fallback still gets one attempt.
+        """
+        retry = 0
+        while True:
+            failed_over = self._failed_over()
+            try:
+                return self._call_endpoint(send, workload)
+            except KrokiUnavailableError:
+                retry += 1
+                if retry > self.retry_policy.max_retries or not _try_acquire(retry_budget):
+                    if failed_over or not self._failed_over():
+                        raise
+                    return self._call_endpoint(send, workload)
+            time.sleep(self.retry_policy.delay(retry))
+
+    def _failed_over(self) -> bool:
+        """Check whether requests currently go to fallback_url (all breakers open)."""
+        if self.fallback_url is None or self.balancer is None:
+            return False
+        return all(
+            endpoint.breaker.state == CircuitBreaker.OPEN for endpoint in self.balancer.endpoints
+        )
+
+    def _call_endpoint(self, send: Callable[[str], T], workload: Workload) -> T:
+        """Call send(base_url) on an endpoint picked by the balancer.
+
+        Endpoints whose circuit breaker is open are skipped. If none is
+        available the request goes to fallback_url, or fails fast without
+        a fallback, instead of waiting for a timeout from an endpoint that
+        is known to be down.
+        """
+        if self.balancer is None:
+            return self._send_checked(send, self.kroki_url, workload)
+        endpoint = self.balancer.acquire()
+        if endpoint is None:
+            if self.fallback_url is None:
+                raise KrokiUnavailableError(
+                    f"Kroki at {', '.join(self.balancer.urls)} is unavailable "
+                    f"(circuit breaker open)"
+                )
+            return self._send_checked(send, self.fallback_url, workload)
+
+        healthy = True
+        try:
+            return self._send_checked(send, endpoint.url, workload)
+        except KrokiUnavailableError:
+            healthy = False
+            raise
+        finally:
+            # Any other outcome (including a render timeout of a diagram that
+            # is too slow while /health answers) means Kroki answered
+            self.balancer.release(endpoint, healthy)
+
+    def _send_checked(self, send: Callable[[str], T], base_url: str, workload: Workload) -> T:
+        """Call send(base_url), telling a slow diagram apart from a stalled Kroki.
+
+        A read timeout is only a KrokiRenderTimeout if Kroki still answers
+        /health. A stalled server answers neither, so the timeout becomes a
+        KrokiUnavailableError: it is retried, counts against the circuit
+        breaker and lets auto mode fail over.
+        """
+        try:
+            return self._send_limited(send, base_url, workload)
+        except KrokiRenderTimeout as e:
+            if self._responds(base_url):
+                raise
+            raise KrokiUnavailableError(
+                f"Kroki at {base_url} is not responding: {e} (/health did not answer either)"
+            ) from e
+
+    def _responds(self, base_url: str) -> bool:
+        """Check whether Kroki at base_url answers /health within HEALTH_PROBE_TIMEOUT."""
+        try:
+            response = self._http.get(f"{base_url}/health", timeout=self.HEALTH_PROBE_TIMEOUT)
+        except httpx.TransportError:
+            return False
+        return response.is_success
+
+    def _send_limited(self, send: Callable[[str], T], base_url: str, workload: Workload) -> T:
+        """Call send(base_url) within the endpoint's adaptive concurrency limit.
+
+        workload is the (diagram_type, output_format) of the request, so the
+        limiter compares its latency only with renders of the same kind.
+        """
+        if not self.adaptive_concurrency:
+            return send(base_url)
+
+        limiter = get_limiter(base_url, self.max_concurrency)
+        limiter.acquire()
+        started = time.monotonic()
+        latency: float | None = None  # None = transport failure (overload signal)
+        timed_out = False
+        try:
+            result = send(base_url)
+        except KrokiUnavailableError:
+            raise
+        except KrokiRenderTimeout:
+            # A slow diagram, not an overloaded server
+            timed_out = True
+            raise
+        except KrokiRenderError:
+            # Kroki answered - a normal latency sample
+            latency = time.monotonic() - started
+            raise
+        else:
+            latency = time.monotonic() - started
+            return result
+        finally:
+            if timed_out:
+                limiter.cancel()
+            else:
+                limiter.release(latency, workload)
 
     def render_diagram(
         self,
         diagram_source: str,
         diagram_type: str,
-        output_format: OutputFormat = "png"
+        output_format: OutputFormat = "png",
+        retry_budget: RetryBudget | None = None,
+        cache_hits: CacheHitCounter | None = None
     ) -> bytes:
         """Render diagram source code to specified output format.
 
@@ -45,40 +474,534 @@ class KrokiClient:
             diagram_source: Source code of the diagram (e.g., PlantUML syntax)
             diagram_type: Type of diagram (plantuml, c4plantuml, mermaid, etc.)
             output_format: Desired output format (png, svg, pdf, jpeg)
+            retry_budget: Optional budget of the caller's run that retries of
+                this render are taken from (the client may be shared by
+                several runs)
+            cache_hits: Optional counter of the caller's run for render cache hits
 
         Returns:
             Rendered diagram as bytes
 
         Raises:
+            KrokiUnavailableError: If Kroki is unreachable or unavailable after retries
             KrokiRenderError: If Kroki returns an error status or request fails
         """
-        # Kroki API endpoint: /{diagram_type}/{output_format}
-        endpoint = f"{self.kroki_url}/{diagram_type}/{output_format}"
+        # Concurrent callers with identical content wait on one in-flight render
+        key = render_cache_key(diagram_source, diagram_type, output_format)
+        return self._single_flight.do(
+            key,
+            lambda: self._render(
+                diagram_source, diagram_type, output_format, retry_budget, cache_hits
+            )
+        )
+
+    def supports_format(self, diagram_type: str, output_format: str) -> bool | None:
+        """Check whether the connected Kroki supports a format for a diagram type.
+
+        Args:
+            diagram_type: Type of diagram (plantuml, bpmn, ...)
+            output_format: Output format (png, svg, pdf, jpeg)
+
+        Returns:
+            True/False if known from the capability registry, None if unknown
+            (or no registry is configured)
+        """
+        if self.capabilities is None:
+            return None
+        return self.capabilities.supports(self._capability_server(), diagram_type, output_format)
 
+    def _capability_server(self) -> str:
+        """Identity of the Kroki server for the capability registry."""
+        return f"{self.kroki_url}@{self.server_version()}"
+
+    def _capability_guard(
+        self, diagram_type: str, output_format: str, render: Callable[[], T]
+    ) -> T:
+        """Call render() unless the pair is known to be unsupported, and learn from the result."""
+        if self.capabilities is None:
+            return render()
+        server = self._capability_server()
+        if self.capabilities.supports(server, diagram_type, output_format) is False:
+            raise KrokiUnsupportedFormatError(
+                f"Kroki rendering failed for diagram type '{diagram_type}': "
+                f"output format '{output_format}' is not supported"
+            )
         try:
-            # Make HTTP POST request with diagram source
-            response = httpx.post(
-                endpoint,
+            result = render()
+        except KrokiUnavailableError:
+            raise
+        except KrokiRenderError as e:
+            if not is_unsupported_format_error(str(e)):
+                raise
+            self.capabilities.record(server, diagram_type, output_format, False)
+            raise KrokiUnsupportedFormatError(str(e)) from e
+        self.capabilities.record(server, diagram_type, output_format, True)
+        return result
+
+    def _render(
+        self,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: str,
+        retry_budget: RetryBudget | None,
+        cache_hits: CacheHitCounter | None
+    ) -> bytes:
+        """Render via the render cache (if configured) or Kroki."""
+        if self.render_cache is None:
+            return self._capability_guard(diagram_type, output_format, lambda: self._with_retries(
+                lambda base_url: self._send(base_url, diagram_source, diagram_type, output_format),
+                (diagram_type, output_format),
+                retry_budget
+            ))
+
+        # Serve unchanged diagrams from the render cache without contacting Kroki
+        key = render_cache_key(diagram_source, diagram_type, output_format, self.server_version())
+        cached = self.render_cache.get(key, cache_hits)
+        if cached is not None:
+            return cached
+
+        content = self._capability_guard(diagram_type, output_format, lambda: self._with_retries(
+            lambda base_url: self._send(base_url, diagram_source, diagram_type, output_format),
+            (diagram_type, output_format),
+            retry_budget
+        ))
+        self.render_cache.put(key, content)
+        return content
+
+    def render_to_path(
+        self,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: OutputFormat,
+        path: str | Path,
+        retry_budget: RetryBudget | None = None,
+        cache_hits: CacheHitCounter | None = None
+    ) -> RenderResult:
+        """Render a diagram and stream the output directly to a file.
+
+        The Kroki response body is written to disk in chunks (atomically via
+        a temp file), so memory use stays flat regardless of output size.
+        Like render_diagram(), it is served from the render cache and the
+        HTTP cache (GET mode) when possible, and identical concurrent
+        renders share one Kroki request.
+
+        Args:
+            diagram_source: Source code of the diagram (e.g., PlantUML syntax)
+            diagram_type: Type of diagram (plantuml, c4plantuml, mermaid, etc.)
+            output_format: Desired output format (png, svg, pdf, jpeg)
+            path: Destination file
+            retry_budget: Optional budget of the caller's run for retries
+            cache_hits: Optional counter of the caller's run for render cache hits
+
+        Returns:
+            RenderResult with path, size and SHA-256 digest of the written file
+
+        Raises:
+            KrokiUnavailableError: If Kroki is unreachable or unavailable after retries
+            KrokiRenderError: If Kroki returns an error status or request fails
+        """
+        path = Path(path)
+        # Keyed apart from render_diagram(), whose callers expect bytes
+        key = "file:" + render_cache_key(diagram_source, diagram_type, output_format)
+        result = self._single_flight.do(
+            key,
+            lambda: self._render_to_path(
+                diagram_source, diagram_type, output_format, path, retry_budget, cache_hits
+            )
+        )
+        if result.path != path:
+            # Coalesced with a concurrent render to another file - copy its output
+            size, digest = atomic_write_stream(path, iter_file_chunks(result.path))
+            return RenderResult(path=path, size=size, sha256=digest)
+        return result
+
+    def _render_to_path(
+        self,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: str,
+        path: Path,
+        retry_budget: RetryBudget | None,
+        cache_hits: CacheHitCounter | None
+    ) -> RenderResult:
+        """Render to a file via the render cache (if configured) or Kroki."""
+        render_cache = self.render_cache
+        cache_key = None
+        if render_cache is not None:
+            cache_key = render_cache_key(
+                diagram_source, diagram_type, output_format, self.server_version()
+            )
+            cached_path = render_cache.get_path(cache_key, cache_hits)
+            if cached_path is not None:
+                size, digest = atomic_write_stream(path, iter_file_chunks(cached_path))
+                return RenderResult(path=path, size=size, sha256=digest)
+
+        size, digest = self._capability_guard(
+            diagram_type,
+            output_format,
+            lambda: self._with_retries(
+                lambda base_url: self._stream_to_path(
+                    base_url, diagram_source, diagram_type, output_format, path
+                ),
+                (diagram_type, output_format),
+                retry_budget
+            )
+        )
+
+        if render_cache is not None and cache_key is not None:
+            render_cache.put_file(cache_key, path)
+        return RenderResult(path=path, size=size, sha256=digest)
+
+    def _stream_to_path(
+        self,
+        base_url: str,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: str,
+        path: Path
+    ) -> tuple[int, str]:
+        """Send one render request and stream the response body to path.
+
+        In GET mode with an HTTP cache, a fresh cached response is written
+        without a request, a stale one is revalidated, and a streamed
+        response is stored for later runs.
+        """
+        timeout = self.timeout_policy.timeout_for(diagram_type, output_format)
+        url = self._get_url(base_url, diagram_source, diagram_type, output_format)
+        http_cache = self.http_cache if url is not None else None
+        entry = None
+        if url is None:
+            request = self._http.build_request(
+                "POST",
+                f"{base_url}/{diagram_type}/{output_format}",
                 json={"diagram_source": diagram_source},
-                timeout=self.DEFAULT_TIMEOUT
+                timeout=timeout
             )
+        else:
+            entry = http_cache.get_file(url) if http_cache is not None else None
+            if entry is not None and entry.is_fresh():
+                return atomic_write_stream(path, entry.iter_content())
+            request = self._http.build_request(
+                "GET", url, headers=_revalidation_headers(entry), timeout=timeout
+            )
+
+        started = time.monotonic()
+        try:
+            response = self._http.send(request, stream=True)
+            try:
+                if (
+                    response.status_code == 304 and entry is not None
+                    and http_cache is not None and url is not None
+                ):
+                    # Unchanged since the cached response
+                    http_cache.refresh(url, entry, response.headers)
+                    return atomic_write_stream(path, entry.iter_content())
+                content_type = response.headers.get('Content-Type', '')
+                if response.is_error or 'text/plain' in content_type:
+                    # Error bodies are small - read them to build the error message
+                    response.read()
+                    _response_content(response, diagram_type, diagram_source)
+                result = atomic_write_stream(path, response.iter_bytes(CHUNK_SIZE))
+                self.timeout_policy.record(diagram_type, output_format, time.monotonic() - started)
+            finally:
+                response.close()
+        except httpx.TransportError as e:
+            # Includes connections dropped mid-stream; the temp file is discarded
+            raise _transport_error(e, diagram_type, timeout) from e
+        if http_cache is not None and url is not None:
+            http_cache.store_file(url, response.headers, path)
+        return result
+
+    def _get_url(
+        self,
+        base_url: str,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: str
+    ) -> str | None:
+        """Build the GET URL for a render, or None if the request must use POST."""
+        if self.request_method != "get":
+            return None
+        url = f"{base_url}/{diagram_type}/{output_format}/{encode_diagram(diagram_source)}"
+        # Very large diagrams exceed URL limits of servers and proxies
+        return url if len(url) <= self.max_get_url_length else None
+
+    def _send(
+        self,
+        base_url: str,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: str
+    ) -> bytes:
+        """Send a render request to base_url using the configured request method."""
+        url = self._get_url(base_url, diagram_source, diagram_type, output_format)
+        if url is not None:
+            return self._get(url, diagram_source, diagram_type, output_format)
+        return self._post(base_url, diagram_source, diagram_type, output_format)
+
+    def _get(self, url: str, diagram_source: str, diagram_type: str, output_format: str) -> bytes:
+        """Render via GET, using and revalidating the HTTP cache if configured."""
+        http_cache = self.http_cache
+        entry = http_cache.get(url) if http_cache is not None else None
+        if entry is not None and entry.is_fresh():
+            return entry.content
+
+        timeout = self.timeout_policy.timeout_for(diagram_type, output_format)
+        started = time.monotonic()
+        try:
+            response = self._http.get(url, headers=_revalidation_headers(entry), timeout=timeout)
+        except httpx.TransportError as e:
+            raise _transport_error(e, diagram_type, timeout) from e
+        if response.status_code == 304 and http_cache is not None and entry is not None:
+            http_cache.refresh(url, entry, response.headers)
+            return entry.content
+
+        content = _response_content(response, diagram_type, diagram_source)
+        self.timeout_policy.record(diagram_type, output_format, time.monotonic() - started)
+        if http_cache is not None:
+            http_cache.store(url, response.headers, content)
+        return content
+
+    def _post(
+        self,
+        base_url: str,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: str
+    ) -> bytes:
+        """Send a render request to Kroki and return the rendered bytes."""
+        # Kroki API endpoint: /{diagram_type}/{output_format}
+        endpoint = f"{base_url}/{diagram_type}/{output_format}"
+
+        # Make HTTP POST request with diagram source over the pooled connection
+        timeout = self.timeout_policy.timeout_for(diagram_type, output_format)
+        started = time.monotonic()
+        try:
+            response = self._http.post(
+                endpoint, json={"diagram_source": diagram_source}, timeout=timeout
+            )
+        except httpx.TransportError as e:
+            raise _transport_error(e, diagram_type, timeout) from e
+        content = _response_content(response, diagram_type, diagram_source)
+        # Only successful renders feed the adaptive timeouts
+        self.timeout_policy.record(diagram_type, output_format, time.monotonic() - started)
+        return content
+
+    def server_version(self) -> str:
+        """Get the version of the connected Kroki server.
+
+        Used to key the render cache, since renders may change between Kroki
+        releases. The version is looked up once per client (and remembered
+        by the render cache across runs); unreachable servers report
+        UNKNOWN_SERVER_VERSION.
+
+        Returns:
+            Kroki version string (e.g., "0.25.0")
+        """
+        if self._server_version is None:
+            version = None
+            if self.render_cache is not None:
+                version = self.render_cache.get_server_version(self.kroki_url)
+            if version is None:
+                version = self._fetch_server_version()
+                if self.render_cache is not None and version != self.UNKNOWN_SERVER_VERSION:
+                    self.render_cache.set_server_version(self.kroki_url, version)
+            self._server_version = version
+        return self._server_version
+
+    def warm_up(self) -> bool:
+        """Open a pooled connection to Kroki ahead of the first render.
+
+        Always sends a /health request (the remembered server version is
+        no proof that Kroki is still up), so the TCP/TLS handshake is no
+        longer part of the first render. The reported version is kept for
+        the render cache keys.
+
+        Returns:
+            True if Kroki answered
+        """
+        version = self._fetch_server_version()
+        if version == self.UNKNOWN_SERVER_VERSION:
+            return False
+        if self._server_version is None:
+            self._server_version = version
+            if self.render_cache is not None:
+                self.render_cache.set_server_version(self.kroki_url, version)
+        return True
 
-            # Raise exception if request failed
+    def _fetch_server_version(self) -> str:
+        """Ask Kroki's /health endpoint for its version."""
+        try:
+            response = self._http.get(f"{self.kroki_url}/health")
             response.raise_for_status()
+            version = response.json().get("version")
+        except (httpx.HTTPError, ValueError, AttributeError):
+            return self.UNKNOWN_SERVER_VERSION
 
-            # Check Content-Type for error responses (Kroki returns text/plain on errors)
-            content_type = response.headers.get('Content-Type', '')
-            if 'text/plain' in content_type:
-                error_message = response.text
-                raise KrokiRenderError(
-                    f"Kroki rendering failed for diagram type '{diagram_type}': {error_message}"
-                )
+        # Kroki reports {"version": {"number": "0.25.0", ...}}
+        if isinstance(version, dict):
+            version = version.get("number")
+        return str(version) if version else self.UNKNOWN_SERVER_VERSION
 
-            return response.content
 
-        except httpx.HTTPStatusError as e:
-            # Convert HTTP errors to custom exception with context
-            raise KrokiRenderError(
-                f"Kroki rendering failed for diagram type '{diagram_type}': "
-                f"HTTP {e.response.status_code} - {e.response.text}"
-            ) from e
+class AsyncKrokiClient:
+    """Asynchronous Kroki client for rendering many diagrams concurrently.
+
+    Mirrors KrokiClient (same endpoints and KrokiRenderError semantics)
+    on top of httpx.AsyncClient, and adds render_many() to fan out a batch
+    of renders with bounded concurrency.
+    """
+
+    DEFAULT_TIMEOUT = KrokiClient.DEFAULT_TIMEOUT
+    DEFAULT_MAX_CONNECTIONS = KrokiClient.DEFAULT_MAX_CONNECTIONS
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS = KrokiClient.DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+    DEFAULT_KEEPALIVE_EXPIRY = KrokiClient.DEFAULT_KEEPALIVE_EXPIRY
+    DEFAULT_CONCURRENCY = 4  # parallel renders in render_many()
+
+    def __init__(
+        self,
+        kroki_url: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        timeout_policy: TimeoutPolicy | None = None,
+        transport: httpx.AsyncBaseTransport | None = None
+    ) -> None:
+        """Initialize async Kroki client.
+
+        Args:
+            kroki_url: Base URL of Kroki service (e.g., http://localhost:8000)
+            max_connections: Maximum number of concurrent connections in the pool
+            max_keepalive_connections: Maximum number of idle keep-alive connections
+            keepalive_expiry: Seconds an idle keep-alive connection is kept open
+            http2: Enable HTTP/2 (requires the optional 'h2' package)
+            retry_policy: Backoff for transient failures; defaults to RetryPolicy()
+            timeout_policy: Per-type/per-format render timeouts; defaults to
+                DEFAULT_TIMEOUT for every render
+            transport: Optional custom httpx async transport (e.g., for testing)
+        """
+        self.kroki_url = kroki_url.rstrip("/")
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout_policy = timeout_policy or TimeoutPolicy(default=self.DEFAULT_TIMEOUT)
+        # Identical concurrent renders share one Kroki request
+        self._single_flight = AsyncSingleFlight()
+        self._http = httpx.AsyncClient(
+            timeout=self.DEFAULT_TIMEOUT,
+            limits=_pool_limits(max_connections, max_keepalive_connections, keepalive_expiry),
+            http2=_http2_enabled(http2),
+            transport=transport
+        )
+
+    async def aclose(self) -> None:
+        """Close the connection pool and release all open connections."""
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "AsyncKrokiClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def _with_retries(
+        self,
+        send: Callable[[], Awaitable[T]],
+        retry_budget: RetryBudget | None = None
+    ) -> T:
+        """Await send(), retrying transient failures with backoff (see KrokiClient)."""
+        retry = 0
+        while True:
+            try:
+                return await send()
+            except KrokiUnavailableError:
+                retry += 1
+                if retry > self.retry_policy.max_retries or not _try_acquire(retry_budget):
+                    raise
+            await asyncio.sleep(self.retry_policy.delay(retry))
+
+    async def render_diagram(
+        self,
+        diagram_source: str,
+        diagram_type: str,
+        output_format: OutputFormat = "png",
+        retry_budget: RetryBudget | None = None
+    ) -> bytes:
+        """Render diagram source code to specified output format.
+
+        Args:
+            diagram_source: Source code of the diagram (e.g., PlantUML syntax)
+            diagram_type: Type of diagram (plantuml, c4plantuml, mermaid, etc.)
+            output_format: Desired output format (png, svg, pdf, jpeg)
+            retry_budget: Optional budget of the caller's run for retries
+
+        Returns:
+            Rendered diagram as bytes
+
+        Raises:
+            KrokiUnavailableError: If Kroki is unreachable or unavailable after retries
+            KrokiRenderError: If Kroki returns an error status or request fails
+        """
+        key = render_cache_key(diagram_source, diagram_type, output_format)
+        return await self._single_flight.do(
+            key,
+            lambda: self._with_retries(
+                lambda: self._post(diagram_source, diagram_type, output_format), retry_budget
+            )
+        )
+
+    async def _post(self, diagram_source: str, diagram_type: str, output_format: str) -> bytes:
+        """Send a render request to Kroki and return the rendered bytes."""
+        endpoint = f"{self.kroki_url}/{diagram_type}/{output_format}"
+        timeout = self.timeout_policy.timeout_for(diagram_type, output_format)
+        started = time.monotonic()
+        try:
+            response = await self._http.post(
+                endpoint, json={"diagram_source": diagram_source}, timeout=timeout
+            )
+        except httpx.TransportError as e:
+            raise _transport_error(e, diagram_type, timeout) from e
+        content = _response_content(response, diagram_type, diagram_source)
+        self.timeout_policy.record(diagram_type, output_format, time.monotonic() - started)
+        return content
+
+    async def render_many(
+        self,
+        requests: Sequence[RenderRequest],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        return_exceptions: bool = False,
+        retry_budget: RetryBudget | None = None
+    ) -> list[bytes | KrokiRenderError]:
+        """Render a batch of diagrams concurrently.
+
+        At most `concurrency` renders are in flight at any time, so a large
+        batch does not overload the Kroki server.
+
+        Args:
+            requests: Render requests as (diagram_source, diagram_type, output_format)
+            concurrency: Maximum number of renders in flight
+            return_exceptions: If True, a failed render yields its KrokiRenderError
+                in the result list instead of raising
+            retry_budget: Optional budget shared by all retries of the batch
+
+        Returns:
+            Rendered bytes (or KrokiRenderError) in the same order as requests
+
+        Raises:
+            KrokiRenderError: If a render fails and return_exceptions is False
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def render_one(request: RenderRequest) -> bytes | KrokiRenderError:
+            diagram_source, diagram_type, output_format = request
+            async with semaphore:
+                try:
+                    return await self.render_diagram(
+                        diagram_source, diagram_type, output_format, retry_budget
+                    )
+                except KrokiRenderError as e:
+                    if return_exceptions:
+                        return e
+                    raise
+
+        return list(await asyncio.gather(*(render_one(request) for request in requests)))
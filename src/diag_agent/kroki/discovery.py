@@ -0,0 +1,81 @@
+"""Persisted result of Kroki endpoint discovery, shared by CLI invocations."""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from diag_agent.utils.files import atomic_write_bytes
+
+
+@dataclass
+class DiscoveryState:
+    """Kroki endpoint(s) chosen by a discovery run."""
+
+    key: dict[str, Any]  # configuration the discovery was made for (mode, URLs, replicas)
+    urls: list[str]  # chosen Kroki endpoint(s)
+    local: bool  # True if the endpoints are local containers managed by diag-agent
+    healthy_at: float  # Unix timestamp of the last successful health check
+
+
+class DiscoveryCache:
+    """Stores the discovered Kroki endpoint in a small state file with a TTL.
+
+    Within the TTL, a later invocation with the same configuration skips
+    the Docker probe (`docker ps`, start, health polling) and only pings
+    the cached endpoint.
+    """
+
+    DEFAULT_TTL = 300.0  # seconds
+
+    def __init__(self, path: str | Path, ttl: float = DEFAULT_TTL) -> None:
+        """Initialize discovery cache.
+
+        Args:
+            path: State file (JSON)
+            ttl: Seconds after the last successful health check that a
+                discovery result is reused
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+
+    def load(self, key: dict[str, Any], now: float | None = None) -> DiscoveryState | None:
+        """Get the cached discovery result for a configuration.
+
+        Args:
+            key: Configuration the result must have been made for
+            now: Current time (Unix timestamp), defaults to time.time()
+
+        Returns:
+            DiscoveryState, or None if missing, expired, corrupt or made for
+            another configuration
+        """
+        if self.ttl <= 0:
+            return None
+        now = time.time() if now is None else now
+        try:
+            state = DiscoveryState(**json.loads(self.path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        if state.key != key or not state.urls or now - state.healthy_at > self.ttl:
+            return None
+        return state
+
+    def save(self, state: DiscoveryState) -> None:
+        """Persist a discovery result (errors are ignored - caching is an optimization only).
+
+        Args:
+            state: Discovery result
+        """
+        try:
+            atomic_write_bytes(self.path, json.dumps(asdict(state), sort_keys=True).encode("utf-8"))
+        except OSError:
+            pass
+
+    def invalidate(self) -> None:
+        """Forget the cached discovery result (e.g., after a failed health ping)."""
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
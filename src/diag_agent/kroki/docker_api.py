@@ -0,0 +1,314 @@
+"""Minimal Docker Engine API client over the local unix socket.
+
+Talks to the Docker daemon directly through httpx instead of forking the
+`docker` CLI for every container check, which costs tens to hundreds of
+milliseconds per call on each CLI run and MCP tool call.
+"""
+
+import os
+import json
+from typing import Any
+
+import httpx
+
+
+DEFAULT_SOCKET_PATH = "/var/run/docker.sock"
+
+
+class DockerApiError(Exception):
+    """Exception raised when a Docker Engine API request fails.
+
+    `status_code` is the HTTP status returned by the daemon, or None if
+    the daemon could not be reached (callers fall back to the CLI then).
+    """
+
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        """Initialize Docker API error.
+
+        Args:
+            message: Error message
+            status_code: HTTP status from the daemon, None for connection errors
+        """
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def docker_socket_path() -> str | None:
+    """Get the unix socket of the Docker daemon.
+
+    Honors DOCKER_HOST=unix://...; other DOCKER_HOST schemes (tcp, ssh)
+    are left to the docker CLI.
+
+    Returns:
+        Socket path, or None if DOCKER_HOST points elsewhere
+    """
+    docker_host = os.getenv("DOCKER_HOST", "")
+    if not docker_host:
+        return DEFAULT_SOCKET_PATH
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://"):]
+    return None
+
+
+class DockerApi:
+    """Docker Engine API client for the container operations KrokiManager needs."""
+
+    API_VERSION = "v1.41"  # Docker 20.10+
+    DEFAULT_TIMEOUT = 10.0  # seconds
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: httpx.BaseTransport | None = None
+    ) -> None:
+        """Initialize Docker API client.
+
+        Args:
+            socket_path: Unix socket of the Docker daemon
+            timeout: Request timeout in seconds
+            transport: Optional custom httpx transport (e.g., for testing)
+        """
+        self.socket_path = socket_path
+        self._http = httpx.Client(
+            base_url=f"http://docker/{self.API_VERSION}",
+            transport=transport or httpx.HTTPTransport(uds=socket_path),
+            timeout=timeout
+        )
+
+    @classmethod
+    def from_environment(cls) -> "DockerApi | None":
+        """Create a client if the Docker socket is accessible.
+
+        Returns:
+            DockerApi, or None if the socket is missing or not accessible
+            (e.g., user not in the docker group) - use the CLI then
+        """
+        socket_path = docker_socket_path()
+        if socket_path is None or not os.access(socket_path, os.R_OK | os.W_OK):
+            return None
+        return cls(socket_path)
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        self._http.close()
+
+    def inspect_container(self, name: str) -> dict[str, Any] | None:
+        """Inspect a container.
+
+        Args:
+            name: Container name or ID
+
+        Returns:
+            Container details (as `docker inspect`), or None if it does not exist
+
+        Raises:
+            DockerApiError: If the daemon is unreachable or the request fails
+        """
+        response = self._request("GET", f"/containers/{name}/json", allowed=(404,))
+        return None if response.status_code == 404 else response.json()
+
+    def list_containers(self, name_filter: str) -> list[dict[str, Any]]:
+        """List containers (running or stopped) whose name matches a filter.
+
+        Args:
+            name_filter: Docker name filter (regular expression, e.g. "^kroki")
+
+        Returns:
+            Container summaries (as `docker ps -a`), including their Names
+
+        Raises:
+            DockerApiError: If the request fails
+        """
+        response = self._request(
+            "GET",
+            "/containers/json",
+            params={"all": "true", "filters": json.dumps({"name": [name_filter]})}
+        )
+        containers: list[dict[str, Any]] = response.json()
+        return containers
+
+    def create_container(
+        self,
+        name: str,
+        image: str,
+        port_bindings: dict[int, int],
+        env: dict[str, str] | None = None,
+        network: str | None = None
+    ) -> str:
+        """Create a container (without starting it).
+
+        Args:
+            name: Container name
+            image: Image to run (must be present locally)
+            port_bindings: Container port -> host port (TCP)
+            env: Environment variables of the container
+            network: Network to attach the container to (instead of the default bridge)
+
+        Returns:
+            ID of the created container
+
+        Raises:
+            DockerApiError: If the image is missing (404), the name is taken (409),
+                or the request fails
+        """
+        payload: dict[str, Any] = {
+            "Image": image,
+            "ExposedPorts": {f"{port}/tcp": {} for port in port_bindings},
+            "HostConfig": {
+                "PortBindings": {
+                    f"{port}/tcp": [{"HostPort": str(host_port)}]
+                    for port, host_port in port_bindings.items()
+                }
+            },
+        }
+        if env:
+            payload["Env"] = [f"{key}={value}" for key, value in env.items()]
+        if network:
+            payload["HostConfig"]["NetworkMode"] = network
+        response = self._request("POST", "/containers/create", params={"name": name}, json=payload)
+        container_id: str = response.json()["Id"]
+        return container_id
+
+    def create_network(self, name: str) -> None:
+        """Create a bridge network (no-op if it already exists).
+
+        Args:
+            name: Network name
+
+        Raises:
+            DockerApiError: If the request fails
+        """
+        self._request(
+            "POST", "/networks/create", json={"Name": name, "CheckDuplicate": True}, allowed=(409,)
+        )
+
+    def connect_network(self, network: str, container: str) -> None:
+        """Attach a container to a network (no-op if it is already attached).
+
+        Args:
+            network: Network name
+            container: Container name or ID
+
+        Raises:
+            DockerApiError: If the network or container does not exist or the request fails
+        """
+        # The daemon answers 403 (older) or 409 if the endpoint already exists
+        self._request(
+            "POST",
+            f"/networks/{network}/connect",
+            json={"Container": container},
+            allowed=(403, 409)
+        )
+
+    def start_container(self, name: str) -> None:
+        """Start a container (no-op if it is already running).
+
+        Args:
+            name: Container name or ID
+
+        Raises:
+            DockerApiError: If the container does not exist or the request fails
+        """
+        self._request("POST", f"/containers/{name}/start", allowed=(304,))
+
+    def stop_container(self, name: str) -> None:
+        """Stop a container (no-op if it is stopped or does not exist).
+
+        Args:
+            name: Container name or ID
+
+        Raises:
+            DockerApiError: If the request fails
+        """
+        self._request("POST", f"/containers/{name}/stop", allowed=(304, 404))
+
+    def remove_container(self, name: str) -> None:
+        """Remove a container (no-op if it does not exist).
+
+        Args:
+            name: Container name or ID
+
+        Raises:
+            DockerApiError: If the request fails
+        """
+        self._request("DELETE", f"/containers/{name}", allowed=(404,))
+
+    def stats(self, name: str) -> dict[str, float] | None:
+        """Get a one-shot resource usage sample of a container.
+
+        Args:
+            name: Container name or ID
+
+        Returns:
+            Dict with cpu_percent, memory_usage and memory_limit, network_rx
+            and network_tx (bytes since start), or None if the container
+            does not exist
+
+        Raises:
+            DockerApiError: If the request fails
+        """
+        response = self._request(
+            "GET", f"/containers/{name}/stats", params={"stream": "false"}, allowed=(404,)
+        )
+        if response.status_code == 404:
+            return None
+        return summarize_stats(response.json())
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        allowed: tuple[int, ...] = (),
+        **kwargs: Any
+    ) -> httpx.Response:
+        """Send a request, accepting 2xx and the `allowed` statuses."""
+        try:
+            response = self._http.request(method, path, **kwargs)
+        except httpx.TransportError as e:
+            raise DockerApiError(f"Docker daemon not reachable at {self.socket_path}: {e}") from e
+        if response.is_success or response.status_code in allowed:
+            return response
+        try:
+            message = response.json().get("message", response.text)
+        except ValueError:
+            message = response.text
+        raise DockerApiError(
+            f"Docker API {method} {path} failed: HTTP {response.status_code} - {message}",
+            response.status_code
+        )
+
+
+def summarize_stats(stats: dict[str, Any]) -> dict[str, float]:
+    """Reduce a Docker stats sample to CPU and memory usage (as `docker stats` shows them).
+
+    Args:
+        stats: Response of GET /containers/{id}/stats?stream=false
+
+    Returns:
+        Dict with cpu_percent, memory_usage and memory_limit, network_rx
+        and network_tx (bytes received/sent since start, all networks)
+    """
+    cpu = stats.get("cpu_stats", {})
+    precpu = stats.get("precpu_stats", {})
+    cpu_delta = (
+        cpu.get("cpu_usage", {}).get("total_usage", 0)
+        - precpu.get("cpu_usage", {}).get("total_usage", 0)
+    )
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    percpu_usage = cpu.get("cpu_usage", {}).get("percpu_usage") or []
+    online_cpus = cpu.get("online_cpus") or len(percpu_usage) or 1
+    cpu_percent = cpu_delta / system_delta * online_cpus * 100.0 if system_delta > 0 else 0.0
+
+    memory = stats.get("memory_stats", {})
+    # Page cache is reclaimable - excluded like `docker stats` does (cgroup v2 / v1)
+    details = memory.get("stats", {})
+    cache = details.get("inactive_file", details.get("cache", 0))
+    networks = (stats.get("networks") or {}).values()
+    return {
+        "cpu_percent": round(cpu_percent, 2),
+        "memory_usage": max(0, memory.get("usage", 0) - cache),
+        "memory_limit": memory.get("limit", 0),
+        "network_rx": sum(network.get("rx_bytes", 0) for network in networks),
+        "network_tx": sum(network.get("tx_bytes", 0) for network in networks),
+    }
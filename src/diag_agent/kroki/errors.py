@@ -0,0 +1,187 @@
+"""Structured parsing of Kroki error responses per rendering backend."""
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+@dataclass
+class KrokiErrorDetails:
+    """Error reported by a Kroki backend, reduced to what is needed for a fix."""
+
+    message: str  # concise error text without Kroki's framing
+    error_class: str  # e.g., "Syntax Error", "Parse error", "unparsable content"
+    line: int | None = None  # 1-based line in the diagram source
+    column: int | None = None  # 1-based column in that line
+    snippet: str | None = None  # numbered source lines around the error
+
+    def summary(self) -> str:
+        """Describe the error in one line (class, position and message).
+
+        Returns:
+            E.g., "Parse error at line 3, column 7: Expecting 'SEMI', got 'ARROW'"
+        """
+        position = ""
+        if self.line is not None:
+            position = f" at line {self.line}"
+            if self.column is not None:
+                position += f", column {self.column}"
+        if self.message and self.message != self.error_class:
+            return f"{self.error_class}{position}: {self.message}"
+        return f"{self.error_class}{position}"
+
+
+# Kroki's PlantUML error: "Syntax Error? (Assumed diagram type: sequence) (line: 2)"
+PLANTUML_LINE_PATTERN = re.compile(r"\(line:\s*(\d+)\)")
+# Mermaid (jison): "Parse error on line 3:\n...A --> B\n-----^\nExpecting 'SEMI', got 'ARROW'"
+MERMAID_ERROR_PATTERN = re.compile(
+    r"(Parse error|Lexical error) on line (\d+)[:.]?", re.IGNORECASE
+)
+# bpmn-moddle: "unparsable content <bpmn:foo> detected\n\tline: 3\n\tcolumn: 12\n..."
+BPMN_LINE_PATTERN = re.compile(r"\bline:\s*(\d+)")
+BPMN_COLUMN_PATTERN = re.compile(r"\bcolumn:\s*(\d+)")
+GENERIC_LINE_PATTERN = re.compile(r"\bline[:\s]+(\d+)", re.IGNORECASE)
+GENERIC_COLUMN_PATTERN = re.compile(r"\bcol(?:umn)?[:\s]+(\d+)", re.IGNORECASE)
+ERROR_PREFIX_PATTERN = re.compile(r"^(?:Error(?:\s+\d+)?:\s*)+", re.IGNORECASE)
+ERROR_CLASS_PATTERN = re.compile(r"^([\w ]*?\w*error)\b", re.IGNORECASE)
+
+SNIPPET_CONTEXT = 1  # source lines shown before and after the offending line
+
+
+def _first_line(body: str) -> str:
+    """First non-empty line of an error body, without "Error:"/"Error 400:" prefixes."""
+    for line in body.strip().splitlines():
+        line = ERROR_PREFIX_PATTERN.sub("", line.strip())
+        if line:
+            return line
+    return ""
+
+
+def _error_class(message: str) -> str:
+    """Leading "... error" phrase of a message (e.g., "syntax error"), else its text before ":"."""
+    match = ERROR_CLASS_PATTERN.match(message)
+    return match.group(1) if match else message.split(":")[0]
+
+
+def _parse_plantuml(body: str) -> tuple[str, str, int | None, int | None]:
+    """Parse a PlantUML error (c4plantuml uses the same renderer)."""
+    message = _first_line(body)
+    match = PLANTUML_LINE_PATTERN.search(body)
+    # PlantUML reports 0-based line positions
+    line = int(match.group(1)) + 1 if match else None
+    error_class = "Syntax Error" if "syntax error" in body.lower() else _error_class(message)
+    message = PLANTUML_LINE_PATTERN.sub("", message).strip()
+    return error_class, message, line, None
+
+
+def _parse_mermaid(body: str) -> tuple[str, str, int | None, int | None]:
+    """Parse a Mermaid (jison parser/lexer) error."""
+    match = MERMAID_ERROR_PATTERN.search(body)
+    if match is None:
+        message = _first_line(body)
+        return _error_class(message), message, None, None
+
+    error_class = match.group(1)
+    line = int(match.group(2))
+    rest = body[match.end():].strip("\n").splitlines()
+    column = None
+    message_lines = rest
+    # jison shows an excerpt of the input followed by a "-----^" marker line
+    if len(rest) >= 2 and re.fullmatch(r"-*\^", rest[1].strip()):
+        excerpt = rest[0]
+        caret = rest[1].index("^")
+        if not excerpt.startswith("..."):
+            column = caret + 1
+        message_lines = rest[2:]
+    message = " ".join(part.strip() for part in message_lines if part.strip()) or error_class
+    return error_class, message, line, column
+
+
+def _parse_bpmn(body: str) -> tuple[str, str, int | None, int | None]:
+    """Parse a bpmn-js (bpmn-moddle XML) error."""
+    message = _first_line(body)
+    line_match = BPMN_LINE_PATTERN.search(body)
+    column_match = BPMN_COLUMN_PATTERN.search(body)
+    # The XML parser (saxen) counts lines and columns from 0
+    line = int(line_match.group(1)) + 1 if line_match else None
+    column = int(column_match.group(1)) + 1 if column_match else None
+    error_class = re.sub(r"\s*<[^>]*>.*$", "", message) or message
+    return error_class, message, line, column
+
+
+def _parse_generic(body: str) -> tuple[str, str, int | None, int | None]:
+    """Best-effort parsing for other backends."""
+    message = _first_line(body)
+    line_match = GENERIC_LINE_PATTERN.search(body)
+    column_match = GENERIC_COLUMN_PATTERN.search(body)
+    line = int(line_match.group(1)) if line_match else None
+    column = int(column_match.group(1)) if column_match and line is not None else None
+    return _error_class(message), message, line, column
+
+
+_PARSERS: dict[str, Callable[[str], tuple[str, str, int | None, int | None]]] = {
+    "plantuml": _parse_plantuml,
+    "c4plantuml": _parse_plantuml,
+    "mermaid": _parse_mermaid,
+    "bpmn": _parse_bpmn,
+}
+
+
+def source_snippet(
+    diagram_source: str,
+    line: int,
+    column: int | None = None,
+    context: int = SNIPPET_CONTEXT
+) -> str | None:
+    """Extract numbered source lines around an error position.
+
+    Args:
+        diagram_source: Source code of the diagram
+        line: 1-based line of the error
+        column: 1-based column of the error (adds a "^" marker)
+        context: Lines shown before and after the error line
+
+    Returns:
+        Snippet with the error line marked by ">", or None if line is out of range
+    """
+    lines = diagram_source.splitlines()
+    if not 1 <= line <= len(lines):
+        return None
+    width = len(str(min(len(lines), line + context)))
+    snippet = []
+    for number in range(max(1, line - context), min(len(lines), line + context) + 1):
+        marker = ">" if number == line else " "
+        snippet.append(f"{marker} {number:>{width}} | {lines[number - 1]}")
+        if number == line and column is not None:
+            snippet.append(f"  {' ' * width} | {' ' * (column - 1)}^")
+    return "\n".join(snippet)
+
+
+def parse_kroki_error(
+    diagram_type: str,
+    body: str,
+    diagram_source: str | None = None
+) -> KrokiErrorDetails:
+    """Parse a Kroki error body into structured details.
+
+    Args:
+        diagram_type: Type of diagram (selects the backend-specific parser)
+        body: Error body returned by Kroki
+        diagram_source: Source code of the diagram (used to extract the snippet)
+
+    Returns:
+        KrokiErrorDetails; line/column/snippet are None if the backend did not
+        report a position
+    """
+    parser = _PARSERS.get(diagram_type.lower(), _parse_generic)
+    error_class, message, line, column = parser(body)
+    snippet = None
+    if line is not None and diagram_source is not None:
+        snippet = source_snippet(diagram_source, line, column)
+    return KrokiErrorDetails(
+        message=message,
+        error_class=error_class or "Error",
+        line=line,
+        column=column,
+        snippet=snippet
+    )
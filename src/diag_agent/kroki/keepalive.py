@@ -0,0 +1,235 @@
+"""Idle reaping and keep-warm supervision of the local Kroki container.
+
+diag-agent runs (CLI, MCP server) record their use of the local Kroki
+container in a small heartbeat file. `diag-agent kroki keepalive` reads
+it to stop the container after an idle period and to start and warm it
+up again shortly before demand is expected, based on when work sessions
+(e.g., docs builds) started on previous days.
+"""
+
+import json
+import time
+from collections.abc import Callable, Sequence
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from diag_agent.kroki.discovery import DiscoveryCache
+from diag_agent.kroki.manager import KrokiManager, KrokiManagerError
+from diag_agent.kroki.warmup import (
+    DEFAULT_WARMUP_FORMATS,
+    DEFAULT_WARMUP_ROUNDS,
+    DEFAULT_WARMUP_TYPES,
+)
+from diag_agent.utils.files import atomic_write_bytes
+
+
+class Heartbeat:
+    """Usage record of the local Kroki container, shared by all diag-agent processes.
+
+    The file holds the time of the last use, the last use per diagram
+    type (for companion containers) and the start times of recent work
+    sessions. A use after more than SESSION_GAP seconds without one starts
+    a new session.
+    """
+
+    SESSION_GAP = 1800.0  # seconds without use that end a session
+    HISTORY_DAYS = 14  # days of session starts kept for demand prediction
+
+    def __init__(self, path: str | Path) -> None:
+        """Initialize heartbeat.
+
+        Args:
+            path: Heartbeat file (JSON)
+        """
+        self.path = Path(path)
+
+    def beat(self, diagram_type: str | None = None, now: float | None = None) -> None:
+        """Record a use of the local Kroki container.
+
+        Writing the heartbeat is an optimization only; errors are ignored.
+
+        Args:
+            diagram_type: Diagram type rendered (tracks companion use)
+            now: Current time (Unix timestamp), defaults to time.time()
+        """
+        now = time.time() if now is None else now
+        state = self.read()
+        last = state.get("last")
+        if last is None or now - last > self.SESSION_GAP:
+            state["sessions"].append(now)
+        state["sessions"] = [
+            start for start in state["sessions"] if now - start <= self.HISTORY_DAYS * 86400
+        ]
+        state["last"] = now
+        if diagram_type:
+            state["types"][diagram_type.lower()] = now
+        try:
+            atomic_write_bytes(self.path, json.dumps(state, sort_keys=True).encode("utf-8"))
+        except OSError:
+            pass
+
+    def read(self) -> dict[str, Any]:
+        """Read the heartbeat file.
+
+        Returns:
+            Dict with last (timestamp or None), types (diagram type ->
+            timestamp) and sessions (session start timestamps); empty
+            values if the file is missing or corrupt
+        """
+        state: dict[str, Any] = {"last": None, "types": {}, "sessions": []}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            state["last"] = float(data["last"]) if data.get("last") is not None else None
+            state["types"] = {
+                str(key): float(value) for key, value in data.get("types", {}).items()
+            }
+            state["sessions"] = [float(start) for start in data.get("sessions", [])]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+        return state
+
+
+def predict_demand(
+    sessions: Sequence[float],
+    now: float,
+    lead_time: float,
+    min_days: int = 2
+) -> bool:
+    """Predict whether a work session will start within lead_time seconds.
+
+    Demand is expected if, on at least min_days earlier days, a session
+    started at the same time of day (within the next lead_time seconds).
+
+    Args:
+        sessions: Start timestamps of recent sessions
+        now: Current time (Unix timestamp)
+        lead_time: Seconds ahead to look
+        min_days: Earlier days with a matching session start required
+
+    Returns:
+        True if a session is expected to start soon
+    """
+    current = datetime.fromtimestamp(now)
+    today = current.date()
+    days = set()
+    for start in sessions:
+        started = datetime.fromtimestamp(start)
+        if started.date() >= today:
+            continue
+        # Same time of day, moved to today
+        candidate = datetime.combine(today, started.time())
+        if current <= candidate <= current + timedelta(seconds=lead_time):
+            days.add(started.date())
+    return len(days) >= min_days
+
+
+class KeepaliveSupervisor:
+    """Stops the idle local Kroki container and pre-warms it before expected demand."""
+
+    DEFAULT_IDLE_TIMEOUT = 1800.0  # seconds
+    DEFAULT_LEAD_TIME = 600.0  # seconds
+    DEFAULT_INTERVAL = 60.0  # seconds between checks
+
+    def __init__(
+        self,
+        manager: KrokiManager,
+        heartbeat: Heartbeat,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        lead_time: float = DEFAULT_LEAD_TIME,
+        warmup_types: Sequence[str] = DEFAULT_WARMUP_TYPES,
+        warmup_formats: Sequence[str] = DEFAULT_WARMUP_FORMATS,
+        warmup_rounds: int = DEFAULT_WARMUP_ROUNDS,
+        discovery: DiscoveryCache | None = None,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        """Initialize supervisor.
+
+        Args:
+            manager: Manager of the local Kroki container(s)
+            heartbeat: Usage record written by diag-agent runs
+            idle_timeout: Seconds without use before the container is stopped
+            lead_time: Seconds before a predicted session to start the container
+            warmup_types: Diagram types to warm up after a pre-warm start
+            warmup_formats: Output formats to warm up
+            warmup_rounds: Warm-up renders per type and format
+            discovery: Persisted Kroki discovery, forgotten when the container is stopped
+            clock: Time source (Unix timestamps), e.g. for testing
+        """
+        self.manager = manager
+        self.heartbeat = heartbeat
+        self.idle_timeout = idle_timeout
+        self.lead_time = lead_time
+        self.warmup_types = warmup_types
+        self.warmup_formats = warmup_formats
+        self.warmup_rounds = warmup_rounds
+        self.discovery = discovery
+        self.clock = clock
+        # Without any recorded use, idle time counts from the supervisor start
+        self.started_at = clock()
+
+    def tick(self) -> list[str]:
+        """Check usage once and stop or start containers accordingly.
+
+        Returns:
+            Human-readable descriptions of the actions taken
+
+        Raises:
+            KrokiManagerError: If Docker is not available
+        """
+        now = self.clock()
+        state = self.heartbeat.read()
+        last_use = max(state["last"] or 0.0, self.started_at)
+        demand = predict_demand(state["sessions"], now, self.lead_time)
+        actions = []
+
+        if self.manager.is_running():
+            if now - last_use >= self.idle_timeout and not demand:
+                self.manager.stop(all_replicas=True)
+                self.manager.stop_companions()
+                if self.discovery is not None:
+                    self.discovery.invalidate()
+                actions.append(f"Stopped Kroki (idle for {(now - last_use) / 60:.0f} min)")
+                return actions
+            for companion in self.manager.running_companions():
+                companion_use = max(state["types"].get(companion, 0.0), self.started_at)
+                if now - companion_use >= self.idle_timeout:
+                    self.manager.stop_companion(companion)
+                    actions.append(f"Stopped {self.manager.companion_name(companion)} (idle)")
+        elif demand:
+            self.manager.start()
+            ready_after = self.manager.wait_until_healthy()
+            if ready_after is None:
+                actions.append("Started Kroki for expected demand, but it did not become healthy")
+                return actions
+            self.manager.warm_up(self.warmup_types, self.warmup_formats, self.warmup_rounds)
+            actions.append(
+                f"Started and warmed up Kroki for expected demand (ready after {ready_after:.1f}s)"
+            )
+        return actions
+
+    def run(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        on_action: Callable[[str], None] | None = None,
+        max_ticks: int | None = None
+    ) -> None:
+        """Supervise until interrupted.
+
+        Args:
+            interval: Seconds between checks
+            on_action: Called with the description of each action
+            max_ticks: Stop after this many checks (None = run forever)
+        """
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            try:
+                actions = self.tick()
+            except KrokiManagerError as e:
+                actions = [f"Error: {e}"]
+            for action in actions:
+                if on_action is not None:
+                    on_action(action)
+            ticks += 1
+            if max_ticks is None or ticks < max_ticks:
+                time.sleep(interval)
@@ -0,0 +1,176 @@
+"""Adaptive client-side concurrency limiting per Kroki endpoint."""
+
+import threading
+
+# Kind of render whose latencies are comparable: (diagram_type, output_format)
+Workload = tuple[str, str]
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by observed render latency.
+
+    Kroki renders on a single JVM; past a certain number of concurrent
+    renders, latency grows for every caller without any gain in
+    throughput. The limiter tracks a baseline (near no-load) latency per
+    workload - a PlantUML PNG legitimately takes far longer than a Mermaid
+    SVG, so latencies are only compared within the same (diagram_type,
+    output_format) pair - and:
+
+    - increases the limit additively (+1 per limit-many fast renders)
+      while latency stays within `tolerance` times the baseline,
+    - decreases it multiplicatively (`backoff`) when latency exceeds that
+      or a request fails at the transport level.
+
+    Requests beyond the current limit wait locally in acquire() instead
+    of piling up in the Kroki JVM.
+    """
+
+    DEFAULT_INITIAL_LIMIT = 4
+    DEFAULT_MIN_LIMIT = 1
+    DEFAULT_MAX_LIMIT = 32
+    DEFAULT_TOLERANCE = 2.0  # latency / baseline ratio considered overload
+    DEFAULT_BACKOFF = 0.8  # multiplicative decrease on overload
+    BASELINE_DRIFT = 0.05  # how fast the baseline follows slower latencies
+
+    def __init__(
+        self,
+        initial_limit: int = DEFAULT_INITIAL_LIMIT,
+        min_limit: int = DEFAULT_MIN_LIMIT,
+        max_limit: int = DEFAULT_MAX_LIMIT,
+        tolerance: float = DEFAULT_TOLERANCE,
+        backoff: float = DEFAULT_BACKOFF
+    ) -> None:
+        """Initialize limiter.
+
+        Args:
+            initial_limit: Concurrency limit before any latency is observed
+            min_limit: Lowest limit the limiter backs off to
+            max_limit: Highest limit the limiter grows to
+            tolerance: Latency/baseline ratio above which the limit is decreased
+            backoff: Factor applied to the limit on overload
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self._baselines: dict[Workload, float] = {}
+        self._in_flight = 0
+        self._queued = 0
+        self._completed = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        with self._condition:
+            return int(self._limit)
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent, then count it as in flight."""
+        with self._condition:
+            self._queued += 1
+            try:
+                while self._in_flight >= int(self._limit):
+                    self._condition.wait()
+            finally:
+                self._queued -= 1
+            self._in_flight += 1
+
+    def release(self, latency: float | None, workload: Workload = ("", "")) -> None:
+        """Finish a request and adapt the limit.
+
+        Args:
+            latency: Seconds the request took, or None if it failed at the
+                transport level (treated as overload)
+            workload: (diagram_type, output_format) of the request; its
+                latency is compared with the baseline of the same workload
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._completed += 1
+            if latency is None:
+                self._decrease()
+            else:
+                baseline = self._baselines.get(workload)
+                if baseline is None or latency < baseline:
+                    baseline = latency
+                else:
+                    # Let the baseline follow slowly, so a permanently slower
+                    # server (or heavier diagrams) does not shrink the limit forever
+                    baseline += (latency - baseline) * self.BASELINE_DRIFT
+                self._baselines[workload] = baseline
+                if latency > baseline * self.tolerance:
+                    self._decrease()
+                else:
+                    self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        """Finish a request without adapting the limit (e.g., a render that timed out)."""
+        with self._condition:
+            self._in_flight -= 1
+            self._completed += 1
+            self._condition.notify_all()
+
+    def _decrease(self) -> None:
+        """Multiplicative decrease; caller holds the lock."""
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+
+    def metrics(self) -> dict[str, float]:
+        """Get current limiter metrics.
+
+        Returns:
+            Dict with limit, in_flight, queue_depth and completed
+        """
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "queue_depth": self._queued,
+                "completed": self._completed,
+            }
+
+
+# Limiters are shared by all clients of a process, keyed by endpoint URL,
+# so concurrent MCP tool calls and batch renders share one limit per JVM.
+_limiters: dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(
+    kroki_url: str, max_limit: int = AdaptiveLimiter.DEFAULT_MAX_LIMIT
+) -> AdaptiveLimiter:
+    """Get the process-wide concurrency limiter for a Kroki endpoint.
+
+    Args:
+        kroki_url: Base URL of the Kroki endpoint
+        max_limit: Highest concurrency a new limiter may grow to
+
+    Returns:
+        Existing limiter for the endpoint, or a newly created one
+    """
+    key = kroki_url.rstrip("/")
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter(max_limit=max_limit)
+            _limiters[key] = limiter
+        return limiter
+
+
+def limiter_metrics() -> dict[str, dict[str, float]]:
+    """Get metrics of all endpoint limiters.
+
+    Returns:
+        Mapping of endpoint URL to AdaptiveLimiter.metrics()
+    """
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {url: limiter.metrics() for url, limiter in limiters.items()}
+
+
+def reset_limiters() -> None:
+    """Forget all endpoint limiters (e.g., after reconfiguration or in tests)."""
+    with _limiters_lock:
+        _limiters.clear()
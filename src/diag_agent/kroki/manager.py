@@ -4,9 +4,31 @@ Manages local Kroki deployment using Docker containers for privacy-focused,
 local-first diagram rendering (ADR-003: Local-First with Docker).
 """
 
+import getpass
+import json
+import re
 import subprocess
+import tempfile
+import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
 import httpx
 
+from diag_agent.kroki.docker_api import DockerApi, DockerApiError
+from diag_agent.kroki.warmup import (
+    DEFAULT_WARMUP_FORMATS,
+    DEFAULT_WARMUP_ROUNDS,
+    DEFAULT_WARMUP_TYPES,
+    WARMUP_SOURCES,
+    WarmupTiming,
+    run_warmup,
+)
+from diag_agent.utils.locks import FileLock, LockTimeout
+
 
 class KrokiManagerError(Exception):
     """Exception raised when Kroki Docker management fails.
@@ -17,46 +39,235 @@ class KrokiManagerError(Exception):
     pass
 
 
+SIZE_PATTERN = re.compile(r"([\d.]+)\s*([kmgtp]?i?b)", re.IGNORECASE)
+SIZE_UNITS = {
+    "b": 1, "kb": 10**3, "mb": 10**6, "gb": 10**9, "tb": 10**12, "pb": 10**15,
+    "kib": 2**10, "mib": 2**20, "gib": 2**30, "tib": 2**40, "pib": 2**50,
+}
+
+
+# Kroki renders these diagram types in companion containers (by diagram type)
+COMPANION_IMAGES = {
+    "mermaid": "yuzutech/kroki-mermaid",
+    "bpmn": "yuzutech/kroki-bpmn",
+    "excalidraw": "yuzutech/kroki-excalidraw",
+    "diagramsnet": "yuzutech/kroki-diagramsnet",
+}
+
+
+def default_lock_file() -> Path:
+    """Lock file serializing container lifecycle operations of the current user."""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "default"
+    return Path(tempfile.gettempdir()) / f"diag-agent-kroki-{user}.lock"
+
+
+def _parse_size(text: str) -> int:
+    """Parse a size as printed by `docker stats` (e.g., "151.2MiB") into bytes."""
+    match = SIZE_PATTERN.search(text)
+    if match is None:
+        return 0
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def _parse_timestamp(text: str) -> float | None:
+    """Parse a Docker timestamp (RFC 3339 in UTC, e.g. "2026-10-17T21:59:37.12Z") into Unix time."""
+    try:
+        started = datetime.strptime(text[:19], "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+    return started.replace(tzinfo=timezone.utc).timestamp()
+
+
 class KrokiManager:
     """Manager for Kroki Docker container lifecycle.
     
     Provides methods to start, stop, and monitor a local Kroki
     server running in a Docker container. Uses the yuzutech/kroki
-    image which includes all diagram libraries.
+    gateway image, which renders most diagram types itself. Mermaid,
+    BPMN, Excalidraw and diagrams.net need a companion container; each
+    companion is started on first use of its diagram type on a private
+    network shared with the gateway, and stopped again when idle.
+
+    With a DockerApi, container operations talk to the Docker daemon
+    over its unix socket instead of forking the `docker` CLI. The CLI
+    remains the fallback if the daemon cannot be reached through the
+    API (and for pulling a missing image on start).
+
+    Start and stop are serialized across processes with a file lock, so
+    parallel runs (e.g., `make -j8`) start the container once and reuse
+    it instead of failing on a container name conflict.
     """
 
     CONTAINER_NAME = "kroki"
     DOCKER_IMAGE = "yuzutech/kroki"
     DEFAULT_PORT = 8000
     HEALTH_CHECK_TIMEOUT = 5.0  # seconds
+    STARTUP_TIMEOUT = 60.0  # seconds for the JVM to boot after start()
+    POLL_INITIAL_DELAY = 0.1  # seconds between readiness polls, doubling...
+    POLL_MAX_DELAY = 1.0  # ...up to this
+    NETWORK_NAME = "kroki-net"  # private network of gateway and companions
+    COMPANION_STARTUP_TIMEOUT = 30.0  # seconds for a companion to render
+    COMPANION_IDLE_TIMEOUT = 900.0  # seconds without use before a companion is stopped
+    LOCK_TIMEOUT = 300.0  # seconds to wait for another process's start/stop (incl. image pull)
 
-    def __init__(self, port: int = DEFAULT_PORT) -> None:
+    def __init__(
+        self,
+        port: int = DEFAULT_PORT,
+        docker_api: DockerApi | None = None,
+        replicas: int = 1,
+        lock_file: str | Path | None = None
+    ) -> None:
         """Initialize Kroki manager.
         
         Args:
-            port: Port to expose Kroki service on (default: 8000)
+            port: Port to expose Kroki service on (default: 8000); replica
+                i of a pool uses port + i
+            docker_api: Optional Docker Engine API client (e.g.,
+                DockerApi.from_environment()); None uses the docker CLI
+            replicas: Number of Kroki containers (JVMs) to run
+            lock_file: File lock serializing start/stop across processes
+                (default: default_lock_file())
         """
         self.port = port
         self.kroki_url = f"http://localhost:{port}"
+        self.docker_api = docker_api
+        self.replicas = max(1, replicas)
+        self._lock = FileLock(lock_file if lock_file is not None else default_lock_file())
+
+    @contextmanager
+    def lifecycle_lock(self, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+        """Hold the inter-process lock for container lifecycle operations.
+
+        Args:
+            timeout: Maximum seconds to wait for another process
+
+        Raises:
+            KrokiManagerError: If the lock is not acquired within the timeout
+        """
+        try:
+            self._lock.acquire(timeout)
+        except LockTimeout as e:
+            raise KrokiManagerError(
+                f"Another diag-agent process is still starting or stopping Kroki: {e}"
+            ) from e
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    @property
+    def endpoints(self) -> list[str]:
+        """Base URLs of the configured replicas."""
+        return [self.replica_url(index) for index in range(self.replicas)]
+
+    def replica_name(self, index: int) -> str:
+        """Container name of a replica ("kroki", "kroki-2", "kroki-3", ...)."""
+        return self.CONTAINER_NAME if index == 0 else f"{self.CONTAINER_NAME}-{index + 1}"
+
+    def replica_url(self, index: int) -> str:
+        """Base URL of a replica."""
+        return f"http://localhost:{self.port + index}"
+
+    def companion_name(self, companion: str) -> str:
+        """Container name of a companion ("kroki-mermaid", "kroki-bpmn", ...)."""
+        return f"{self.CONTAINER_NAME}-{companion}"
+
+    def companion_for(self, diagram_type: str) -> str | None:
+        """Get the companion a diagram type needs.
+
+        Args:
+            diagram_type: Type of diagram (plantuml, mermaid, bpmn, ...)
+
+        Returns:
+            Companion name (e.g., "mermaid"), or None if the gateway renders
+            the type itself
+        """
+        diagram_type = diagram_type.lower()
+        return diagram_type if diagram_type in COMPANION_IMAGES else None
+
+    def _gateway_env(self) -> dict[str, str]:
+        """Environment pointing the gateway at the companions on the private network."""
+        return {
+            f"KROKI_{companion.upper()}_HOST": self.companion_name(companion)
+            for companion in COMPANION_IMAGES
+        }
+
+    def _api_failed(self, error: DockerApiError) -> None:
+        """Fall back to the CLI for good if the daemon is not reachable via the API."""
+        if error.status_code is None:
+            self.docker_api = None
 
     def start(self) -> None:
-        """Start Kroki Docker container.
+        """Start Kroki Docker container(s).
         
-        Launches a detached Docker container with the Kroki service.
-        The container is named 'kroki' and exposes the service on
-        the configured port.
+        Launches a detached Docker container with the Kroki service
+        for each replica that is not running yet. The first container is
+        named 'kroki' and exposes the service on the configured port.
+        Holds the lifecycle lock, so a process that starts concurrently
+        waits and then finds the containers running.
         
         Raises:
             KrokiManagerError: If Docker is not available or start fails
         """
+        with self.lifecycle_lock():
+            for index in range(self.replicas):
+                if not self.replica_running(index):
+                    self.start_replica(index)
+
+    def start_replica(self, index: int) -> None:
+        """Start the container of one replica.
+
+        Reuses an existing stopped container of the replica (`docker start`)
+        instead of failing on the name conflict. If companions are in use,
+        the replica joins their private network, so it can reach them like
+        the replicas that were running when they started.
+
+        Args:
+            index: Replica index (0 = the 'kroki' container)
+
+        Raises:
+            KrokiManagerError: If Docker is not available or start fails
+        """
+        self._run_replica(index)
+        self._join_companion_network(self.replica_name(index))
+
+    def _run_replica(self, index: int) -> None:
+        """Create and start (or restart) the container of one replica."""
+        name = self.replica_name(index)
+        port = self.port + index
+        if self.docker_api is not None:
+            try:
+                self.docker_api.create_container(
+                    name, self.DOCKER_IMAGE, {self.DEFAULT_PORT: port}, env=self._gateway_env()
+                )
+            except DockerApiError as e:
+                if e.status_code == 409:
+                    # A stopped container of this replica exists - reuse it
+                    self._start_existing(name)
+                    return
+                if e.status_code not in (None, 404):
+                    raise KrokiManagerError(f"Failed to start Kroki container: {e}") from e
+                # Image not pulled yet (`docker run` pulls it) or daemon not reachable
+                self._api_failed(e)
+            else:
+                self._start_existing(name)
+                return
+
         try:
             # Run docker container in detached mode
             subprocess.run(
                 [
                     "docker", "run",
                     "-d",  # Detached mode
-                    "--name", self.CONTAINER_NAME,
-                    f"-p{self.port}:{self.DEFAULT_PORT}",  # Port mapping
+                    "--name", name,
+                    f"-p{port}:{self.DEFAULT_PORT}",  # Port mapping
+                    *[
+                        arg for key, value in self._gateway_env().items()
+                        for arg in ("-e", f"{key}={value}")
+                    ],
                     self.DOCKER_IMAGE
                 ],
                 capture_output=True,
@@ -69,24 +280,106 @@ class KrokiManager:
                 "Docker is not installed or not available in PATH. "
                 "Please install Docker to use local Kroki deployment."
             )
+        except subprocess.CalledProcessError as e:
+            if "conflict" not in (e.stderr or "").lower():
+                raise KrokiManagerError(
+                    f"Failed to start Kroki container: {e.stderr}"
+                ) from e
+            # The name is taken by a stopped container of this replica - reuse it
+            self._start_existing(name)
+
+    def _join_companion_network(self, gateway: str) -> None:
+        """Attach a gateway to the companions' network if it exists (best effort)."""
+        if self.docker_api is not None:
+            try:
+                self.docker_api.connect_network(self.NETWORK_NAME, gateway)
+                return
+            except DockerApiError as e:
+                if e.status_code is not None:
+                    # 404: no companion has been started yet
+                    return
+                self._api_failed(e)
+
+        try:
+            # Fails harmlessly if the network does not exist yet
+            subprocess.run(
+                ["docker", "network", "connect", self.NETWORK_NAME, gateway],
+                capture_output=True,
+                text=True,
+                check=False
+            )
+        except FileNotFoundError:
+            pass
+
+    def _start_existing(self, name: str) -> None:
+        """Start an existing (created or stopped) container, e.g. `docker start`."""
+        if self.docker_api is not None:
+            try:
+                self.docker_api.start_container(name)
+                return
+            except DockerApiError as e:
+                if e.status_code is not None:
+                    raise KrokiManagerError(f"Failed to start Kroki container: {e}") from e
+                self._api_failed(e)
+
+        try:
+            subprocess.run(
+                ["docker", "start", name],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except FileNotFoundError:
+            raise KrokiManagerError(
+                "Docker is not installed or not available in PATH."
+            )
         except subprocess.CalledProcessError as e:
             raise KrokiManagerError(
                 f"Failed to start Kroki container: {e.stderr}"
             ) from e
 
-    def stop(self) -> None:
-        """Stop and remove Kroki Docker container.
+    def stop(self, all_replicas: bool = False) -> None:
+        """Stop and remove Kroki Docker container(s).
         
-        Stops the running container and removes it to free resources.
-        Gracefully handles the case where the container doesn't exist.
+        Stops the running containers and removes them to free resources.
+        Gracefully handles the case where a container doesn't exist.
+
+        Args:
+            all_replicas: Also stop replica containers beyond the configured
+                number (e.g., from an earlier `kroki start --replicas N`)
         
         Raises:
             KrokiManagerError: If Docker is not installed
         """
+        with self.lifecycle_lock():
+            indices = set(range(self.replicas))
+            if all_replicas:
+                indices.update(self.existing_replicas())
+            for index in sorted(indices):
+                self.stop_replica(index)
+
+    def stop_replica(self, index: int) -> None:
+        """Stop and remove the container of one replica.
+
+        Args:
+            index: Replica index (0 = the 'kroki' container)
+
+        Raises:
+            KrokiManagerError: If Docker is not installed
+        """
+        name = self.replica_name(index)
+        if self.docker_api is not None:
+            try:
+                self.docker_api.stop_container(name)
+                self.docker_api.remove_container(name)
+                return
+            except DockerApiError as e:
+                self._api_failed(e)
+
         try:
             # Stop the container
             subprocess.run(
-                ["docker", "stop", self.CONTAINER_NAME],
+                ["docker", "stop", name],
                 capture_output=True,
                 text=True,
                 check=False  # Don't fail if already stopped
@@ -94,7 +387,7 @@ class KrokiManager:
             
             # Remove the container
             subprocess.run(
-                ["docker", "rm", self.CONTAINER_NAME],
+                ["docker", "rm", name],
                 capture_output=True,
                 text=True,
                 check=False  # Don't fail if already removed
@@ -111,29 +404,435 @@ class KrokiManager:
         Returns:
             True if container is running, False otherwise
         """
+        return self.replica_running(0)
+
+    def replica_running(self, index: int) -> bool:
+        """Check if the container of one replica is currently running.
+
+        Args:
+            index: Replica index (0 = the 'kroki' container)
+
+        Returns:
+            True if container is running, False otherwise
+        """
+        return self._container_running(self.replica_name(index))
+
+    def is_starting(self, grace: float | None = None) -> bool:
+        """Check whether the Kroki container is still being started.
+
+        A running container that does not answer /health yet is only worth
+        waiting for while a start is in progress: another process holds the
+        lifecycle lock, or the container started less than `grace` seconds
+        ago (JVM still booting). One that has been unhealthy for longer is
+        most likely hung.
+
+        Args:
+            grace: Seconds after the container start that count as booting
+                (default: STARTUP_TIMEOUT)
+
+        Returns:
+            True if a start is in progress
+        """
+        if self._lock.is_locked():
+            return True
+        started_at = self._container_started_at(self.replica_name(0))
+        if started_at is None:
+            return False
+        return time.time() - started_at < (grace if grace is not None else self.STARTUP_TIMEOUT)
+
+    def _container_started_at(self, name: str) -> float | None:
+        """Unix time a container was last started, or None if unknown."""
+        if self.docker_api is not None:
+            try:
+                info = self.docker_api.inspect_container(name)
+                started_at = info.get("State", {}).get("StartedAt") if info else None
+                return _parse_timestamp(started_at) if started_at else None
+            except DockerApiError as e:
+                self._api_failed(e)
+
         try:
             result = subprocess.run(
-                ["docker", "ps", "--filter", f"name={self.CONTAINER_NAME}", "--format", "{{.Names}}"],
+                ["docker", "inspect", "--format", "{{.State.StartedAt}}", name],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            return _parse_timestamp(result.stdout.strip())
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            return None
+
+    def _container_running(self, name: str) -> bool:
+        """Check if a container is currently running."""
+        if self.docker_api is not None:
+            try:
+                info = self.docker_api.inspect_container(name)
+                return bool(info and info.get("State", {}).get("Running"))
+            except DockerApiError as e:
+                self._api_failed(e)
+
+        try:
+            result = subprocess.run(
+                ["docker", "ps", "--filter", f"name=^{name}$", "--format", "{{.Names}}"],
                 capture_output=True,
                 text=True,
                 check=True
             )
             
             # Check if container name appears in output
-            return self.CONTAINER_NAME in result.stdout
+            return name in result.stdout.split()
             
         except (FileNotFoundError, subprocess.CalledProcessError):
             return False
 
+    def existing_replicas(self) -> list[int]:
+        """Find replica containers that exist (running or stopped).
+
+        Returns:
+            Sorted replica indices, e.g. [0, 1, 2] for kroki, kroki-2, kroki-3
+        """
+        if self.docker_api is not None:
+            try:
+                names = [
+                    name.lstrip("/")
+                    for container in self.docker_api.list_containers(f"^{self.CONTAINER_NAME}")
+                    for name in container.get("Names", [])
+                ]
+                return self._replica_indices(names)
+            except DockerApiError as e:
+                self._api_failed(e)
+
+        try:
+            result = subprocess.run(
+                [
+                    "docker", "ps", "-a",
+                    "--filter", f"name=^{self.CONTAINER_NAME}",
+                    "--format", "{{.Names}}"
+                ],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            return []
+        return self._replica_indices(result.stdout.split())
+
+    def _replica_indices(self, names: list[str]) -> list[int]:
+        """Map container names to replica indices, ignoring unrelated containers."""
+        pattern = re.compile(rf"^{re.escape(self.CONTAINER_NAME)}(?:-(\d+))?$")
+        indices = set()
+        for name in names:
+            match = pattern.match(name)
+            if match and match.group(1) != "1":
+                indices.add(int(match.group(1)) - 1 if match.group(1) else 0)
+        return sorted(indices)
+
+    def replica_status(self) -> list[dict[str, Any]]:
+        """Get the status of each replica.
+
+        Covers the configured replicas and any other existing replica
+        containers.
+
+        Returns:
+            One dict per replica with index, name, url, running and healthy
+        """
+        indices = sorted(set(range(self.replicas)) | set(self.existing_replicas()))
+        statuses = []
+        for index in indices:
+            running = self.replica_running(index)
+            url = self.replica_url(index)
+            statuses.append({
+                "index": index,
+                "name": self.replica_name(index),
+                "url": url,
+                "running": running,
+                "healthy": running and self._health_check(url),
+            })
+        return statuses
+
+    def rolling_restart(self, timeout: float = STARTUP_TIMEOUT) -> dict[str, float]:
+        """Restart the existing replicas one at a time.
+
+        Each replica is recreated and must become healthy before the next
+        one is restarted, so the remaining replicas keep serving renders.
+
+        Args:
+            timeout: Maximum seconds to wait for each restarted replica
+
+        Returns:
+            Seconds until each restarted replica was ready, by container name
+
+        Raises:
+            KrokiManagerError: If a replica fails to start or does not become
+                healthy (the remaining replicas are left untouched)
+        """
+        ready_after = {}
+        for index in self.existing_replicas() or list(range(self.replicas)):
+            name = self.replica_name(index)
+            with self.lifecycle_lock():
+                self.stop_replica(index)
+                self.start_replica(index)
+            seconds = self._wait_for(self.replica_url(index), timeout)
+            if seconds is None:
+                raise KrokiManagerError(
+                    f"Kroki replica '{name}' not healthy after {timeout:.0f}s - "
+                    f"rolling restart stopped"
+                )
+            ready_after[name] = seconds
+        return ready_after
+
+    def ensure_companion(
+        self,
+        diagram_type: str,
+        timeout: float = COMPANION_STARTUP_TIMEOUT,
+        idle_timeout: float = COMPANION_IDLE_TIMEOUT,
+        last_used: Mapping[str, float] | None = None
+    ) -> float | None:
+        """Make sure the companion a diagram type needs is running.
+
+        Starts the companion on first use of its diagram type, attaches
+        the running gateway replicas to the private network and waits
+        until the gateway can render the type. Starting a companion also
+        stops the other companions that have been idle for idle_timeout
+        according to last_used.
+
+        Args:
+            diagram_type: Type of diagram about to be rendered
+            timeout: Maximum seconds to wait for a started companion
+            idle_timeout: Seconds without use after which other companions
+                are stopped
+            last_used: Last use (Unix timestamp) by diagram type, as recorded
+                in the heartbeat file shared by all diag-agent processes;
+                None skips stopping idle companions
+
+        Returns:
+            Seconds until the companion was ready (0.0 if it was already
+            running or the type needs no companion), or None if it did
+            not become ready within the timeout
+
+        Raises:
+            KrokiManagerError: If Docker is not available or start fails
+        """
+        companion = self.companion_for(diagram_type)
+        if companion is None:
+            return 0.0
+        name = self.companion_name(companion)
+        if self._container_running(name):
+            return 0.0
+
+        started = time.monotonic()
+        with self.lifecycle_lock():
+            # Another process may have started it meanwhile
+            if not self._container_running(name):
+                self._start_companion(companion)
+        if last_used is not None:
+            self.stop_idle_companions(last_used, idle_timeout, keep=companion)
+        ready_after = self._wait_for_render(diagram_type, timeout)
+        return None if ready_after is None else time.monotonic() - started
+
+    def _start_companion(self, companion: str) -> None:
+        """Start a companion container and wire it to the gateway replicas."""
+        name = self.companion_name(companion)
+        gateways = [self.replica_name(index) for index in self.existing_replicas()]
+        if self.docker_api is not None:
+            try:
+                self.docker_api.create_network(self.NETWORK_NAME)
+                try:
+                    self.docker_api.create_container(
+                        name, COMPANION_IMAGES[companion], {}, network=self.NETWORK_NAME
+                    )
+                except DockerApiError as e:
+                    # 409: a stopped container of the companion is left over - reuse it
+                    if e.status_code != 409:
+                        raise
+                self.docker_api.start_container(name)
+                for gateway in gateways:
+                    self.docker_api.connect_network(self.NETWORK_NAME, gateway)
+                return
+            except DockerApiError as e:
+                if e.status_code not in (None, 404):
+                    raise KrokiManagerError(f"Failed to start Kroki companion '{name}': {e}") from e
+                # Image not pulled yet (`docker run` pulls it) or daemon not reachable
+                self._api_failed(e)
+
+        try:
+            # Fails with "already exists" once the network is there
+            subprocess.run(
+                ["docker", "network", "create", self.NETWORK_NAME],
+                capture_output=True,
+                text=True,
+                check=False
+            )
+            subprocess.run(
+                [
+                    "docker", "run",
+                    "-d",
+                    "--name", name,
+                    "--network", self.NETWORK_NAME,
+                    COMPANION_IMAGES[companion]
+                ],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            for gateway in gateways:
+                # Fails harmlessly if the gateway is already attached
+                subprocess.run(
+                    ["docker", "network", "connect", self.NETWORK_NAME, gateway],
+                    capture_output=True,
+                    text=True,
+                    check=False
+                )
+        except FileNotFoundError:
+            raise KrokiManagerError(
+                "Docker is not installed or not available in PATH."
+            )
+        except subprocess.CalledProcessError as e:
+            if "conflict" not in (e.stderr or "").lower():
+                raise KrokiManagerError(
+                    f"Failed to start Kroki companion '{name}': {e.stderr}"
+                ) from e
+            # A stopped container of the companion is left over - reuse it
+            self._start_existing(name)
+
+    def stop_companion(self, companion: str) -> None:
+        """Stop and remove a companion container.
+
+        Args:
+            companion: Companion name (e.g., "mermaid")
+
+        Raises:
+            KrokiManagerError: If Docker is not installed
+        """
+        name = self.companion_name(companion)
+        with self.lifecycle_lock():
+            self._remove_container(name)
+
+    def _remove_container(self, name: str) -> None:
+        """Stop and remove a container (no-op if it does not exist)."""
+        if self.docker_api is not None:
+            try:
+                self.docker_api.stop_container(name)
+                self.docker_api.remove_container(name)
+                return
+            except DockerApiError as e:
+                self._api_failed(e)
+
+        try:
+            subprocess.run(["docker", "stop", name], capture_output=True, text=True, check=False)
+            subprocess.run(["docker", "rm", name], capture_output=True, text=True, check=False)
+        except FileNotFoundError:
+            raise KrokiManagerError(
+                "Docker is not installed or not available in PATH."
+            )
+
+    def stop_companions(self) -> None:
+        """Stop and remove all companion containers.
+
+        Raises:
+            KrokiManagerError: If Docker is not installed
+        """
+        for companion in COMPANION_IMAGES:
+            self.stop_companion(companion)
+
+    def running_companions(self) -> list[str]:
+        """Get the companions whose container is running.
+
+        Returns:
+            Companion names, e.g. ["mermaid"]
+        """
+        return [
+            companion for companion in COMPANION_IMAGES
+            if self._container_running(self.companion_name(companion))
+        ]
+
+    def stop_idle_companions(
+        self,
+        last_used: Mapping[str, float],
+        idle_timeout: float = COMPANION_IDLE_TIMEOUT,
+        keep: str | None = None,
+        now: float | None = None
+    ) -> list[str]:
+        """Stop companions that have not been used for idle_timeout seconds.
+
+        A running companion without a recorded use is kept;
+        `diag-agent kroki keepalive` stops it once it has been idle there.
+
+        Args:
+            last_used: Last use (Unix timestamp) by diagram type
+            idle_timeout: Seconds without use after which a companion is stopped
+            keep: Companion to keep regardless (e.g., the one just started)
+            now: Current time (Unix timestamp), defaults to time.time()
+
+        Returns:
+            Names of the stopped companions
+        """
+        now = time.time() if now is None else now
+        uses: dict[str, float] = {}
+        for diagram_type, used_at in last_used.items():
+            companion = self.companion_for(diagram_type)
+            if companion is not None:
+                uses[companion] = max(uses.get(companion, used_at), used_at)
+        idle = [
+            companion for companion in self.running_companions()
+            if companion != keep and companion in uses and now - uses[companion] >= idle_timeout
+        ]
+        for companion in idle:
+            self.stop_companion(companion)
+        return idle
+
+    def stats(self, index: int = 0) -> dict[str, float] | None:
+        """Get CPU and memory usage of a Kroki container.
+
+        Args:
+            index: Replica index (0 = the 'kroki' container)
+
+        Returns:
+            Dict with cpu_percent, memory_usage and memory_limit, network_rx
+            and network_tx (bytes since start), or None if the container is
+            not running or Docker is unavailable
+        """
+        name = self.replica_name(index)
+        if self.docker_api is not None:
+            try:
+                return self.docker_api.stats(name)
+            except DockerApiError as e:
+                self._api_failed(e)
+
+        try:
+            result = subprocess.run(
+                ["docker", "stats", "--no-stream", "--format", "{{json .}}", name],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            sample = json.loads(result.stdout.strip().splitlines()[0])
+        except (FileNotFoundError, subprocess.CalledProcessError, ValueError, IndexError):
+            return None
+
+        # MemUsage looks like "151.2MiB / 7.653GiB", NetIO like "1.2kB / 3.4MB"
+        usage, _, limit = sample.get("MemUsage", "").partition("/")
+        received, _, sent = sample.get("NetIO", "").partition("/")
+        return {
+            "cpu_percent": float(sample.get("CPUPerc", "0").rstrip("%") or 0),
+            "memory_usage": _parse_size(usage),
+            "memory_limit": _parse_size(limit),
+            "network_rx": _parse_size(received),
+            "network_tx": _parse_size(sent),
+        }
+
     def health_check(self) -> bool:
         """Check if Kroki service is responding to HTTP requests.
         
         Returns:
             True if Kroki responds successfully, False otherwise
         """
+        return self._health_check(self.kroki_url)
+
+    def _health_check(self, url: str) -> bool:
+        """Check if the Kroki service at url responds to HTTP requests."""
         try:
             response = httpx.get(
-                self.kroki_url,
+                url,
                 timeout=self.HEALTH_CHECK_TIMEOUT
             )
             return response.status_code == 200
@@ -141,3 +840,122 @@ class KrokiManager:
         except Exception:
             # Any connection error, timeout, etc. = not healthy
             return False
+
+    def wait_until_healthy(self, timeout: float = STARTUP_TIMEOUT) -> float | None:
+        """Wait until Kroki answers its /health endpoint.
+
+        Kroki's JVM needs several seconds to boot after `docker run`, so a
+        single health check right after start() fails. This polls /health
+        of each replica with exponential backoff over one keep-alive
+        connection until it answers 200 or the timeout expires.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Seconds until all replicas were ready, or None if one did not
+            become healthy within the timeout
+        """
+        started = time.monotonic()
+        with httpx.Client() as http:
+            for url in self.endpoints:
+                remaining = timeout - (time.monotonic() - started)
+                if self._wait_for(url, remaining, http) is None:
+                    return None
+        return time.monotonic() - started
+
+    def warm_up(
+        self,
+        diagram_types: Sequence[str] = DEFAULT_WARMUP_TYPES,
+        output_formats: Sequence[str] = DEFAULT_WARMUP_FORMATS,
+        rounds: int = DEFAULT_WARMUP_ROUNDS,
+        urls: Sequence[str] | None = None
+    ) -> dict[str, list[WarmupTiming]]:
+        """Warm up the JVM of each replica after start.
+
+        The first renders of a fresh container are several times slower
+        than steady state (JIT compilation, lazy class loading per diagram
+        library). Rendering a small example of each type and format a few
+        times moves that cost out of the first real renders. Replicas are
+        warmed up in parallel.
+
+        Args:
+            diagram_types: Diagram types to warm up
+            output_formats: Output formats to render for each type
+            rounds: Renders per (diagram_type, output_format) pair
+            urls: Replica URLs to warm up (default: all configured replicas)
+
+        Returns:
+            Warm-up timings by replica URL
+        """
+        endpoints = list(urls or self.endpoints)
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as pool:
+            results = pool.map(
+                lambda url: run_warmup(url, diagram_types, output_formats, rounds), endpoints
+            )
+            return dict(zip(endpoints, results))
+
+    def _wait_for(
+        self,
+        url: str,
+        timeout: float,
+        http: httpx.Client | None = None
+    ) -> float | None:
+        """Poll url/health until it answers 200; seconds until ready or None on timeout."""
+        if http is None:
+            with httpx.Client() as http:
+                return self._wait_for(url, timeout, http)
+
+        return self._poll(
+            lambda request_timeout: (
+                http.get(f"{url}/health", timeout=request_timeout).status_code == 200
+            ),
+            timeout
+        )
+
+    def _wait_for_render(self, diagram_type: str, timeout: float) -> float | None:
+        """Poll the gateway with a small render until its companion answers.
+
+        The companion port is not published, so readiness is checked through
+        the gateway: it answers 5xx while the companion is unreachable, and
+        the companion's result (even a 4xx) once it is up.
+        """
+        source = WARMUP_SOURCES.get(diagram_type.lower(), "")
+        with httpx.Client() as http:
+            return self._poll(
+                lambda request_timeout: http.post(
+                    f"{self.kroki_url}/{diagram_type.lower()}/svg",
+                    content=source.encode("utf-8"),
+                    headers={"Content-Type": "text/plain"},
+                    timeout=request_timeout
+                ).status_code < 500,
+                timeout
+            )
+
+    def _poll(self, probe: Callable[[float], bool], timeout: float) -> float | None:
+        """Call probe(request_timeout) with exponential backoff until it returns True.
+
+        Args:
+            probe: Readiness check; connection errors count as not ready
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Seconds until ready, or None on timeout
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        delay = self.POLL_INITIAL_DELAY
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if probe(max(0.1, min(self.HEALTH_CHECK_TIMEOUT, remaining))):
+                    return time.monotonic() - started
+            except httpx.HTTPError:
+                # Connection refused/reset while the container boots
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.POLL_MAX_DELAY)
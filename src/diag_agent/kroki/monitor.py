@@ -0,0 +1,162 @@
+"""Live status sampling of local Kroki containers for capacity planning."""
+
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from diag_agent.kroki.manager import KrokiManager
+from diag_agent.kroki.retry import RetryPolicy
+from diag_agent.kroki.warmup import DEFAULT_WARMUP_TYPES, run_warmup
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count like `docker stats` (e.g., "151.2MiB").
+
+    Args:
+        size: Number of bytes
+
+    Returns:
+        Size with a binary unit
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+class StatusMonitor:
+    """Samples resource usage, synthetic render latency and throughput per replica.
+
+    Each sample combines:
+    - CPU and memory of each running container (Docker stats)
+    - Latency of one small render per enabled diagram type (uncached,
+      without retries and with a short timeout, so a struggling replica
+      does not stall the sample)
+    - Throughput: network traffic rates of each container since the
+      previous sample (Kroki itself exposes no request counters)
+    """
+
+    PROBE_TIMEOUT = 10.0  # seconds per synthetic render
+
+    def __init__(
+        self,
+        manager: KrokiManager,
+        diagram_types: Sequence[str] = DEFAULT_WARMUP_TYPES,
+        output_format: str = "svg",
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Initialize status monitor.
+
+        Args:
+            manager: Manager of the local Kroki container(s)
+            diagram_types: Diagram types to measure render latency for
+            output_format: Output format of the synthetic renders
+            clock: Monotonic time source (seconds), e.g. for testing
+        """
+        self.manager = manager
+        self.diagram_types = list(diagram_types)
+        self.output_format = output_format
+        self.clock = clock
+        # Previous counters for rates: (time, network_rx, network_tx) by replica
+        self._network: dict[str, tuple[float, float, float]] = {}
+
+    def sample(self) -> dict[str, Any]:
+        """Take one sample of all replicas.
+
+        Returns:
+            Dict with timestamp (Unix time) and replicas: one dict per replica
+            with name, url, running, healthy, the Docker stats
+            (cpu_percent, memory_usage, memory_limit, network_rx, network_tx),
+            network_rx_rate/network_tx_rate (bytes/s), render_latency (seconds
+            by diagram type) and render_errors (message by diagram type).
+            Rates are None until a second sample.
+        """
+        replicas: list[dict[str, Any]] = []
+        for status in self.manager.replica_status():
+            entry: dict[str, Any] = dict(status)
+            entry.pop("index", None)
+            now = self.clock()
+            stats = self.manager.stats(status["index"]) if status["running"] else None
+            entry.update(stats or {})
+            entry["network_rx_rate"], entry["network_tx_rate"] = self._network_rates(
+                status["name"], now, stats
+            )
+            entry["render_latency"], entry["render_errors"] = (
+                self._render_latency(status["url"]) if status["healthy"] else ({}, {})
+            )
+            replicas.append(entry)
+        return {"timestamp": time.time(), "replicas": replicas}
+
+    def _network_rates(
+        self,
+        name: str,
+        now: float,
+        stats: dict[str, float] | None
+    ) -> tuple[float | None, float | None]:
+        """Bytes/s received and sent by a container since the previous sample."""
+        if not stats or "network_rx" not in stats:
+            self._network.pop(name, None)
+            return None, None
+        previous = self._network.get(name)
+        self._network[name] = (now, stats["network_rx"], stats["network_tx"])
+        if previous is None or now <= previous[0]:
+            return None, None
+        elapsed = now - previous[0]
+        return (
+            max(0.0, (stats["network_rx"] - previous[1]) / elapsed),
+            max(0.0, (stats["network_tx"] - previous[2]) / elapsed),
+        )
+
+    def _render_latency(self, url: str) -> tuple[dict[str, float], dict[str, str]]:
+        """Seconds of one uncached render per diagram type, and errors by type."""
+        latency, errors = {}, {}
+        for timing in run_warmup(
+            url,
+            self.diagram_types,
+            [self.output_format],
+            rounds=1,
+            retry_policy=RetryPolicy(max_retries=0),
+            timeout=self.PROBE_TIMEOUT
+        ):
+            if timing.first is not None:
+                latency[timing.diagram_type] = round(timing.first, 4)
+            else:
+                errors[timing.diagram_type] = timing.error or "failed"
+        return latency, errors
+
+
+def format_sample(sample: dict[str, Any]) -> list[str]:
+    """Format a StatusMonitor sample for the terminal.
+
+    Args:
+        sample: Result of StatusMonitor.sample()
+
+    Returns:
+        Output lines
+    """
+    lines = [f"Kroki Status ({time.strftime('%H:%M:%S', time.localtime(sample['timestamp']))}):"]
+    for replica in sample["replicas"]:
+        if not replica["running"]:
+            lines.append(f"  {replica['name']}: Stopped")
+            continue
+        health = "Healthy ✓" if replica["healthy"] else "Unhealthy ✗"
+        lines.append(f"  {replica['name']}: Running ✓, {health} - {replica['url']}")
+        if "cpu_percent" in replica:
+            lines.append(
+                f"    CPU {replica['cpu_percent']:.1f}%, Memory "
+                f"{format_bytes(replica['memory_usage'])} / {format_bytes(replica['memory_limit'])}"
+            )
+        if replica.get("network_rx_rate") is not None:
+            lines.append(
+                f"    Throughput: rx {format_bytes(replica['network_rx_rate'])}/s, "
+                f"tx {format_bytes(replica['network_tx_rate'])}/s"
+            )
+        renders = [
+            f"{diagram_type} {seconds:.2f}s"
+            for diagram_type, seconds in replica["render_latency"].items()
+        ]
+        renders += [f"{diagram_type} failed" for diagram_type in replica["render_errors"]]
+        if renders:
+            lines.append(f"    Render latency: {', '.join(renders)}")
+    return lines
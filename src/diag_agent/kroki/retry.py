@@ -0,0 +1,92 @@
+"""Retry policy and retry budget for transient Kroki failures."""
+
+import random
+import threading
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    The n-th retry waits a random time between 0 and
+    min(max_delay, base_delay * 2 ** (n - 1)) seconds, so callers that
+    failed together do not hammer a recovering Kroki server in lockstep.
+    """
+
+    DEFAULT_MAX_RETRIES = 2
+    DEFAULT_BASE_DELAY = 0.5  # seconds
+    DEFAULT_MAX_DELAY = 8.0  # seconds
+
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY
+    ) -> None:
+        """Initialize retry policy.
+
+        Args:
+            max_retries: Retries per request after the initial attempt
+            base_delay: Upper bound of the first backoff in seconds
+            max_delay: Cap for the backoff in seconds
+        """
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry: int) -> float:
+        """Get the backoff before a retry.
+
+        Args:
+            retry: Number of the upcoming retry (1 for the first retry)
+
+        Returns:
+            Seconds to wait before sending the retry
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+        return random.uniform(0, ceiling)
+
+
+class RetryBudget:
+    """Caps the total number of retries spent during one run.
+
+    Per-request retries alone multiply latency when Kroki is down for
+    good: every render of every iteration would back off and retry. Each
+    run creates its own budget and passes it to all of its renders, so
+    once it is spent failures surface immediately - without touching the
+    budget of other runs sharing the same client.
+    """
+
+    DEFAULT_MAX_RETRIES = 10
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES) -> None:
+        """Initialize retry budget.
+
+        Args:
+            max_retries: Total retries allowed until the next reset()
+        """
+        self.max_retries = max(0, max_retries)
+        self._used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        """Number of retries left in the budget."""
+        with self._lock:
+            return self.max_retries - self._used
+
+    def try_acquire(self) -> bool:
+        """Take one retry from the budget.
+
+        Returns:
+            True if a retry may be sent, False if the budget is spent
+        """
+        with self._lock:
+            if self._used >= self.max_retries:
+                return False
+            self._used += 1
+            return True
+
+    def reset(self) -> None:
+        """Refill the budget (e.g., at the start of a new run)."""
+        with self._lock:
+            self._used = 0
@@ -0,0 +1,124 @@
+"""Single-flight coalescing of identical in-flight requests.
+
+When several callers ask for the same key at the same time, only the first
+one (the leader) executes the work; the others wait for it and share its
+result or error. Once the call completes, the next request for the key
+starts a new call.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar, cast
+
+
+T = TypeVar("T")
+
+
+class _Call:
+    """State of one in-flight call shared by its leader and waiters."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Thread-based single-flight group.
+
+    Used by KrokiClient so concurrent identical renders (e.g., from MCP tool
+    calls or batch jobs running in parallel) cause a single Kroki request.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.coalesced = 0  # calls that were served by another caller's request
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Execute fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the work (e.g., content hash of a render request)
+            fn: Work to execute if no identical call is in flight
+
+        Returns:
+            Result of fn (shared by all concurrent callers)
+
+        Raises:
+            Exception: The error raised by fn, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return cast(T, call.result)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        else:
+            call.result = result
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """asyncio-based single-flight group for AsyncKrokiClient."""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0  # calls that were served by another caller's request
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the work (e.g., content hash of a render request)
+            fn: Coroutine function to await if no identical call is in flight
+
+        Returns:
+            Result of fn (shared by all concurrent callers)
+
+        Raises:
+            Exception: The error raised by fn, re-raised in every waiting caller
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # Shield so a cancelled waiter does not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so the loop does not warn when nobody else waited
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -0,0 +1,113 @@
+"""Per-diagram-type timeouts for Kroki renders."""
+
+import math
+import threading
+from collections import deque
+from collections.abc import Mapping
+
+
+class TimeoutPolicy:
+    """Chooses the request timeout for a (diagram_type, output_format) render.
+
+    Lookup order:
+    1. Explicit override for "type/format" (e.g., "bpmn/png")
+    2. Explicit override for "type" (all formats, e.g., "mermaid")
+    3. Adaptive timeout (if enabled and enough samples were recorded):
+       `multiplier` x p99 latency of the pair, clamped to [floor, ceiling]
+    4. The default timeout
+
+    A broken diagram that makes the renderer hang then fails after a few
+    multiples of the usual latency for its type instead of the global
+    default, while legitimately slow types keep a longer timeout.
+    """
+
+    DEFAULT_TIMEOUT = 30.0  # seconds
+    DEFAULT_MULTIPLIER = 3.0
+    DEFAULT_FLOOR = 2.0  # seconds
+    DEFAULT_CEILING = 120.0  # seconds
+    MIN_SAMPLES = 10  # samples per pair before adaptive timeouts apply
+    WINDOW = 200  # most recent samples kept per pair
+
+    def __init__(
+        self,
+        default: float = DEFAULT_TIMEOUT,
+        overrides: Mapping[str, float] | None = None,
+        adaptive: bool = False,
+        multiplier: float = DEFAULT_MULTIPLIER,
+        floor: float = DEFAULT_FLOOR,
+        ceiling: float = DEFAULT_CEILING
+    ) -> None:
+        """Initialize timeout policy.
+
+        Args:
+            default: Timeout in seconds when nothing more specific applies
+            overrides: Timeouts by "type" or "type/format" key
+            adaptive: Derive timeouts from observed latency percentiles
+            multiplier: Factor applied to the p99 latency
+            floor: Lowest adaptive timeout in seconds
+            ceiling: Highest adaptive timeout in seconds
+        """
+        self.default = default
+        self.overrides = {key.lower(): value for key, value in (overrides or {}).items()}
+        self.adaptive = adaptive
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self._samples: dict[tuple[str, str], deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, diagram_type: str, output_format: str) -> float:
+        """Get the timeout for a render.
+
+        Args:
+            diagram_type: Type of diagram (plantuml, mermaid, bpmn, ...)
+            output_format: Output format (png, svg, pdf, jpeg)
+
+        Returns:
+            Timeout in seconds
+        """
+        diagram_type = diagram_type.lower()
+        output_format = output_format.lower()
+        for key in (f"{diagram_type}/{output_format}", diagram_type):
+            if key in self.overrides:
+                return self.overrides[key]
+        if self.adaptive:
+            p99 = self.percentile(diagram_type, output_format, 0.99)
+            if p99 is not None:
+                return min(self.ceiling, max(self.floor, p99 * self.multiplier))
+        return self.default
+
+    def record(self, diagram_type: str, output_format: str, latency: float) -> None:
+        """Record the latency of a successful render.
+
+        Args:
+            diagram_type: Type of diagram
+            output_format: Output format
+            latency: Seconds the render took
+        """
+        key = (diagram_type.lower(), output_format.lower())
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = deque(maxlen=self.WINDOW)
+                self._samples[key] = samples
+            samples.append(latency)
+
+    def percentile(self, diagram_type: str, output_format: str, quantile: float) -> float | None:
+        """Get a latency percentile for a (diagram_type, output_format) pair.
+
+        Args:
+            diagram_type: Type of diagram
+            output_format: Output format
+            quantile: Quantile between 0 and 1 (e.g., 0.99)
+
+        Returns:
+            Latency in seconds (nearest-rank), or None with fewer than
+            MIN_SAMPLES samples
+        """
+        with self._lock:
+            samples = sorted(self._samples.get((diagram_type.lower(), output_format.lower()), ()))
+        if len(samples) < self.MIN_SAMPLES:
+            return None
+        rank = max(1, math.ceil(quantile * len(samples)))
+        return samples[rank - 1]
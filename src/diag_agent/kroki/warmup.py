@@ -0,0 +1,144 @@
+"""JVM warm-up for freshly started Kroki containers."""
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import cast
+
+import httpx
+
+from diag_agent.kroki.client import KrokiClient, KrokiRenderError, OutputFormat
+from diag_agent.kroki.retry import RetryPolicy
+from diag_agent.kroki.timeouts import TimeoutPolicy
+
+
+# Small diagrams that load each renderer's classes and exercise its hot paths
+WARMUP_SOURCES = {
+    "plantuml": "@startuml\nAlice -> Bob: Request\nBob --> Alice: Response\n@enduml",
+    "c4plantuml": (
+        "@startuml\n!include <C4/C4_Context>\n"
+        "Person(user, \"User\")\nSystem(system, \"System\")\n"
+        "Rel(user, system, \"Uses\")\n@enduml"
+    ),
+    "mermaid": "graph TD\n  A[Start] --> B{Check}\n  B -->|yes| C[Done]\n  B -->|no| A",
+    "graphviz": "digraph G { a -> b; b -> c; a -> c; }",
+    "bpmn": (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL" '
+        'xmlns:bpmndi="http://www.omg.org/spec/BPMN/20100524/DI" '
+        'xmlns:dc="http://www.omg.org/spec/DD/20100524/DC" id="warmup">\n'
+        '  <bpmn:process id="process">\n'
+        '    <bpmn:startEvent id="start" />\n'
+        '  </bpmn:process>\n'
+        '  <bpmndi:BPMNDiagram id="diagram">\n'
+        '    <bpmndi:BPMNPlane id="plane" bpmnElement="process">\n'
+        '      <bpmndi:BPMNShape id="start_di" bpmnElement="start">\n'
+        '        <dc:Bounds x="100" y="100" width="36" height="36" />\n'
+        '      </bpmndi:BPMNShape>\n'
+        '    </bpmndi:BPMNPlane>\n'
+        '  </bpmndi:BPMNDiagram>\n'
+        '</bpmn:definitions>\n'
+    ),
+    "excalidraw": (
+        '{"type": "excalidraw", "version": 2, "elements": [{"type": "rectangle", "id": "box", '
+        '"x": 0, "y": 0, "width": 100, "height": 50, "strokeColor": "#000000", '
+        '"backgroundColor": "transparent", "seed": 1, "version": 1}], "appState": {}}'
+    ),
+    "diagramsnet": (
+        '<mxfile><diagram id="warmup" name="Page-1"><mxGraphModel><root>'
+        '<mxCell id="0"/><mxCell id="1" parent="0"/>'
+        '<mxCell id="2" value="Box" style="rounded=0;" vertex="1" parent="1">'
+        '<mxGeometry x="10" y="10" width="100" height="50" as="geometry"/></mxCell>'
+        '</root></mxGraphModel></diagram></mxfile>'
+    ),
+}
+
+DEFAULT_WARMUP_TYPES = ("plantuml", "c4plantuml", "mermaid", "bpmn")
+DEFAULT_WARMUP_FORMATS = ("svg", "png")
+DEFAULT_WARMUP_ROUNDS = 3
+
+
+@dataclass
+class WarmupTiming:
+    """Render timings of one (diagram_type, output_format) pair during warm-up."""
+
+    diagram_type: str
+    output_format: str
+    timings: list[float] = field(default_factory=list)  # seconds per round
+    error: str | None = None  # why the pair could not be warmed up
+
+    @property
+    def first(self) -> float | None:
+        """Seconds of the first (cold) render."""
+        return self.timings[0] if self.timings else None
+
+    @property
+    def last(self) -> float | None:
+        """Seconds of the last (warm) render."""
+        return self.timings[-1] if self.timings else None
+
+    def summary(self) -> str:
+        """Describe the pair's warm-up in one line.
+
+        Returns:
+            E.g., "plantuml/svg: 2.41s -> 0.08s (3 renders)" or
+            "mermaid/png: failed - <error>"
+        """
+        name = f"{self.diagram_type}/{self.output_format}"
+        if not self.timings:
+            return f"{name}: failed - {self.error}"
+        return f"{name}: {self.first:.2f}s -> {self.last:.2f}s ({len(self.timings)} renders)"
+
+
+def run_warmup(
+    kroki_url: str,
+    diagram_types: Sequence[str] = DEFAULT_WARMUP_TYPES,
+    output_formats: Sequence[str] = DEFAULT_WARMUP_FORMATS,
+    rounds: int = DEFAULT_WARMUP_ROUNDS,
+    retry_policy: RetryPolicy | None = None,
+    timeout: float | None = None,
+    transport: httpx.BaseTransport | None = None
+) -> list[WarmupTiming]:
+    """Render a small example of each diagram type and format several times.
+
+    Uses a dedicated client without render/HTTP caches, so every round
+    reaches the Kroki JVM. A pair that fails (e.g., unsupported format or
+    missing companion container) is not retried in later rounds.
+
+    Args:
+        kroki_url: Base URL of the Kroki instance to warm up
+        diagram_types: Diagram types to warm up (types without a bundled
+            example are reported as errors)
+        output_formats: Output formats to render for each type
+        rounds: Renders per (diagram_type, output_format) pair
+        retry_policy: Backoff for transient failures; defaults to RetryPolicy()
+        timeout: Seconds per render; defaults to KrokiClient.DEFAULT_TIMEOUT
+        transport: Optional custom httpx transport (e.g., for testing)
+
+    Returns:
+        One WarmupTiming per (diagram_type, output_format) pair
+    """
+    results = []
+    timeout_policy = TimeoutPolicy(default=timeout) if timeout is not None else None
+    with KrokiClient(
+        kroki_url, retry_policy=retry_policy, timeout_policy=timeout_policy, transport=transport
+    ) as client:
+        for diagram_type in diagram_types:
+            source = WARMUP_SOURCES.get(diagram_type)
+            for output_format in output_formats:
+                result = WarmupTiming(diagram_type, output_format)
+                results.append(result)
+                if source is None:
+                    result.error = "no warm-up example for this diagram type"
+                    continue
+                for _ in range(max(1, rounds)):
+                    started = time.monotonic()
+                    try:
+                        client.render_diagram(
+                            source, diagram_type, cast(OutputFormat, output_format)
+                        )
+                    except KrokiRenderError as e:
+                        result.error = e.details.message if e.details else str(e)
+                        break
+                    result.timings.append(time.monotonic() - started)
+    return results
@@ -4,23 +4,58 @@ Exposes diagram generation capabilities via Model Context Protocol (MCP)
 using FastMCP framework.
 """
 
-from typing import Dict, Any
+import threading
+from typing import Any
 from fastmcp import FastMCP
 
 from diag_agent.config.settings import Settings
 from diag_agent.agent.orchestrator import Orchestrator
+from diag_agent.kroki.client import KrokiClient
+from diag_agent.kroki.manager import KrokiManager
 
 
 # Initialize FastMCP server
 mcp = FastMCP("diag-agent")
 
+# Kroki client shared across tool calls so all requests reuse one connection pool.
+# Created by the first Orchestrator (which also determines the Kroki URL).
+_kroki_client: KrokiClient | None = None
+# Manager of the local Kroki container(s) behind it (None for remote Kroki)
+_kroki_manager: KrokiManager | None = None
+# Guards creation of the shared client by concurrent tool calls
+_kroki_lock = threading.Lock()
+
+
+def _create_orchestrator(settings: Settings) -> Orchestrator:
+    """Create an orchestrator that uses the server-wide Kroki client.
+
+    The first call determines the Kroki URL and publishes the client before
+    any diagram is generated; concurrent first calls wait for it instead of
+    each creating (and leaking) a client of their own.
+
+    Args:
+        settings: Settings of this tool call
+
+    Returns:
+        Orchestrator sharing the Kroki connection pool
+    """
+    global _kroki_client, _kroki_manager
+
+    with _kroki_lock:
+        if _kroki_client is None:
+            orchestrator = Orchestrator(settings)
+            _kroki_client = orchestrator.kroki_client
+            _kroki_manager = orchestrator.kroki_manager
+            return orchestrator
+    return Orchestrator(settings, kroki_client=_kroki_client, kroki_manager=_kroki_manager)
+
 
 def create_diagram(
     description: str,
     diagram_type: str = "plantuml",
     output_dir: str = "./diagrams",
     output_formats: str = "png,svg,source"
-) -> Dict[str, Any]:
+) -> dict[str, Any]:
     """Create a diagram from natural language description.
 
     Generates architecture diagrams autonomously using AI with syntax validation
@@ -46,19 +81,17 @@ def create_diagram(
     # Load settings
     settings = Settings()
 
-    # Create orchestrator
-    orchestrator = Orchestrator(settings)
+    # Create orchestrator, reusing the server-wide Kroki connection pool
+    orchestrator = _create_orchestrator(settings)
 
     # Execute diagram generation
-    result = orchestrator.execute(
+    return orchestrator.execute(
         description=description,
         diagram_type=diagram_type,
         output_dir=output_dir,
         output_formats=output_formats
     )
 
-    return result
-
 
 # Register tool with MCP server
 mcp.tool()(create_diagram)
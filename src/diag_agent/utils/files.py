@@ -0,0 +1,100 @@
+"""File system helpers shared across diag-agent modules."""
+
+import hashlib
+import os
+import stat
+import tempfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+
+CHUNK_SIZE = 64 * 1024  # bytes per read/write when streaming files
+
+
+def _current_umask() -> int:
+    """Read the process umask (it can only be read by setting it)."""
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Permissions open() gives a new file; read once, since os.umask() is process-wide state
+NEW_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def atomic_write_bytes(path: str | Path, data: bytes) -> None:
+    """Write bytes to a file atomically.
+
+    The data is written to a temporary file in the target directory and then
+    renamed over the destination, so readers never observe a partially
+    written file (e.g., when a run is interrupted or runs concurrently).
+
+    Args:
+        path: Destination file path
+        data: Bytes to write
+    """
+    atomic_write_stream(path, [data])
+
+
+def atomic_write_stream(path: str | Path, chunks: Iterable[bytes]) -> tuple[int, str]:
+    """Stream chunks to a file atomically without holding the whole content in memory.
+
+    Like atomic_write_bytes(), the chunks go to a temporary file that is
+    renamed over the destination once complete. The file keeps the
+    permissions of the file it replaces; a new file gets the usual
+    0666 & ~umask instead of the private mode of the temporary file.
+
+    Args:
+        path: Destination file path
+        chunks: Byte chunks to write, in order
+
+    Returns:
+        Tuple of (size in bytes, hex SHA-256 digest of the written content)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            for chunk in chunks:
+                tmp_file.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = NEW_FILE_MODE
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        # Never leave temp files behind on failure
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    return size, digest.hexdigest()
+
+
+def iter_file_chunks(
+    path: str | Path, chunk_size: int = CHUNK_SIZE, offset: int = 0
+) -> Iterator[bytes]:
+    """Read a file in chunks.
+
+    Args:
+        path: File to read
+        chunk_size: Maximum bytes per chunk
+        offset: Number of leading bytes to skip
+
+    Yields:
+        Consecutive chunks of the file content
+    """
+    with open(path, "rb") as file:
+        file.seek(offset)
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
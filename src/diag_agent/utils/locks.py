@@ -0,0 +1,115 @@
+"""Inter-process file locks."""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+class LockTimeout(TimeoutError):
+    """Exception raised when a file lock is not acquired within the timeout."""
+    pass
+
+
+class FileLock:
+    """Exclusive lock on a file, shared by all processes that use the same path.
+
+    Uses flock() on POSIX and msvcrt.locking() on Windows, so the lock is
+    released by the OS if the holding process dies. Re-entrant within one
+    FileLock instance (nested acquire() calls of the holding thread).
+    """
+
+    POLL_INTERVAL = 0.05  # seconds between attempts while the lock is held elsewhere
+
+    def __init__(self, path: str | Path) -> None:
+        """Initialize file lock.
+
+        Args:
+            path: Lock file (created if missing; its content is irrelevant)
+        """
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: int | None = None
+
+    def acquire(self, timeout: float | None = None) -> None:
+        """Acquire the lock, waiting for other processes to release it.
+
+        Args:
+            timeout: Maximum seconds to wait (None = wait forever)
+
+        Raises:
+            LockTimeout: If the lock is not acquired within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise LockTimeout(f"Timed out waiting for lock {self.path}")
+        if self._depth > 0:
+            self._depth += 1
+            return
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            while not self._try_lock(fd):
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"Timed out waiting for lock {self.path}")
+                time.sleep(self.POLL_INTERVAL)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._fd = fd
+        self._depth = 1
+
+    def release(self) -> None:
+        """Release the lock (the file lock once the outermost acquire() is released)."""
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fd, self._fd = self._fd, None
+            if sys.platform == "win32":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self._thread_lock.release()
+
+    def is_locked(self) -> bool:
+        """Check without waiting whether the lock is held elsewhere.
+
+        Returns:
+            True if another process (or thread) holds the lock
+        """
+        try:
+            self.acquire(timeout=0)
+        except LockTimeout:
+            return True
+        self.release()
+        return False
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        """Try to lock fd without blocking."""
+        try:
+            if sys.platform == "win32":
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
@@ -108,13 +108,18 @@ class TestOrchestratorIntegration:
         # Mock LLMClient: subtype detection, first invalid, then valid
         # Mock KrokiClient: first error, then success (validation now uses SVG format)
         with patch.object(orchestrator.llm_client, 'generate', side_effect=["sequence", invalid_plantuml, valid_plantuml]), \
-             patch.object(orchestrator.kroki_client, 'render_diagram') as mock_kroki:
-            # First call fails, second call succeeds (validation), third call succeeds (file output)
+             patch.object(orchestrator.kroki_client, 'render_diagram') as mock_kroki, \
+             patch.object(orchestrator.kroki_client, 'render_to_path') as mock_render_to_path:
+            # First call fails, second call succeeds (validation)
             mock_kroki.side_effect = [
                 KrokiRenderError("Syntax error: missing @enduml"),
                 b'<svg>valid</svg>',  # Valid SVG bytes (validation)
-                b'\x89PNG'   # Valid PNG bytes (file output)
             ]
+            # File output streams the PNG to disk
+            mock_render_to_path.side_effect = (
+                lambda diagram_source, diagram_type, output_format, path, retry_budget, cache_hits:
+                path.write_bytes(b'\x89PNG')
+            )
 
             # Act
             result = orchestrator.execute(
@@ -220,6 +220,7 @@ class TestCLI:
         Validates that:
         - Command successfully invokes KrokiManager.start()
         - Success message is displayed to user
+        - Time until Kroki is ready is reported
         - Exit code is 0
         """
         from diag_agent.cli.commands import cli
@@ -227,6 +228,7 @@ class TestCLI:
         # Arrange
         runner = CliRunner()
         mock_manager = Mock()
+        mock_manager.wait_until_healthy.return_value = 4.2
 
         with patch("diag_agent.cli.commands.KrokiManager", return_value=mock_manager):
             # Act
@@ -235,6 +237,7 @@ class TestCLI:
         # Assert
         assert result.exit_code == 0, f"CLI failed with: {result.output}"
         mock_manager.start.assert_called_once()
+        assert "Ready after: 4.2s" in result.output
         assert "started" in result.output.lower() or "success" in result.output.lower(), \
             "Missing success message in output"
 
@@ -243,6 +246,7 @@ class TestCLI:
 
         Validates that:
         - Command successfully invokes KrokiManager.stop()
+        - The persisted Kroki discovery is forgotten
         - Success message is displayed to user
         - Exit code is 0
         """
@@ -251,14 +255,17 @@ class TestCLI:
         # Arrange
         runner = CliRunner()
         mock_manager = Mock()
+        mock_discovery = Mock()
 
-        with patch("diag_agent.cli.commands.KrokiManager", return_value=mock_manager):
+        with patch("diag_agent.cli.commands.KrokiManager", return_value=mock_manager), \
+             patch("diag_agent.cli.commands.DiscoveryCache", return_value=mock_discovery):
             # Act
             result = runner.invoke(cli, ["kroki", "stop"])
 
         # Assert
         assert result.exit_code == 0, f"CLI failed with: {result.output}"
         mock_manager.stop.assert_called_once()
+        mock_discovery.invalidate.assert_called_once()
         assert "stopped" in result.output.lower() or "success" in result.output.lower(), \
             "Missing success message in output"
 
@@ -266,17 +273,18 @@ class TestCLI:
         """Test `diag-agent kroki status` shows running and healthy status.
 
         Validates that:
-        - Status command checks if container is running
-        - Status command performs health check
-        - Output shows "running" and "healthy" status
+        - Status command reports each replica
+        - Output shows "running" and "healthy" status with the replica URL
         """
         from diag_agent.cli.commands import cli
 
         # Arrange
         runner = CliRunner()
         mock_manager = Mock()
-        mock_manager.is_running.return_value = True
-        mock_manager.health_check.return_value = True
+        mock_manager.replica_status.return_value = [
+            {"index": 0, "name": "kroki", "url": "http://localhost:8000", "running": True, "healthy": True},
+            {"index": 1, "name": "kroki-2", "url": "http://localhost:8001", "running": True, "healthy": False},
+        ]
 
         with patch("diag_agent.cli.commands.KrokiManager", return_value=mock_manager):
             # Act
@@ -284,25 +292,26 @@ class TestCLI:
 
         # Assert
         assert result.exit_code == 0, f"CLI failed with: {result.output}"
-        mock_manager.is_running.assert_called_once()
-        mock_manager.health_check.assert_called_once()
+        mock_manager.replica_status.assert_called_once()
         assert "running" in result.output.lower(), "Missing 'running' status in output"
         assert "healthy" in result.output.lower(), "Missing 'healthy' status in output"
+        assert "kroki-2: Running ✓, Unhealthy ✗ - http://localhost:8001" in result.output
 
     def test_kroki_status_shows_stopped(self):
         """Test `diag-agent kroki status` shows stopped status.
 
         Validates that:
         - Status command detects stopped container
-        - Output shows "stopped" status
-        - Health check is not performed when container is stopped
+        - Output shows "stopped" status and how to start Kroki
         """
         from diag_agent.cli.commands import cli
 
         # Arrange
         runner = CliRunner()
         mock_manager = Mock()
-        mock_manager.is_running.return_value = False
+        mock_manager.replica_status.return_value = [
+            {"index": 0, "name": "kroki", "url": "http://localhost:8000", "running": False, "healthy": False},
+        ]
 
         with patch("diag_agent.cli.commands.KrokiManager", return_value=mock_manager):
             # Act
@@ -310,10 +319,153 @@ class TestCLI:
 
         # Assert
         assert result.exit_code == 0, f"CLI failed with: {result.output}"
-        mock_manager.is_running.assert_called_once()
-        mock_manager.health_check.assert_not_called()  # Don't check health if not running
         assert "stopped" in result.output.lower() or "not running" in result.output.lower(), \
             "Missing 'stopped' status in output"
+        assert "kroki start" in result.output
+
+    def test_kroki_status_watch_exports_json_lines(self, tmp_path):
+        """Test `diag-agent kroki status --watch` samples and exports JSON lines.
+
+        Validates that:
+        - --count limits the number of samples
+        - --types selects the diagram types measured
+        - Each sample is printed and appended to the --json-lines file
+        """
+        import json
+        from diag_agent.cli.commands import cli
+
+        # Arrange
+        runner = CliRunner()
+        export = tmp_path / "stats.jsonl"
+        sample = {"timestamp": 0.0, "replicas": [{
+            "name": "kroki", "url": "http://localhost:8000", "running": True, "healthy": True,
+            "cpu_percent": 12.5, "memory_usage": 512 * 1024 ** 2, "memory_limit": 2 * 1024 ** 3,
+            "network_rx_rate": 2048.0, "network_tx_rate": 1024.0,
+            "render_latency": {"plantuml": 0.12}, "render_errors": {"mermaid": "timeout"},
+        }]}
+        mock_monitor = Mock()
+        mock_monitor.sample.return_value = sample
+
+        with patch("diag_agent.cli.commands.KrokiManager"), \
+                patch("diag_agent.cli.commands.StatusMonitor", return_value=mock_monitor) as mock_class, \
+                patch("diag_agent.cli.commands.time.sleep"):
+            # Act
+            result = runner.invoke(cli, [
+                "kroki", "status", "--watch", "--count", "2", "--types", "plantuml,mermaid",
+                "--json-lines", str(export),
+            ])
+
+        # Assert
+        assert result.exit_code == 0, f"CLI failed with: {result.output}"
+        assert mock_class.call_args[0][1] == ["plantuml", "mermaid"]
+        assert mock_monitor.sample.call_count == 2
+        assert "CPU 12.5%, Memory 512.0MiB / 2.0GiB" in result.output
+        assert "Throughput: rx 2.0KiB/s, tx 1.0KiB/s" in result.output
+        assert "Render latency: plantuml 0.12s, mermaid failed" in result.output
+        lines = export.read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [sample, sample]
+
+    def test_kroki_start_and_restart_replicas(self):
+        """Test `diag-agent kroki start --replicas N` and `kroki restart`.
+
+        Validates that:
+        - --replicas is passed to KrokiManager
+        - restart performs a rolling restart and reports each replica
+        """
+        from diag_agent.cli.commands import cli
+
+        # Arrange
+        runner = CliRunner()
+        mock_manager = Mock()
+        mock_manager.endpoints = ["http://localhost:8000", "http://localhost:8001"]
+        mock_manager.wait_until_healthy.return_value = 6.0
+        mock_manager.rolling_restart.return_value = {"kroki": 4.0, "kroki-2": 5.5}
+
+        with patch("diag_agent.cli.commands.KrokiManager", return_value=mock_manager) as mock_class:
+            # Act
+            start_result = runner.invoke(cli, ["kroki", "start", "--replicas", "2"])
+            restart_result = runner.invoke(cli, ["kroki", "restart"])
+
+        # Assert
+        assert start_result.exit_code == 0, f"CLI failed with: {start_result.output}"
+        assert mock_class.call_args_list[0][1]["replicas"] == 2
+        assert "http://localhost:8001" in start_result.output
+        assert restart_result.exit_code == 0, f"CLI failed with: {restart_result.output}"
+        assert "kroki-2 restarted (ready after 5.5s)" in restart_result.output
+
+    def test_kroki_warmup_reports_timings(self):
+        """Test `diag-agent kroki warmup` warms up healthy replicas.
+
+        Validates that:
+        - Only healthy replicas are warmed up, with the given types, formats and rounds
+        - First/last render times and failed pairs are reported
+        - Without a healthy replica, the command fails
+        """
+        from diag_agent.cli.commands import cli
+        from diag_agent.kroki.warmup import WarmupTiming
+
+        # Arrange
+        runner = CliRunner()
+        mock_manager = Mock()
+        mock_manager.replica_status.return_value = [
+            {"index": 0, "name": "kroki", "url": "http://localhost:8000", "running": True, "healthy": True},
+            {"index": 1, "name": "kroki-2", "url": "http://localhost:8001", "running": True, "healthy": False},
+        ]
+        mock_manager.warm_up.return_value = {
+            "http://localhost:8000": [
+                WarmupTiming("plantuml", "svg", timings=[2.5, 0.3, 0.1]),
+                WarmupTiming("bpmn", "png", error="Unsupported output format: png for bpmn"),
+            ]
+        }
+
+        with patch("diag_agent.cli.commands.KrokiManager", return_value=mock_manager):
+            # Act
+            result = runner.invoke(
+                cli, ["kroki", "warmup", "--types", "plantuml,bpmn", "--formats", "svg,png", "--rounds", "3"]
+            )
+            mock_manager.replica_status.return_value = []
+            failed = runner.invoke(cli, ["kroki", "warmup"])
+
+        # Assert
+        assert result.exit_code == 0, f"CLI failed with: {result.output}"
+        mock_manager.warm_up.assert_called_once_with(
+            diagram_types=["plantuml", "bpmn"],
+            output_formats=["svg", "png"],
+            rounds=3,
+            urls=["http://localhost:8000"]
+        )
+        assert "plantuml/svg: 2.50s -> 0.10s (3 renders)" in result.output
+        assert "bpmn/png: failed - Unsupported output format" in result.output
+        assert failed.exit_code != 0
+        assert "No healthy Kroki container" in failed.output
+
+    def test_kroki_keepalive_runs_supervisor(self):
+        """Test `diag-agent kroki keepalive` supervises until interrupted.
+
+        Validates that:
+        - Idle period and lead time are passed to the supervisor in seconds
+        - Ctrl+C ends the command cleanly
+        """
+        from diag_agent.cli.commands import cli
+
+        # Arrange
+        runner = CliRunner()
+        mock_supervisor = Mock()
+        mock_supervisor.run.side_effect = KeyboardInterrupt
+
+        with patch("diag_agent.cli.commands.KrokiManager"), \
+             patch("diag_agent.cli.commands.KeepaliveSupervisor", return_value=mock_supervisor) as mock_class:
+            # Act
+            result = runner.invoke(
+                cli, ["kroki", "keepalive", "--idle-minutes", "15", "--lead-minutes", "5", "--interval", "30"]
+            )
+
+        # Assert
+        assert result.exit_code == 0, f"CLI failed with: {result.output}"
+        assert mock_class.call_args[1]["idle_timeout"] == 900
+        assert mock_class.call_args[1]["lead_time"] == 300
+        assert mock_supervisor.run.call_args[1]["interval"] == 30
+        assert "Kroki keepalive stopped" in result.output
 
     def test_kroki_logs_displays_container_logs(self):
         """Test `diag-agent kroki logs` displays container logs.
@@ -0,0 +1,57 @@
+"""Unit tests for file system helpers."""
+
+import os
+import stat
+import sys
+
+import pytest
+
+
+class TestAtomicWrite:
+    """Tests for atomic_write_bytes and atomic_write_stream."""
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    def test_new_file_gets_umask_permissions(self, tmp_path):
+        """Test a new file is created with 0666 & ~umask, not the temp file's 0600.
+
+        Validates that:
+        - The written file has the mode open() would have given it
+        - No temporary file is left behind
+        """
+        from diag_agent.utils.files import NEW_FILE_MODE, atomic_write_bytes
+
+        # Arrange
+        path = tmp_path / "diagram.svg"
+
+        # Act
+        atomic_write_bytes(path, b"<svg/>")
+
+        # Assert
+        assert path.read_bytes() == b"<svg/>"
+        assert stat.S_IMODE(os.stat(path).st_mode) == NEW_FILE_MODE
+        assert [entry.name for entry in tmp_path.iterdir()] == ["diagram.svg"]
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    def test_replaced_file_keeps_its_permissions(self, tmp_path):
+        """Test overwriting a file keeps the existing file's mode.
+
+        Validates that:
+        - The mode of the replaced file is copied to the new content
+        - The returned size and digest describe the new content
+        """
+        import hashlib
+        from diag_agent.utils.files import atomic_write_stream
+
+        # Arrange
+        path = tmp_path / "diagram.png"
+        path.write_bytes(b"old")
+        os.chmod(path, 0o640)
+
+        # Act
+        size, digest = atomic_write_stream(path, [b"new ", b"content"])
+
+        # Assert
+        assert path.read_bytes() == b"new content"
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+        assert size == 11
+        assert digest == hashlib.sha256(b"new content").hexdigest()
@@ -0,0 +1,96 @@
+"""Unit tests for the Kroki endpoint load balancer."""
+
+import pytest
+
+
+def _balancer(urls, clock=lambda: 0.0, failure_threshold=1):
+    from diag_agent.kroki.balancer import Endpoint, KrokiBalancer
+    from diag_agent.kroki.breaker import CircuitBreaker
+
+    return KrokiBalancer([
+        Endpoint(url, CircuitBreaker(failure_threshold, reset_timeout=10.0, clock=clock))
+        for url in urls
+    ])
+
+
+class TestKrokiBalancer:
+    """Tests for KrokiBalancer class."""
+
+    def test_picks_endpoint_with_fewest_outstanding_requests(self):
+        """Test requests spread across endpoints by outstanding requests.
+
+        Validates that:
+        - Concurrent requests go to different endpoints
+        - A released endpoint is picked again before a busy one
+        """
+        # Arrange
+        balancer = _balancer(["http://kroki-1:8000", "http://kroki-2:8000"])
+
+        # Act
+        first = balancer.acquire()
+        second = balancer.acquire()
+        balancer.release(first, healthy=True)
+        third = balancer.acquire()
+
+        # Assert
+        assert {first.url, second.url} == {"http://kroki-1:8000", "http://kroki-2:8000"}
+        assert third is first
+        assert second.outstanding == 1
+
+    def test_unhealthy_endpoint_gets_less_traffic(self):
+        """Test endpoints are weighted by recent health.
+
+        Validates that:
+        - Transport failures lower an endpoint's health
+        - With equal load, the healthier endpoint is preferred
+        """
+        # Arrange - breakers tolerate the failures, only health drops
+        balancer = _balancer(["http://kroki-1:8000", "http://kroki-2:8000"], failure_threshold=10)
+        flaky, healthy = balancer.endpoints
+
+        # Act - five failed requests on the first endpoint
+        for _ in range(5):
+            flaky.outstanding += 1
+            balancer.release(flaky, healthy=False)
+        picks = [balancer.acquire() for _ in range(4)]
+
+        # Assert - the healthy endpoint takes three concurrent requests first
+        assert flaky.health < 0.5
+        assert picks[:3] == [healthy, healthy, healthy]
+        assert picks[3] is flaky
+
+    def test_ejects_and_readmits_endpoint(self):
+        """Test endpoints with an open breaker leave and rejoin the rotation.
+
+        Validates that:
+        - A failing endpoint is ejected (breaker opens)
+        - acquire() returns None when every endpoint is ejected
+        - After the reset timeout the endpoint is probed and readmitted on success
+        """
+        # Arrange
+        now = [0.0]
+        balancer = _balancer(["http://kroki-1:8000"], clock=lambda: now[0])
+
+        # Act & Assert
+        endpoint = balancer.acquire()
+        balancer.release(endpoint, healthy=False)
+        assert balancer.acquire() is None
+
+        now[0] = 10.0
+        probe = balancer.acquire()
+        assert probe is endpoint
+        balancer.release(probe, healthy=True)
+        assert balancer.endpoints[0].breaker.state == "closed"
+        assert balancer.acquire() is endpoint
+
+    def test_requires_endpoints(self):
+        """Test a balancer without endpoints is rejected.
+
+        Validates that:
+        - ValueError is raised for an empty endpoint list
+        """
+        from diag_agent.kroki.balancer import KrokiBalancer
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            KrokiBalancer([])
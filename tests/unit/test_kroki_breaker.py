@@ -0,0 +1,91 @@
+"""Unit tests for the Kroki circuit breaker."""
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker class."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the breaker opens after failure_threshold consecutive failures.
+
+        Validates that:
+        - A success in between resets the failure count
+        - The breaker opens at the threshold and refuses requests
+        """
+        from diag_agent.kroki.breaker import CircuitBreaker
+
+        # Arrange
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=lambda: 0.0)
+
+        # Act
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        state_after_one = breaker.state
+        breaker.record_failure()
+
+        # Assert
+        assert state_after_one == CircuitBreaker.CLOSED
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+
+    def test_half_open_probe_after_reset_timeout(self):
+        """Test a single probe is allowed once reset_timeout has passed.
+
+        Validates that:
+        - Only one caller gets the half-open probe
+        - A failed probe opens the breaker again for another reset_timeout
+        - A successful probe closes the breaker
+        """
+        from diag_agent.kroki.breaker import CircuitBreaker
+
+        # Arrange
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+
+        # Act & Assert - still open before the timeout
+        now[0] = 5.0
+        assert breaker.allow_request() is False
+
+        # One probe after the timeout, concurrent callers are refused
+        now[0] = 10.0
+        assert breaker.allow_request() is True
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request() is False
+
+        # Failed probe re-opens
+        breaker.record_failure()
+        now[0] = 15.0
+        assert breaker.allow_request() is False
+
+        # Successful probe closes
+        now[0] = 20.0
+        assert breaker.allow_request() is True
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request() is True
+
+    def test_get_breaker_is_shared_per_endpoint(self):
+        """Test breakers are shared process-wide per endpoint URL.
+
+        Validates that:
+        - The same URL (with or without trailing slash) returns the same breaker
+        - Different URLs get independent breakers
+        - reset_breakers() forgets all breakers
+        """
+        from diag_agent.kroki.breaker import get_breaker, reset_breakers
+
+        # Arrange
+        reset_breakers()
+
+        # Act
+        first = get_breaker("http://localhost:8000")
+        second = get_breaker("http://localhost:8000/")
+        other = get_breaker("https://kroki.io")
+        reset_breakers()
+        fresh = get_breaker("http://localhost:8000")
+
+        # Assert
+        assert first is second
+        assert first is not other
+        assert fresh is not first
@@ -0,0 +1,201 @@
+"""Unit tests for the Kroki render cache."""
+
+import os
+import httpx
+
+
+class TestRenderCache:
+    """Tests for RenderCache and cache key computation."""
+
+    def test_cache_key_ignores_insignificant_whitespace(self):
+        """Test cache keys are stable across line endings and trailing whitespace.
+
+        Validates that:
+        - CRLF vs LF and trailing spaces produce the same key
+        - Diagram type, output format and server version are part of the key
+        """
+        from diag_agent.kroki.cache import render_cache_key
+
+        # Arrange
+        source = "@startuml\nAlice -> Bob\n@enduml"
+        messy_source = "\r\n@startuml  \r\nAlice -> Bob\t\r\n@enduml\r\n"
+
+        # Act
+        key = render_cache_key(source, "plantuml", "svg", "0.25.0")
+
+        # Assert
+        assert key == render_cache_key(messy_source, "plantuml", "svg", "0.25.0")
+        assert key != render_cache_key(source, "c4plantuml", "svg", "0.25.0")
+        assert key != render_cache_key(source, "plantuml", "png", "0.25.0")
+        assert key != render_cache_key(source, "plantuml", "svg", "0.26.0")
+
+    def test_get_put_roundtrip_counts_hits(self, tmp_path):
+        """Test stored renders are returned and hits/misses are counted.
+
+        Validates that:
+        - get() returns None before put()
+        - get() returns the stored bytes after put()
+        - hits and misses counters are updated
+        """
+        from diag_agent.kroki.cache import RenderCache
+
+        # Arrange
+        cache = RenderCache(tmp_path)
+
+        # Act & Assert
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, b"<svg/>")
+        assert cache.get("ab" * 32) == b"<svg/>"
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_evicts_least_recently_used_over_size_cap(self, tmp_path):
+        """Test entries are evicted in LRU order when exceeding max_bytes.
+
+        Validates that:
+        - Total cache size stays within max_bytes
+        - The least recently used entry is evicted first
+        """
+        from diag_agent.kroki.cache import RenderCache
+
+        # Arrange - room for two 10-byte entries
+        cache = RenderCache(tmp_path, max_bytes=20)
+        cache.put("aa" * 32, b"0123456789")
+        cache.put("bb" * 32, b"0123456789")
+        # Age entries explicitly, then use "aa" so "bb" becomes least recently used
+        os.utime(tmp_path / "aa" / ("aa" * 32), (1, 1))
+        os.utime(tmp_path / "bb" / ("bb" * 32), (2, 2))
+        assert cache.get("aa" * 32) is not None
+
+        # Act
+        cache.put("cc" * 32, b"0123456789")
+
+        # Assert
+        assert cache.get("aa" * 32) is not None
+        assert cache.get("bb" * 32) is None
+        assert cache.get("cc" * 32) is not None
+
+    def test_eviction_scans_only_when_running_total_exceeds_cap(self, tmp_path):
+        """Test puts below the size cap do not list the cache directory.
+
+        Validates that:
+        - Only the first put scans the directory for the current size
+        - Overwriting an entry does not grow the running total
+        - The put that crosses max_bytes scans and evicts again
+        """
+        from unittest.mock import patch
+        from diag_agent.kroki.cache import RenderCache
+
+        # Arrange - room for two 10-byte entries
+        cache = RenderCache(tmp_path, max_bytes=20)
+
+        with patch.object(cache, "_evict", wraps=cache._evict) as evict:
+            # Act
+            cache.put("aa" * 32, b"0123456789")
+            cache.put("bb" * 32, b"0123456789")
+            cache.put("bb" * 32, b"9876543210")
+            scans_below_cap = evict.call_count
+            cache.put("cc" * 32, b"0123456789")
+
+        # Assert
+        assert scans_below_cap == 1
+        assert evict.call_count == 2
+        assert len(list(tmp_path.glob("??/*"))) == 2
+
+    def test_hit_counter_counts_hits_of_one_run(self, tmp_path):
+        """Test a CacheHitCounter only counts lookups that pass it.
+
+        Validates that:
+        - Hits via get() and get_path() are recorded in the given counter
+        - Misses and lookups of other callers are not
+        """
+        from diag_agent.kroki.cache import CacheHitCounter, RenderCache
+
+        # Arrange
+        cache = RenderCache(tmp_path)
+        cache.put("ab" * 32, b"<svg/>")
+        hits = CacheHitCounter()
+
+        # Act
+        cache.get("ab" * 32, hits)
+        cache.get_path("ab" * 32, hits)
+        cache.get("cd" * 32, hits)
+        cache.get("ab" * 32)
+
+        # Assert
+        assert hits.count == 2
+        assert cache.hits == 3
+
+    def test_client_cache_hit_skips_network(self, tmp_path):
+        """Test KrokiClient serves repeated renders from the render cache.
+
+        Validates that:
+        - The first render goes to Kroki and is stored
+        - A second client (new run) gets a cache hit without any HTTP request
+        - The Kroki server version is part of the key (fetched once, then remembered)
+        """
+        from diag_agent.kroki.cache import RenderCache
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            if request.url.path == "/health":
+                return httpx.Response(200, json={"status": "pass", "version": {"number": "0.25.0"}})
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        source = "@startuml\nAlice -> Bob\n@enduml"
+
+        # Act
+        first = KrokiClient(
+            "http://localhost:8000",
+            render_cache=RenderCache(tmp_path),
+            transport=httpx.MockTransport(handler)
+        )
+        first_result = first.render_diagram(source, "plantuml", "svg")
+
+        cache = RenderCache(tmp_path)
+        second = KrokiClient(
+            "http://localhost:8000", render_cache=cache, transport=httpx.MockTransport(handler)
+        )
+        second_result = second.render_diagram(source, "plantuml", "svg")
+
+        # Assert
+        assert first_result == second_result == b"<svg/>"
+        assert requests == ["/health", "/plantuml/svg"]
+        assert cache.hits == 1
+        assert second.server_version() == "0.25.0"
+
+
+class TestHttpCache:
+    """Tests for HttpCache."""
+
+    def test_get_file_streams_body_without_loading_it(self, tmp_path):
+        """Test get_file() returns the metadata and streams the body from the cache file.
+
+        Validates that:
+        - The entry carries the validators but no in-memory content
+        - iter_content() yields the cached body (without the metadata line)
+        - After a refresh with a longer ETag, the body is still read correctly
+        """
+        from diag_agent.kroki.cache import HttpCache
+
+        # Arrange
+        cache = HttpCache(tmp_path)
+        url = "http://localhost:8000/plantuml/png/abc"
+        cache.store(url, {"ETag": '"v1"', "Cache-Control": "no-cache"}, b"png\nbytes")
+
+        # Act
+        entry = cache.get_file(url)
+        body = b"".join(entry.iter_content())
+        cache.refresh(url, entry, {"ETag": '"a-much-longer-etag"', "Cache-Control": "max-age=60"})
+        refreshed_body = b"".join(entry.iter_content())
+
+        # Assert
+        assert entry.content == b""
+        assert body == refreshed_body == b"png\nbytes"
+        assert cache.get(url).etag == '"a-much-longer-etag"'
+        assert cache.get(url).content == b"png\nbytes"
+        assert cache.get_file(url).is_fresh()
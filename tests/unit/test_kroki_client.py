@@ -26,7 +26,7 @@ class TestKrokiClient:
         expected_png_bytes = b"\x89PNG\r\n\x1a\n"  # PNG magic bytes
 
         # Mock HTTP response
-        with patch("httpx.post") as mock_post:
+        with patch("httpx.Client.post") as mock_post:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.headers = {"Content-Type": "image/png"}
@@ -73,7 +73,7 @@ class TestKrokiClient:
         output_format = "png"
 
         # Mock HTTP error response (500 Internal Server Error)
-        with patch("httpx.post") as mock_post:
+        with patch("httpx.Client.post") as mock_post:
             mock_response = Mock()
             mock_response.status_code = 500
             mock_response.text = "Internal Server Error"
@@ -119,7 +119,7 @@ class TestKrokiClient:
         kroki_error_text = "Syntax error in diagram source at line 2"
 
         # Mock HTTP response: 200 OK but Content-Type: text/plain (error case)
-        with patch("httpx.post") as mock_post:
+        with patch("httpx.Client.post") as mock_post:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.headers = {"Content-Type": "text/plain; charset=utf-8"}
@@ -142,3 +142,1100 @@ class TestKrokiClient:
             error_msg = str(exc_info.value)
             assert kroki_error_text in error_msg  # Kroki error message
             assert diagram_type in error_msg  # Diagram type for debugging
+
+    def test_render_diagram_reuses_pooled_connection(self):
+        """Test repeated renders go through one long-lived HTTP client.
+
+        Validates that:
+        - All renders are sent through the same pooled transport
+        - No module-level httpx.post call (new connection) is made per render
+        """
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange - transport records every request it handles
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        client = KrokiClient("http://localhost:8000", transport=httpx.MockTransport(handler))
+
+        # Act
+        with patch("httpx.post") as mock_post:
+            for fmt in ("svg", "png", "pdf"):
+                client.render_diagram("@startuml\nA -> B\n@enduml", "plantuml", fmt)
+
+        # Assert
+        mock_post.assert_not_called()
+        assert [r.url.path for r in requests] == ["/plantuml/svg", "/plantuml/png", "/plantuml/pdf"]
+
+    def test_context_manager_closes_pool(self):
+        """Test KrokiClient closes its connection pool on context exit.
+
+        Validates that:
+        - KrokiClient can be used as a context manager
+        - The underlying HTTP client is closed afterwards
+        """
+        from diag_agent.kroki.client import KrokiClient
+
+        # Act
+        with KrokiClient("http://localhost:8000", max_connections=2, http2=True) as client:
+            http_client = client._http
+            assert not http_client.is_closed
+
+        # Assert
+        assert http_client.is_closed
+
+
+class TestAsyncKrokiClient:
+    """Tests for AsyncKrokiClient class."""
+
+    def test_render_many_preserves_order_and_bounds_concurrency(self):
+        """Test render_many renders a batch concurrently with a concurrency cap.
+
+        Validates that:
+        - Results are returned in request order
+        - No more than `concurrency` renders are in flight at once
+        """
+        import asyncio
+        from diag_agent.kroki.client import AsyncKrokiClient
+
+        # Arrange - transport tracks how many requests overlap
+        in_flight = 0
+        max_in_flight = 0
+
+        async def handler(request):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(
+                200, headers={"Content-Type": "image/svg+xml"}, content=request.url.path.encode()
+            )
+
+        requests = [("@startuml\nA -> B\n@enduml", "plantuml", fmt) for fmt in ("svg", "png", "pdf", "jpeg")]
+
+        async def run():
+            async with AsyncKrokiClient(
+                "http://localhost:8000", transport=httpx.MockTransport(handler)
+            ) as client:
+                return await client.render_many(requests, concurrency=2)
+
+        # Act
+        results = asyncio.run(run())
+
+        # Assert
+        assert results == [b"/plantuml/svg", b"/plantuml/png", b"/plantuml/pdf", b"/plantuml/jpeg"]
+        assert max_in_flight == 2
+
+    def test_render_many_error_semantics(self):
+        """Test async renders raise KrokiRenderError like the sync client.
+
+        Validates that:
+        - text/plain error bodies raise KrokiRenderError
+        - return_exceptions=True returns errors in place instead of raising
+        """
+        import asyncio
+        from diag_agent.kroki.client import AsyncKrokiClient, KrokiRenderError
+
+        # Arrange - mermaid renders fail with a Kroki syntax error
+        def handler(request):
+            if request.url.path.startswith("/mermaid"):
+                return httpx.Response(
+                    400, headers={"Content-Type": "text/plain"}, content=b"Parse error on line 1"
+                )
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=b"png")
+
+        requests = [("A -> B", "plantuml", "png"), ("graph XX", "mermaid", "svg")]
+
+        async def run(return_exceptions):
+            async with AsyncKrokiClient(
+                "http://localhost:8000", transport=httpx.MockTransport(handler)
+            ) as client:
+                return await client.render_many(requests, return_exceptions=return_exceptions)
+
+        # Act & Assert
+        with pytest.raises(KrokiRenderError) as exc_info:
+            asyncio.run(run(False))
+        assert "mermaid" in str(exc_info.value)
+
+        results = asyncio.run(run(True))
+        assert results[0] == b"png"
+        assert isinstance(results[1], KrokiRenderError)
+        assert "Parse error on line 1" in str(results[1])
+
+
+class TestKrokiClientGetMode:
+    """Tests for GET-based encoded rendering with HTTP caching."""
+
+    def test_encode_diagram_matches_kroki_encoding(self):
+        """Test diagram source is encoded as deflate + base64url.
+
+        Validates that:
+        - Encoded output is URL-safe (no '+' or '/')
+        - Decoding reverses the encoding
+        """
+        import base64
+        import zlib
+        from diag_agent.kroki.client import encode_diagram
+
+        # Arrange
+        source = "@startuml\nAlice -> Bob: Hello ünïcode ???\n@enduml"
+
+        # Act
+        encoded = encode_diagram(source)
+
+        # Assert
+        assert "+" not in encoded and "/" not in encoded
+        assert zlib.decompress(base64.urlsafe_b64decode(encoded)).decode("utf-8") == source
+
+    def test_get_mode_revalidates_with_etag(self, tmp_path):
+        """Test GET renders are cached and revalidated with If-None-Match.
+
+        Validates that:
+        - Renders are sent as GET with the encoded source in the path
+        - A stale cached entry is revalidated with its ETag
+        - A 304 response returns the cached body
+        """
+        from diag_agent.kroki.cache import HttpCache
+        from diag_agent.kroki.client import KrokiClient, encode_diagram
+
+        # Arrange
+        source = "@startuml\nAlice -> Bob\n@enduml"
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(
+                200,
+                headers={"Content-Type": "image/svg+xml", "ETag": '"v1"', "Cache-Control": "no-cache"},
+                content=b"<svg/>"
+            )
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            request_method="get",
+            http_cache=HttpCache(tmp_path),
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        first = client._send(client.kroki_url, source, "plantuml", "svg")
+        second = client._send(client.kroki_url, source, "plantuml", "svg")
+
+        # Assert
+        assert first == second == b"<svg/>"
+        assert [r.method for r in requests] == ["GET", "GET"]
+        assert requests[0].url.path == f"/plantuml/svg/{encode_diagram(source)}"
+        assert "If-None-Match" not in requests[0].headers
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+
+    def test_get_mode_serves_fresh_entries_without_request(self, tmp_path):
+        """Test fresh GET responses (max-age) are served from the HTTP cache.
+
+        Validates that:
+        - Responses with Cache-Control max-age are reused without any request
+        """
+        from diag_agent.kroki.cache import HttpCache
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(
+                200,
+                headers={"Content-Type": "image/png", "Cache-Control": "public, max-age=3600"},
+                content=b"png"
+            )
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            request_method="get",
+            http_cache=HttpCache(tmp_path),
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        results = [client._send(client.kroki_url, "A -> B", "plantuml", "png") for _ in range(3)]
+
+        # Assert
+        assert results == [b"png"] * 3
+        assert len(requests) == 1
+
+    def test_get_mode_falls_back_to_post_for_long_urls(self):
+        """Test GET mode uses POST when the encoded URL is too long.
+
+        Validates that:
+        - URLs longer than max_get_url_length are not sent as GET
+        - The request is sent as POST with the JSON body instead
+        """
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange
+        methods = []
+
+        def handler(request):
+            methods.append(request.method)
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=b"png")
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            request_method="get",
+            max_get_url_length=64,
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        client.render_diagram("A -> B", "plantuml", "png")
+        client.render_diagram("\n".join(f"A{i} -> B{i}" for i in range(200)), "plantuml", "png")
+
+        # Assert
+        assert methods == ["GET", "POST"]
+
+
+class TestKrokiClientRenderToPath:
+    """Tests for streaming render_to_path()."""
+
+    def test_render_to_path_streams_body_to_file(self, tmp_path):
+        """Test render_to_path writes the streamed response and reports size/digest.
+
+        Validates that:
+        - The response body ends up in the destination file
+        - RenderResult reports the byte size and SHA-256 digest
+        - No temp files are left behind
+        """
+        import hashlib
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange - multi-chunk body
+        body = b"%PDF-1.7\n" + b"x" * 200_000
+
+        def handler(request):
+            return httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=body)
+
+        client = KrokiClient("http://localhost:8000", transport=httpx.MockTransport(handler))
+        destination = tmp_path / "out" / "diagram.pdf"
+
+        # Act
+        result = client.render_to_path("@startuml\nA -> B\n@enduml", "plantuml", "pdf", destination)
+
+        # Assert
+        assert destination.read_bytes() == body
+        assert result.path == destination
+        assert result.size == len(body)
+        assert result.sha256 == hashlib.sha256(body).hexdigest()
+        assert list(destination.parent.iterdir()) == [destination]
+
+    def test_render_to_path_raises_on_kroki_error(self, tmp_path):
+        """Test render_to_path raises KrokiRenderError and writes no file on errors.
+
+        Validates that:
+        - text/plain error bodies raise KrokiRenderError with the Kroki message
+        - The destination file is not created
+        """
+        from diag_agent.kroki.client import KrokiClient, KrokiRenderError
+
+        # Arrange
+        def handler(request):
+            return httpx.Response(
+                400, headers={"Content-Type": "text/plain"}, content=b"Syntax Error? (line: 2)"
+            )
+
+        client = KrokiClient("http://localhost:8000", transport=httpx.MockTransport(handler))
+        destination = tmp_path / "diagram.png"
+
+        # Act & Assert
+        with pytest.raises(KrokiRenderError) as exc_info:
+            client.render_to_path("@startuml\nA -\n@enduml", "plantuml", "png", destination)
+        assert "Syntax Error? (line: 2)" in str(exc_info.value)
+        assert not destination.exists()
+
+    def test_render_to_path_uses_render_cache(self, tmp_path):
+        """Test render_to_path stores streamed output in and serves it from the render cache.
+
+        Validates that:
+        - The first render is stored in the render cache
+        - A second render_to_path is copied from the cache without a Kroki request
+        """
+        from diag_agent.kroki.cache import RenderCache
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange
+        renders = []
+
+        def handler(request):
+            if request.url.path == "/health":
+                return httpx.Response(200, json={"version": {"number": "0.25.0"}})
+            renders.append(request.url.path)
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=b"png-bytes")
+
+        cache = RenderCache(tmp_path / "cache")
+        client = KrokiClient(
+            "http://localhost:8000", render_cache=cache, transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        client.render_to_path("A -> B", "plantuml", "png", tmp_path / "first.png")
+        client.render_to_path("A -> B", "plantuml", "png", tmp_path / "second.png")
+
+        # Assert
+        assert renders == ["/plantuml/png"]
+        assert (tmp_path / "second.png").read_bytes() == b"png-bytes"
+        assert cache.hits == 1
+
+    def test_render_to_path_uses_http_cache_in_get_mode(self, tmp_path):
+        """Test render_to_path serves, revalidates and stores GET responses in the HTTP cache.
+
+        Validates that:
+        - A streamed GET response is stored in the HTTP cache
+        - A fresh entry (max-age) written by render_diagram is served without a request
+        - A stale entry is revalidated with If-None-Match, and a 304 writes the cached body
+        """
+        from diag_agent.kroki.cache import HttpCache
+        from diag_agent.kroki.client import KrokiClient, encode_diagram
+
+        # Arrange - "C -> D" is cacheable for an hour, "A -> B" must be revalidated
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            fresh = request.url.path.endswith(encode_diagram("C -> D"))
+            cache_control = "max-age=3600" if fresh else "no-cache"
+            return httpx.Response(
+                200,
+                headers={"Content-Type": "image/png", "ETag": '"v1"', "Cache-Control": cache_control},
+                content=b"png-bytes"
+            )
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            request_method="get",
+            http_cache=HttpCache(tmp_path / "http"),
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act - a stale entry is stored and revalidated
+        client.render_to_path("A -> B", "plantuml", "png", tmp_path / "first.png")
+        client.render_to_path("A -> B", "plantuml", "png", tmp_path / "second.png")
+        stale_requests = list(requests)
+
+        # A fresh entry from render_diagram is reused without a request
+        client.render_diagram("C -> D", "plantuml", "png")
+        client.render_to_path("C -> D", "plantuml", "png", tmp_path / "third.png")
+
+        # Assert
+        assert (tmp_path / "first.png").read_bytes() == b"png-bytes"
+        assert (tmp_path / "second.png").read_bytes() == b"png-bytes"
+        assert (tmp_path / "third.png").read_bytes() == b"png-bytes"
+        assert [r.method for r in stale_requests] == ["GET", "GET"]
+        assert "If-None-Match" not in stale_requests[0].headers
+        assert stale_requests[1].headers["If-None-Match"] == '"v1"'
+        assert len(requests) == 3
+
+    def test_render_to_path_coalesces_identical_concurrent_renders(self, tmp_path):
+        """Test identical concurrent render_to_path calls share one Kroki request.
+
+        Validates that:
+        - Only one request reaches Kroki while the others wait
+        - Every caller gets its own file with the rendered content
+        """
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange
+        requests = []
+        release = threading.Event()
+
+        def handler(request):
+            requests.append(request.url.path)
+            release.wait(timeout=5)
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=b"png-bytes")
+
+        client = KrokiClient("http://localhost:8000", transport=httpx.MockTransport(handler))
+        paths = [tmp_path / f"diagram-{i}.png" for i in range(3)]
+
+        # Act
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [
+                pool.submit(client.render_to_path, "A -> B", "plantuml", "png", path) for path in paths
+            ]
+            while client._single_flight.coalesced < 2:
+                pass
+            release.set()
+            results = [future.result() for future in futures]
+
+        # Assert
+        assert requests == ["/plantuml/png"]
+        assert [result.path for result in results] == paths
+        assert all(path.read_bytes() == b"png-bytes" for path in paths)
+
+    def test_warm_up_always_pings_health(self, tmp_path):
+        """Test warm_up sends a /health request even if the server version is known.
+
+        Validates that:
+        - A server version remembered by the render cache does not skip the ping
+        - warm_up reports False once Kroki stops answering
+        """
+        from diag_agent.kroki.cache import RenderCache
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange
+        pings = []
+        up = [True]
+
+        def handler(request):
+            pings.append(request.url.path)
+            if not up[0]:
+                raise httpx.ConnectError("connection refused", request=request)
+            return httpx.Response(200, json={"version": {"number": "0.25.0"}})
+
+        cache = RenderCache(tmp_path / "cache")
+        cache.set_server_version("http://localhost:8000", "0.25.0")
+        client = KrokiClient(
+            "http://localhost:8000", render_cache=cache, transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        first = client.warm_up()
+        up[0] = False
+        second = client.warm_up()
+
+        # Assert
+        assert first is True
+        assert second is False
+        assert pings == ["/health", "/health"]
+        assert client.server_version() == "0.25.0"
+
+
+class TestKrokiClientRetries:
+    """Tests for retrying transient Kroki failures."""
+
+    def test_retries_transient_errors_then_succeeds(self):
+        """Test transport errors and 503 responses are retried.
+
+        Validates that:
+        - A connection reset and a 503 are retried with backoff
+        - The render succeeds once Kroki recovers
+        - Retries are taken from the retry budget
+        """
+        from diag_agent.kroki.client import KrokiClient
+        from diag_agent.kroki.retry import RetryBudget, RetryPolicy
+
+        # Arrange - reset, then 503, then success
+        responses = iter([
+            httpx.ConnectError("Connection reset by peer"),
+            httpx.Response(503, text="Service Unavailable"),
+            httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>"),
+        ])
+
+        def handler(request):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        budget = RetryBudget(max_retries=5)
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0),
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        result = client.render_diagram("A -> B", "plantuml", "svg", retry_budget=budget)
+
+        # Assert
+        assert result == b"<svg/>"
+        assert budget.remaining == 3
+
+    def test_raises_unavailable_error_after_retries(self, tmp_path):
+        """Test exhausted retries surface as KrokiUnavailableError.
+
+        Validates that:
+        - Connect timeouts are retried up to max_retries
+        - KrokiUnavailableError (a KrokiRenderError) is raised afterwards
+        - render_to_path retries the same way and leaves no partial file
+        """
+        from diag_agent.kroki.client import KrokiClient, KrokiUnavailableError
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange
+        attempts = []
+
+        def handler(request):
+            attempts.append(request.url.path)
+            raise httpx.ConnectTimeout("timed out")
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0),
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act & Assert
+        with pytest.raises(KrokiUnavailableError) as exc_info:
+            client.render_diagram("A -> B", "plantuml", "svg")
+        assert "ConnectTimeout" in str(exc_info.value)
+        assert len(attempts) == 3
+
+        with pytest.raises(KrokiUnavailableError):
+            client.render_to_path("A -> B", "plantuml", "png", tmp_path / "diagram.png")
+        assert len(attempts) == 6
+        assert list(tmp_path.iterdir()) == []
+
+    def test_read_timeout_raises_render_timeout_without_penalties(self, tmp_path):
+        """Test a render that exceeds its read timeout fails fast as KrokiRenderTimeout.
+
+        Validates that:
+        - httpx.ReadTimeout raises KrokiRenderTimeout (not KrokiUnavailableError)
+          while Kroki still answers /health
+        - The render is not retried, also by render_to_path
+        - The circuit breaker and the concurrency limit are not penalized
+        """
+        from diag_agent.kroki.breaker import CircuitBreaker
+        from diag_agent.kroki.client import KrokiClient, KrokiRenderTimeout, KrokiUnavailableError
+        from diag_agent.kroki.limiter import get_limiter, reset_limiters
+        from diag_agent.kroki.retry import RetryPolicy
+        from diag_agent.kroki.timeouts import TimeoutPolicy
+
+        # Arrange - Kroki is up, but this diagram takes too long to render
+        reset_limiters()
+        attempts = []
+
+        def handler(request):
+            if request.url.path == "/health":
+                return httpx.Response(200, json={"status": "pass"})
+            attempts.append(request.url.path)
+            raise httpx.ReadTimeout("timed out")
+
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0),
+            circuit_breaker=breaker,
+            adaptive_concurrency=True,
+            timeout_policy=TimeoutPolicy(default=5.0),
+            transport=httpx.MockTransport(handler)
+        )
+        limit_before = get_limiter("http://localhost:8000").limit
+
+        # Act & Assert
+        with pytest.raises(KrokiRenderTimeout) as exc_info:
+            client.render_diagram("A -> B", "plantuml", "svg")
+        assert not isinstance(exc_info.value, KrokiUnavailableError)
+        assert "timed out" in str(exc_info.value) and "5s" in str(exc_info.value)
+        assert len(attempts) == 1
+
+        with pytest.raises(KrokiRenderTimeout):
+            client.render_to_path("A -> B", "plantuml", "png", tmp_path / "diagram.png")
+        assert len(attempts) == 2
+        assert list(tmp_path.iterdir()) == []
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        limiter = get_limiter("http://localhost:8000")
+        assert limiter.limit == limit_before
+        assert limiter.metrics()["in_flight"] == 0
+        reset_limiters()
+
+    def test_syntax_errors_are_not_retried(self):
+        """Test Kroki syntax errors fail immediately.
+
+        Validates that:
+        - 400 text/plain responses raise KrokiRenderError without a retry
+        - The error is not classified as KrokiUnavailableError
+        """
+        from diag_agent.kroki.client import KrokiClient, KrokiRenderError, KrokiUnavailableError
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange
+        attempts = []
+
+        def handler(request):
+            attempts.append(request.url.path)
+            return httpx.Response(400, headers={"Content-Type": "text/plain"}, content=b"Syntax Error?")
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0),
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        with pytest.raises(KrokiRenderError) as exc_info:
+            client.render_diagram("A -", "plantuml", "svg")
+
+        # Assert
+        assert not isinstance(exc_info.value, KrokiUnavailableError)
+        assert len(attempts) == 1
+
+    def test_retry_budget_limits_retries_per_run(self):
+        """Test a run's retry budget caps retries across its requests.
+
+        Validates that:
+        - Once the budget is spent, failures are raised without retrying
+        - Another run with its own budget on the same client still retries
+        """
+        from diag_agent.kroki.client import KrokiClient, KrokiUnavailableError
+        from diag_agent.kroki.retry import RetryBudget, RetryPolicy
+
+        # Arrange - Kroki is down for good
+        attempts = []
+
+        def handler(request):
+            attempts.append(request.url.path)
+            return httpx.Response(502, text="Bad Gateway")
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0),
+            transport=httpx.MockTransport(handler)
+        )
+        spent, fresh = RetryBudget(max_retries=3), RetryBudget(max_retries=3)
+
+        # Act - first render spends 2 retries, second only the remaining one
+        for diagram_type in ("plantuml", "mermaid", "graphviz"):
+            with pytest.raises(KrokiUnavailableError):
+                client.render_diagram("A -> B", diagram_type, "svg", retry_budget=spent)
+        attempts_of_first_run = len(attempts)
+        with pytest.raises(KrokiUnavailableError):
+            client.render_diagram("A -> B", "c4plantuml", "svg", retry_budget=fresh)
+
+        # Assert - 3 + 2 + 1 attempts, then 3 for the other run
+        assert attempts_of_first_run == 6
+        assert len(attempts) == 9
+        assert spent.remaining == 0
+        assert fresh.remaining == 1
+
+    def test_async_client_retries_transient_errors(self):
+        """Test AsyncKrokiClient retries transient failures like the sync client.
+
+        Validates that:
+        - A 504 response is retried
+        - The render succeeds once Kroki recovers
+        """
+        import asyncio
+        from diag_agent.kroki.client import AsyncKrokiClient
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange
+        attempts = []
+
+        def handler(request):
+            attempts.append(request.url.path)
+            if len(attempts) == 1:
+                return httpx.Response(504, text="Gateway Timeout")
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=b"png")
+
+        async def run():
+            async with AsyncKrokiClient(
+                "http://localhost:8000",
+                retry_policy=RetryPolicy(max_retries=1, base_delay=0),
+                transport=httpx.MockTransport(handler)
+            ) as client:
+                return await client.render_diagram("A -> B", "plantuml", "png")
+
+        # Act
+        result = asyncio.run(run())
+
+        # Assert
+        assert result == b"png"
+        assert len(attempts) == 2
+
+
+class TestKrokiClientFailover:
+    """Tests for circuit breaker based failover."""
+
+    def test_fails_over_while_breaker_open_and_fails_back(self):
+        """Test renders move to the fallback URL while the breaker is open.
+
+        Validates that:
+        - Transport failures of the primary URL open the breaker
+        - Later requests (including retries) go to fallback_url
+        - A successful half-open probe moves requests back to the primary
+        """
+        from diag_agent.kroki.breaker import CircuitBreaker
+        from diag_agent.kroki.client import KrokiClient
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange - local Kroki is down until local_up is set
+        hosts = []
+        local_up = [False]
+
+        def handler(request):
+            hosts.append(request.url.host)
+            if request.url.host == "localhost" and not local_up[0]:
+                raise httpx.ConnectError("Connection refused")
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0, clock=lambda: now[0])
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=3, base_delay=0),
+            circuit_breaker=breaker,
+            fallback_url="https://kroki.io",
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act - two failures open the breaker, the retry fails over
+        first = client.render_diagram("A -> B", "plantuml", "svg")
+        hosts_first = list(hosts)
+        client.render_diagram("B -> C", "plantuml", "svg")
+        hosts_second = hosts[len(hosts_first):]
+
+        # Local recovers; the probe after reset_timeout fails back
+        local_up[0] = True
+        now[0] = 30.0
+        client.render_diagram("C -> D", "plantuml", "svg")
+
+        # Assert
+        assert first == b"<svg/>"
+        assert hosts_first == ["localhost", "localhost", "kroki.io"]
+        assert hosts_second == ["kroki.io"]
+        assert hosts[-1] == "localhost"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_fails_over_when_endpoint_stalls(self):
+        """Test a stalled Kroki (renders and /health time out) opens the breaker.
+
+        Validates that:
+        - Read timeouts of an endpoint that does not answer /health either
+          are retried and count against the circuit breaker
+        - The render fails over to fallback_url
+        """
+        from diag_agent.kroki.breaker import CircuitBreaker
+        from diag_agent.kroki.client import KrokiClient
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange - local Kroki accepts connections but never answers
+        hosts = []
+
+        def handler(request):
+            hosts.append((request.url.host, request.url.path))
+            if request.url.host == "localhost":
+                raise httpx.ReadTimeout("timed out")
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=3, base_delay=0),
+            circuit_breaker=breaker,
+            fallback_url="https://kroki.io",
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        result = client.render_diagram("A -> B", "plantuml", "svg")
+
+        # Assert
+        assert result == b"<svg/>"
+        assert hosts == [
+            ("localhost", "/plantuml/svg"),
+            ("localhost", "/health"),
+            ("localhost", "/plantuml/svg"),
+            ("localhost", "/health"),
+            ("kroki.io", "/plantuml/svg"),
+        ]
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_fails_over_when_breaker_opens_on_last_attempt(self):
+        """Test the fallback gets one attempt when the breaker opens on the last retry.
+
+        Validates that:
+        - With the default breaker threshold (3) and max_retries (2), the
+          third failure opens the breaker and exhausts the retries
+        - The render still goes to fallback_url instead of failing
+        """
+        from diag_agent.kroki.breaker import CircuitBreaker
+        from diag_agent.kroki.client import KrokiClient
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange - local Kroki is down
+        hosts = []
+
+        def handler(request):
+            hosts.append(request.url.host)
+            if request.url.host == "localhost":
+                raise httpx.ConnectError("Connection refused")
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        breaker = CircuitBreaker()
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(base_delay=0),
+            circuit_breaker=breaker,
+            fallback_url="https://kroki.io",
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        result = client.render_diagram("A -> B", "plantuml", "svg")
+
+        # Assert
+        assert result == b"<svg/>"
+        assert hosts == ["localhost", "localhost", "localhost", "kroki.io"]
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_fails_fast_without_fallback(self):
+        """Test an open breaker without fallback fails without contacting Kroki.
+
+        Validates that:
+        - KrokiUnavailableError is raised while the breaker is open
+        - No request is sent to the known-down endpoint
+        """
+        from diag_agent.kroki.breaker import CircuitBreaker
+        from diag_agent.kroki.client import KrokiClient, KrokiUnavailableError
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, clock=lambda: 0.0)
+        breaker.record_failure()
+        client = KrokiClient(
+            "http://localhost:8000",
+            retry_policy=RetryPolicy(max_retries=0),
+            circuit_breaker=breaker,
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act & Assert
+        with pytest.raises(KrokiUnavailableError) as exc_info:
+            client.render_diagram("A -> B", "plantuml", "svg")
+        assert "circuit breaker open" in str(exc_info.value)
+        assert requests == []
+
+    def test_balancer_spreads_renders_and_skips_dead_replica(self):
+        """Test renders are load-balanced across replicas.
+
+        Validates that:
+        - Renders go to the balancer's endpoints instead of kroki_url
+        - A replica with transport failures is ejected and its renders retried elsewhere
+        """
+        from diag_agent.kroki.balancer import Endpoint, KrokiBalancer
+        from diag_agent.kroki.breaker import CircuitBreaker
+        from diag_agent.kroki.client import KrokiClient
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange - replica kroki-2 is down
+        hosts = []
+
+        def handler(request):
+            hosts.append(request.url.host)
+            if request.url.host == "kroki-2":
+                raise httpx.ConnectError("Connection refused")
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        balancer = KrokiBalancer([
+            Endpoint(url, CircuitBreaker(failure_threshold=1, clock=lambda: 0.0))
+            for url in ("http://kroki-1:8000", "http://kroki-2:8000", "http://kroki-3:8000")
+        ])
+        client = KrokiClient(
+            "http://kroki-1:8000",
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0),
+            balancer=balancer,
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        results = [client.render_diagram(f"A -> B{i}", "plantuml", "svg") for i in range(4)]
+
+        # Assert - kroki-2 is tried once, then only healthy replicas are used
+        assert results == [b"<svg/>"] * 4
+        assert hosts.count("kroki-2") == 1
+        assert {"kroki-1", "kroki-3"} <= set(hosts)
+        assert balancer.endpoints[1].breaker.state == "open"
+
+
+class TestKrokiClientConcurrencyLimit:
+    """Tests for adaptive per-endpoint concurrency limiting."""
+
+    def test_adaptive_concurrency_limits_in_flight_renders(self):
+        """Test renders beyond the endpoint limit wait locally.
+
+        Validates that:
+        - No more than the current limit of renders reach Kroki at once
+        - Render latency is fed into the endpoint's limiter
+        - limiter_metrics() reports the endpoint's limit and queue depth
+        """
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from diag_agent.kroki.client import KrokiClient
+        from diag_agent.kroki.limiter import limiter_metrics, reset_limiters
+
+        # Arrange
+        reset_limiters()
+        in_flight = [0]
+        max_in_flight = [0]
+        lock = threading.Lock()
+
+        def handler(request):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        client = KrokiClient(
+            "http://localhost:8000",
+            adaptive_concurrency=True,
+            max_concurrency=2,
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(
+                lambda i: client.render_diagram(f"A -> B{i}", "plantuml", "svg"), range(12)
+            ))
+        metrics = limiter_metrics()
+        reset_limiters()
+
+        # Assert
+        assert max_in_flight[0] <= 2
+        assert metrics["http://localhost:8000"]["completed"] == 12
+        assert metrics["http://localhost:8000"]["queue_depth"] == 0
+        assert metrics["http://localhost:8000"]["limit"] <= 2
+
+
+class TestKrokiClientTimeouts:
+    """Tests for per-diagram-type render timeouts."""
+
+    def test_render_uses_timeout_policy_and_records_latency(self, tmp_path):
+        """Test each render uses the timeout for its type and format.
+
+        Validates that:
+        - POST and streamed renders send the policy's timeout
+        - Successful renders are recorded for adaptive timeouts
+        - Failed renders are not recorded
+        """
+        from diag_agent.kroki.client import KrokiClient, KrokiRenderError
+        from diag_agent.kroki.timeouts import TimeoutPolicy
+
+        # Arrange
+        timeouts = []
+
+        def handler(request):
+            timeouts.append(request.extensions["timeout"]["read"])
+            if request.url.path.startswith("/mermaid"):
+                return httpx.Response(400, headers={"Content-Type": "text/plain"}, content=b"Parse error")
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=b"png")
+
+        policy = TimeoutPolicy(default=30.0, overrides={"mermaid": 5.0, "bpmn/png": 90.0})
+        client = KrokiClient(
+            "http://localhost:8000", timeout_policy=policy, transport=httpx.MockTransport(handler)
+        )
+
+        # Act
+        with patch.object(policy, "record", wraps=policy.record) as mock_record:
+            client.render_diagram("A -> B", "plantuml", "png")
+            client.render_to_path("<bpmn/>", "bpmn", "png", tmp_path / "diagram.png")
+            with pytest.raises(KrokiRenderError):
+                client.render_diagram("graph XX", "mermaid", "svg")
+
+        # Assert
+        assert timeouts == [30.0, 90.0, 5.0]
+        recorded = [call.args[:2] for call in mock_record.call_args_list]
+        assert recorded == [("plantuml", "png"), ("bpmn", "png")]
+
+
+class TestKrokiClientCapabilities:
+    """Tests for learning and probing supported output formats."""
+
+    @staticmethod
+    def _handler(requests):
+        def handler(request):
+            if request.url.path == "/health":
+                return httpx.Response(200, json={"version": {"number": "0.25.0"}})
+            requests.append(request.url.path)
+            if request.url.path == "/bpmn/png":
+                return httpx.Response(
+                    400,
+                    headers={"Content-Type": "text/plain"},
+                    content=b"Unsupported output format: png for bpmn. Must be one of svg.",
+                )
+            if request.url.path == "/bpmn/svg":
+                return httpx.Response(400, headers={"Content-Type": "text/plain"}, content=b"Parse error")
+            return httpx.Response(200, headers={"Content-Type": "image/png"}, content=b"png")
+        return handler
+
+    def test_learns_unsupported_format_and_skips_request(self, tmp_path):
+        """Test an unsupported format is learned from the first failure.
+
+        Validates that:
+        - The first failure raises KrokiUnsupportedFormatError
+        - Later renders of the pair fail without contacting Kroki
+        - supports_format() reports learned pairs
+        """
+        import pytest
+        from diag_agent.kroki.capabilities import CapabilityRegistry
+        from diag_agent.kroki.client import KrokiClient, KrokiUnsupportedFormatError
+
+        # Arrange
+        requests = []
+        client = KrokiClient(
+            "http://localhost:8000",
+            capabilities=CapabilityRegistry(tmp_path),
+            transport=httpx.MockTransport(self._handler(requests))
+        )
+
+        # Act
+        with pytest.raises(KrokiUnsupportedFormatError):
+            client.render_diagram("<bpmn/>", "bpmn", "png")
+        with pytest.raises(KrokiUnsupportedFormatError):
+            client.render_to_path("<bpmn/>", "bpmn", "png", tmp_path / "diagram.png")
+        client.render_diagram("A -> B", "plantuml", "png")
+
+        # Assert
+        assert requests == ["/bpmn/png", "/plantuml/png"]
+        assert client.supports_format("bpmn", "png") is False
+        assert client.supports_format("plantuml", "png") is True
+        assert client.supports_format("mermaid", "png") is None
+
+
+class TestKrokiClientErrorDetails:
+    """Tests for structured error details on KrokiRenderError."""
+
+    def test_render_error_carries_parsed_details(self):
+        """Test renderer errors are parsed for the diagram backend.
+
+        Validates that:
+        - KrokiRenderError.details holds line, class and source snippet
+        - The error message still contains the raw Kroki body
+        """
+        import pytest
+        from diag_agent.kroki.client import KrokiClient, KrokiRenderError
+
+        # Arrange
+        body = "Error: Parse error on line 2:\nA -->\n-----^\nExpecting 'ALPHA', got 'EOF'"
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(400, headers={"Content-Type": "text/plain"}, content=body.encode())
+        )
+        client = KrokiClient("http://localhost:8000", transport=transport)
+
+        # Act
+        with pytest.raises(KrokiRenderError) as exc_info:
+            client.render_diagram("graph TD\nA -->", "mermaid", "svg")
+
+        # Assert
+        details = exc_info.value.details
+        assert (details.error_class, details.line, details.column) == ("Parse error", 2, 6)
+        assert "> 2 | A -->" in details.snippet
+        assert "Expecting 'ALPHA'" in str(exc_info.value)
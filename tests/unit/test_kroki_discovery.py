@@ -0,0 +1,57 @@
+"""Unit tests for the persisted Kroki discovery cache."""
+
+
+class TestDiscoveryCache:
+    """Tests for DiscoveryCache."""
+
+    def test_round_trip_within_ttl(self, tmp_path):
+        """Test a saved discovery is reused for the same configuration within the TTL.
+
+        Validates that:
+        - A saved state is loaded back unchanged
+        - It expires after the TTL
+        - Another configuration (key) does not reuse it
+        """
+        from diag_agent.kroki.discovery import DiscoveryCache, DiscoveryState
+
+        # Arrange
+        cache = DiscoveryCache(tmp_path / "discovery.json", ttl=300)
+        key = {"mode": "auto", "local_url": "http://localhost:8000", "replicas": 1}
+        state = DiscoveryState(key=key, urls=["http://localhost:8000"], local=True, healthy_at=1000.0)
+
+        # Act
+        cache.save(state)
+
+        # Assert
+        assert cache.load(key, now=1200.0) == state
+        assert cache.load(key, now=1301.0) is None
+        assert cache.load(dict(key, mode="local"), now=1200.0) is None
+
+    def test_missing_corrupt_and_disabled(self, tmp_path):
+        """Test unusable state files are ignored.
+
+        Validates that:
+        - A missing or corrupt file is a cache miss
+        - TTL 0 disables the cache
+        - invalidate() removes the state
+        """
+        from diag_agent.kroki.discovery import DiscoveryCache, DiscoveryState
+
+        # Arrange
+        path = tmp_path / "discovery.json"
+        key = {"mode": "auto"}
+        cache = DiscoveryCache(path, ttl=300)
+        missing = cache.load(key)
+        path.write_text("{not json", encoding="utf-8")
+        corrupt = cache.load(key)
+
+        # Act
+        cache.save(DiscoveryState(key=key, urls=["https://kroki.io"], local=False, healthy_at=1000.0))
+        disabled = DiscoveryCache(path, ttl=0).load(key, now=1000.0)
+        cache.invalidate()
+
+        # Assert
+        assert missing is None
+        assert corrupt is None
+        assert disabled is None
+        assert not path.exists()
@@ -0,0 +1,188 @@
+"""Unit tests for the Docker Engine API client."""
+
+import httpx
+import pytest
+
+
+class TestDockerApi:
+    """Tests for DockerApi over a mocked daemon."""
+
+    def test_inspect_container(self):
+        """Test container inspection.
+
+        Validates that:
+        - Requests go to the versioned Engine API
+        - Existing containers return their details
+        - Missing containers (404) return None
+        """
+        from diag_agent.kroki.docker_api import DockerApi
+
+        # Arrange
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            if request.url.path.endswith("/kroki/json"):
+                return httpx.Response(200, json={"State": {"Running": True}})
+            return httpx.Response(404, json={"message": "No such container"})
+
+        api = DockerApi(transport=httpx.MockTransport(handler))
+
+        # Act
+        running = api.inspect_container("kroki")
+        missing = api.inspect_container("other")
+
+        # Assert
+        assert running == {"State": {"Running": True}}
+        assert missing is None
+        assert paths[0] == f"/{DockerApi.API_VERSION}/containers/kroki/json"
+
+    def test_create_and_start_container(self):
+        """Test creating and starting a container.
+
+        Validates that:
+        - Container name, image and port bindings are sent to /containers/create
+        - Starting an already running container (304) is not an error
+        - Other failures raise DockerApiError with the daemon's status and message
+        """
+        import json
+        from diag_agent.kroki.docker_api import DockerApi, DockerApiError
+
+        # Arrange
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.url.path.endswith("/containers/create"):
+                if request.url.params["name"] == "taken":
+                    return httpx.Response(409, json={"message": "Conflict. The name is in use"})
+                return httpx.Response(201, json={"Id": "abc123"})
+            return httpx.Response(304)
+
+        api = DockerApi(transport=httpx.MockTransport(handler))
+
+        # Act
+        container_id = api.create_container("kroki", "yuzutech/kroki", {8000: 8001})
+        api.start_container("kroki")
+        with pytest.raises(DockerApiError) as exc_info:
+            api.create_container("taken", "yuzutech/kroki", {8000: 8000})
+
+        # Assert
+        assert container_id == "abc123"
+        payload = json.loads(requests[0].content)
+        assert payload["Image"] == "yuzutech/kroki"
+        assert payload["HostConfig"]["PortBindings"] == {"8000/tcp": [{"HostPort": "8001"}]}
+        assert exc_info.value.status_code == 409
+        assert "name is in use" in str(exc_info.value)
+
+    def test_companion_network(self):
+        """Test creating a private network and attaching containers to it.
+
+        Validates that:
+        - Environment and network are sent to /containers/create
+        - An existing network (409) and an attached container (403) are not errors
+        """
+        import json
+        from diag_agent.kroki.docker_api import DockerApi
+
+        # Arrange
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if request.url.path.endswith("/containers/create"):
+                return httpx.Response(201, json={"Id": "abc123"})
+            if request.url.path.endswith("/networks/create"):
+                return httpx.Response(409, json={"message": "network with name kroki-net already exists"})
+            return httpx.Response(403, json={"message": "endpoint with name kroki already exists"})
+
+        api = DockerApi(transport=httpx.MockTransport(handler))
+
+        # Act
+        api.create_container(
+            "kroki-mermaid", "yuzutech/kroki-mermaid", {},
+            env={"LOG_LEVEL": "info"}, network="kroki-net"
+        )
+        api.create_network("kroki-net")
+        api.connect_network("kroki-net", "kroki")
+
+        # Assert
+        payload = json.loads(requests[0].content)
+        assert payload["Env"] == ["LOG_LEVEL=info"]
+        assert payload["HostConfig"]["NetworkMode"] == "kroki-net"
+        assert requests[2].url.path.endswith("/networks/kroki-net/connect")
+        assert json.loads(requests[2].content) == {"Container": "kroki"}
+
+    def test_unreachable_daemon(self):
+        """Test connection errors are reported without a status code.
+
+        Validates that:
+        - Transport errors raise DockerApiError with status_code None
+        """
+        from diag_agent.kroki.docker_api import DockerApi, DockerApiError
+
+        # Arrange
+        def handler(request):
+            raise httpx.ConnectError("Permission denied")
+
+        api = DockerApi(transport=httpx.MockTransport(handler))
+
+        # Act & Assert
+        with pytest.raises(DockerApiError) as exc_info:
+            api.inspect_container("kroki")
+        assert exc_info.value.status_code is None
+
+    def test_stats_summary(self):
+        """Test a stats sample is reduced like `docker stats` output.
+
+        Validates that:
+        - CPU percent uses the CPU and system deltas times online CPUs
+        - Reclaimable page cache is excluded from memory usage
+        - Network traffic is summed over all networks
+        """
+        from diag_agent.kroki.docker_api import DockerApi
+
+        # Arrange
+        sample = {
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": 300},
+                "system_cpu_usage": 2000,
+                "online_cpus": 4,
+            },
+            "precpu_stats": {"cpu_usage": {"total_usage": 100}, "system_cpu_usage": 1000},
+            "memory_stats": {"usage": 500, "limit": 4000, "stats": {"inactive_file": 100}},
+            "networks": {"eth0": {"rx_bytes": 10, "tx_bytes": 20}, "eth1": {"rx_bytes": 5, "tx_bytes": 1}},
+        }
+        api = DockerApi(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=sample)))
+
+        # Act
+        stats = api.stats("kroki")
+
+        # Assert
+        assert stats == {
+            "cpu_percent": 80.0, "memory_usage": 400, "memory_limit": 4000,
+            "network_rx": 15, "network_tx": 21,
+        }
+
+
+class TestDockerSocketPath:
+    """Tests for docker_socket_path function."""
+
+    def test_socket_path_from_docker_host(self):
+        """Test DOCKER_HOST selects the socket.
+
+        Validates that:
+        - Default is /var/run/docker.sock
+        - unix:// hosts are honored, other schemes disable the API
+        """
+        import os
+        from unittest.mock import patch
+        from diag_agent.kroki.docker_api import docker_socket_path
+
+        # Act & Assert
+        with patch.dict(os.environ, {}, clear=True):
+            assert docker_socket_path() == "/var/run/docker.sock"
+        with patch.dict(os.environ, {"DOCKER_HOST": "unix:///run/user/1000/docker.sock"}):
+            assert docker_socket_path() == "/run/user/1000/docker.sock"
+        with patch.dict(os.environ, {"DOCKER_HOST": "tcp://10.0.0.5:2376"}):
+            assert docker_socket_path() is None
@@ -0,0 +1,96 @@
+"""Unit tests for structured Kroki error parsing."""
+
+
+class TestParseKrokiError:
+    """Tests for parse_kroki_error function."""
+
+    def test_parses_plantuml_error(self):
+        """Test PlantUML errors yield line and snippet.
+
+        Validates that:
+        - The 0-based PlantUML line is converted to a 1-based line
+        - Error class is "Syntax Error"
+        - Snippet marks the offending source line
+        """
+        from diag_agent.kroki.errors import parse_kroki_error
+
+        # Arrange
+        source = "@startuml\nAlice -> Bob: Hi\nBob ->\n@enduml"
+        body = "Syntax Error? (Assumed diagram type: sequence) (line: 2)"
+
+        # Act
+        details = parse_kroki_error("plantuml", body, source)
+
+        # Assert
+        assert details.error_class == "Syntax Error"
+        assert details.line == 3
+        assert details.column is None
+        assert "> 3 | Bob ->" in details.snippet
+        assert "@startuml" not in details.snippet
+
+    def test_parses_mermaid_error(self):
+        """Test Mermaid parser errors yield line, column and expectation.
+
+        Validates that:
+        - Line and caret column are extracted
+        - Message is the parser expectation
+        - Summary combines class, position and message
+        """
+        from diag_agent.kroki.errors import parse_kroki_error
+
+        # Arrange
+        source = "graph TD\n  A --> B\n  B -->\n  C --> D"
+        body = (
+            "Error: Parse error on line 3:\n"
+            "  B -->\n"
+            "-------^\n"
+            "Expecting 'AMP', 'ALPHA', got 'NEWLINE'"
+        )
+
+        # Act
+        details = parse_kroki_error("mermaid", body, source)
+
+        # Assert
+        assert (details.error_class, details.line, details.column) == ("Parse error", 3, 8)
+        assert details.summary() == (
+            "Parse error at line 3, column 8: Expecting 'AMP', 'ALPHA', got 'NEWLINE'"
+        )
+        assert "> 3 |   B -->" in details.snippet
+
+    def test_parses_bpmn_error(self):
+        """Test bpmn-moddle errors yield 1-based line and column.
+
+        Validates that:
+        - 0-based line/column from the XML parser are converted
+        - Error class drops the element name
+        """
+        from diag_agent.kroki.errors import parse_kroki_error
+
+        # Arrange
+        body = (
+            "Error: unparsable content <bpmn:foo> detected\n"
+            "\tline: 1\n\tcolumn: 4\n\tnested error: unrecognized element"
+        )
+
+        # Act
+        details = parse_kroki_error("bpmn", body, "<a>\n<bpmn:foo/>\n</a>")
+
+        # Assert
+        assert (details.error_class, details.line, details.column) == ("unparsable content", 2, 5)
+        assert "    |     ^" in details.snippet
+
+    def test_error_without_position(self):
+        """Test errors without a position keep only class and message.
+
+        Validates that:
+        - line, column and snippet are None
+        """
+        from diag_agent.kroki.errors import parse_kroki_error
+
+        # Act
+        details = parse_kroki_error("mermaid", "UnknownDiagramError: No diagram type detected", "foo")
+
+        # Assert
+        assert details.error_class == "UnknownDiagramError"
+        assert details.line is None
+        assert details.snippet is None
@@ -0,0 +1,138 @@
+"""Unit tests for the Kroki keepalive supervisor."""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+
+def _timestamp(days_ago: int, hour: int, minute: int) -> float:
+    """Unix timestamp of a local time of day, days_ago days before 2026-03-10."""
+    day = datetime(2026, 3, 10) - timedelta(days=days_ago)
+    return day.replace(hour=hour, minute=minute).timestamp()
+
+
+class TestHeartbeat:
+    """Tests for the Heartbeat usage record."""
+
+    def test_beat_records_uses_and_sessions(self, tmp_path):
+        """Test heartbeats record the last use and session starts.
+
+        Validates that:
+        - The last use overall and per diagram type are recorded
+        - Only a use after SESSION_GAP without use starts a new session
+        - A missing file reads as no use
+        """
+        from diag_agent.kroki.keepalive import Heartbeat
+
+        # Arrange
+        heartbeat = Heartbeat(tmp_path / "heartbeat.json")
+        empty = heartbeat.read()
+
+        # Act
+        heartbeat.beat("plantuml", now=1000.0)
+        heartbeat.beat("Mermaid", now=1100.0)
+        heartbeat.beat(now=1100.0 + Heartbeat.SESSION_GAP + 1)
+        state = heartbeat.read()
+
+        # Assert
+        assert empty == {"last": None, "types": {}, "sessions": []}
+        assert state["last"] == 1100.0 + Heartbeat.SESSION_GAP + 1
+        assert state["types"] == {"plantuml": 1000.0, "mermaid": 1100.0}
+        assert state["sessions"] == [1000.0, 1100.0 + Heartbeat.SESSION_GAP + 1]
+
+
+class TestPredictDemand:
+    """Tests for predict_demand function."""
+
+    def test_predicts_recurring_session_starts(self):
+        """Test demand is predicted from sessions at the same time on earlier days.
+
+        Validates that:
+        - Sessions starting within the lead time on two earlier days predict demand
+        - A single earlier day, or sessions outside the lead time, do not
+        """
+        from diag_agent.kroki.keepalive import predict_demand
+
+        # Arrange
+        now = _timestamp(0, 8, 50)
+        sessions = [_timestamp(1, 8, 55), _timestamp(2, 8, 58), _timestamp(3, 14, 0)]
+
+        # Act & Assert
+        assert predict_demand(sessions, now, lead_time=600) is True
+        assert predict_demand(sessions[:1], now, lead_time=600) is False
+        assert predict_demand(sessions, now, lead_time=120) is False
+
+
+class TestKeepaliveSupervisor:
+    """Tests for KeepaliveSupervisor."""
+
+    def test_stops_idle_container(self, tmp_path):
+        """Test an idle container and idle companions are stopped.
+
+        Validates that:
+        - A container in use is kept, but its idle companions are stopped
+        - Without use for idle_timeout, gateway and companions are stopped
+        - Stopping the container forgets the persisted Kroki discovery
+        """
+        from diag_agent.kroki.keepalive import Heartbeat, KeepaliveSupervisor
+
+        # Arrange
+        now = [_timestamp(0, 12, 0)]
+        heartbeat = Heartbeat(tmp_path / "heartbeat.json")
+        mock_manager = Mock()
+        mock_manager.is_running.return_value = True
+        mock_manager.running_companions.return_value = ["mermaid"]
+        mock_manager.companion_name.return_value = "kroki-mermaid"
+        mock_discovery = Mock()
+        supervisor = KeepaliveSupervisor(
+            mock_manager, heartbeat, idle_timeout=600, discovery=mock_discovery, clock=lambda: now[0]
+        )
+        heartbeat.beat("mermaid", now=now[0])
+
+        # Act
+        now[0] += 300
+        heartbeat.beat("plantuml", now=now[0])
+        now[0] += 400
+        in_use = supervisor.tick()
+        now[0] += 300
+        idle = supervisor.tick()
+
+        # Assert
+        assert in_use == ["Stopped kroki-mermaid (idle)"]
+        mock_manager.stop_companion.assert_called_once_with("mermaid")
+        assert idle == ["Stopped Kroki (idle for 12 min)"]
+        mock_manager.stop.assert_called_once_with(all_replicas=True)
+        mock_manager.stop_companions.assert_called_once()
+        mock_discovery.invalidate.assert_called_once()
+
+    def test_prewarms_before_expected_demand(self, tmp_path):
+        """Test a stopped container is started and warmed up before expected use.
+
+        Validates that:
+        - Nothing happens without expected demand
+        - With expected demand, the container is started, awaited and warmed up
+        """
+        from diag_agent.kroki.keepalive import Heartbeat, KeepaliveSupervisor
+
+        # Arrange
+        heartbeat = Heartbeat(tmp_path / "heartbeat.json")
+        heartbeat.beat(now=_timestamp(2, 8, 55))
+        heartbeat.beat(now=_timestamp(1, 8, 57))
+        mock_manager = Mock()
+        mock_manager.is_running.return_value = False
+        mock_manager.wait_until_healthy.return_value = 7.5
+        now = [_timestamp(0, 7, 0)]
+        supervisor = KeepaliveSupervisor(
+            mock_manager, heartbeat, lead_time=600, warmup_types=["plantuml"],
+            warmup_formats=["svg"], warmup_rounds=2, clock=lambda: now[0]
+        )
+
+        # Act
+        early = supervisor.tick()
+        now[0] = _timestamp(0, 8, 50)
+        ahead = supervisor.tick()
+
+        # Assert
+        assert early == []
+        assert ahead == ["Started and warmed up Kroki for expected demand (ready after 7.5s)"]
+        mock_manager.start.assert_called_once()
+        mock_manager.warm_up.assert_called_once_with(["plantuml"], ["svg"], 2)
@@ -0,0 +1,145 @@
+"""Unit tests for the adaptive Kroki concurrency limiter."""
+
+import threading
+
+
+class TestAdaptiveLimiter:
+    """Tests for AdaptiveLimiter class."""
+
+    def test_limit_grows_while_latency_is_stable(self):
+        """Test additive increase while latency stays near the baseline.
+
+        Validates that:
+        - Fast renders raise the limit by about 1 per limit-many samples
+        - The limit never exceeds max_limit
+        """
+        from diag_agent.kroki.limiter import AdaptiveLimiter
+
+        # Arrange
+        limiter = AdaptiveLimiter(initial_limit=2, max_limit=4)
+
+        # Act
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release(0.2)
+        after_three = limiter.limit
+        for _ in range(50):
+            limiter.acquire()
+            limiter.release(0.2)
+
+        # Assert
+        assert after_three == 3
+        assert limiter.limit == 4
+
+    def test_limit_shrinks_on_latency_spike_and_transport_failure(self):
+        """Test multiplicative decrease on overload.
+
+        Validates that:
+        - Latency above tolerance x baseline lowers the limit
+        - Transport failures (latency None) lower the limit
+        - The limit never drops below min_limit
+        """
+        from diag_agent.kroki.limiter import AdaptiveLimiter
+
+        # Arrange
+        limiter = AdaptiveLimiter(initial_limit=10, min_limit=2, tolerance=2.0, backoff=0.5)
+        limiter.acquire()
+        limiter.release(0.2)  # baseline
+
+        # Act
+        limiter.acquire()
+        limiter.release(5.0)  # latency spike
+        after_spike = limiter.limit
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(None)
+
+        # Assert
+        assert after_spike == 5
+        assert limiter.limit == 2
+
+    def test_baseline_is_tracked_per_workload(self):
+        """Test latencies are only compared within the same (type, format) pair.
+
+        Validates that:
+        - A slow but normal render of a heavy pair does not lower the limit
+          set by fast renders of a light pair
+        - A spike relative to the pair's own baseline still lowers it
+        """
+        from diag_agent.kroki.limiter import AdaptiveLimiter
+
+        # Arrange
+        limiter = AdaptiveLimiter(initial_limit=10, tolerance=2.0, backoff=0.5)
+        limiter.acquire()
+        limiter.release(0.05, ("mermaid", "svg"))
+
+        # Act
+        for _ in range(3):
+            limiter.acquire()
+            limiter.release(2.0, ("plantuml", "png"))
+        after_heavy = limiter.limit
+        limiter.acquire()
+        limiter.release(6.0, ("plantuml", "png"))
+
+        # Assert
+        assert after_heavy >= 10
+        assert limiter.limit == after_heavy // 2
+
+    def test_excess_requests_queue_locally(self):
+        """Test requests beyond the limit wait and are reported as queue depth.
+
+        Validates that:
+        - acquire() blocks once in_flight reaches the limit
+        - metrics() reports in_flight and queue_depth
+        - A release lets the queued request proceed
+        """
+        from diag_agent.kroki.limiter import AdaptiveLimiter
+
+        # Arrange
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def waiter():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+
+        # Act
+        thread.start()
+        while limiter.metrics()["queue_depth"] == 0:
+            pass
+        metrics_while_queued = limiter.metrics()
+        limiter.release(0.1)
+        thread.join(timeout=5)
+
+        # Assert
+        assert metrics_while_queued["in_flight"] == 1
+        assert metrics_while_queued["queue_depth"] == 1
+        assert acquired.is_set()
+        assert limiter.metrics()["queue_depth"] == 0
+
+    def test_get_limiter_is_shared_per_endpoint(self):
+        """Test limiters are shared process-wide per endpoint URL.
+
+        Validates that:
+        - The same URL returns the same limiter
+        - limiter_metrics() reports every endpoint
+        """
+        from diag_agent.kroki.limiter import get_limiter, limiter_metrics, reset_limiters
+
+        # Arrange
+        reset_limiters()
+
+        # Act
+        first = get_limiter("http://localhost:8000/")
+        second = get_limiter("http://localhost:8000")
+        get_limiter("https://kroki.io")
+        metrics = limiter_metrics()
+        reset_limiters()
+
+        # Assert
+        assert first is second
+        assert set(metrics) == {"http://localhost:8000", "https://kroki.io"}
+        assert metrics["http://localhost:8000"]["limit"] == first.limit
@@ -12,6 +12,8 @@ class TestKrokiManager:
         """Test starting Kroki Docker container.
 
         Validates:
+        - The container is checked first (`docker ps`), then started and
+          attached to the companions' network (if there is one)
         - docker run command is called with correct parameters
         - Container name: kroki
         - Port mapping: 8000:8000
@@ -31,8 +33,8 @@ class TestKrokiManager:
             manager.start()
             
             # Assert
-            mock_run.assert_called_once()
-            call_args = mock_run.call_args[0][0]  # Get command list
+            assert mock_run.call_count == 3  # docker ps, docker run, docker network connect
+            call_args = mock_run.call_args_list[1][0][0]  # Get command list
             
             # Validate docker run command structure
             assert 'docker' in call_args
@@ -204,3 +206,390 @@ class TestKrokiManager:
             # Validate error message
             error_message = str(exc_info.value)
             assert 'docker' in error_message.lower()
+
+    def test_wait_until_healthy_polls_until_ready(self):
+        """Test wait_until_healthy() polls /health while the JVM boots.
+
+        Validates:
+        - Connection errors and non-200 responses are retried with backoff
+        - One keep-alive client is used for all polls
+        - Returns the seconds until Kroki was ready
+        """
+        import httpx
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        manager = KrokiManager()
+        mock_http = MagicMock()
+        mock_http.__enter__.return_value.get.side_effect = [
+            httpx.ConnectError("Connection refused"),
+            Mock(status_code=503),
+            Mock(status_code=200),
+        ]
+
+        with patch('httpx.Client', return_value=mock_http) as mock_client_class, \
+             patch('time.sleep') as mock_sleep:
+            # Act
+            ready_after = manager.wait_until_healthy(timeout=30)
+
+        # Assert
+        assert ready_after is not None and ready_after >= 0
+        mock_client_class.assert_called_once()
+        polled_url = mock_http.__enter__.return_value.get.call_args[0][0]
+        assert polled_url == "http://localhost:8000/health"
+        assert [call[0][0] for call in mock_sleep.call_args_list] == [0.1, 0.2]
+
+    def test_wait_until_healthy_times_out(self):
+        """Test wait_until_healthy() gives up after the timeout.
+
+        Validates:
+        - Returns None if Kroki never answers within the timeout
+        """
+        import httpx
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        manager = KrokiManager()
+        mock_http = MagicMock()
+        mock_http.__enter__.return_value.get.side_effect = httpx.ConnectError("Connection refused")
+
+        with patch('httpx.Client', return_value=mock_http):
+            # Act
+            ready_after = manager.wait_until_healthy(timeout=0.3)
+
+        # Assert
+        assert ready_after is None
+
+    def test_docker_api_backend_avoids_cli(self):
+        """Test the Docker Engine API backend replaces CLI forks.
+
+        Validates:
+        - is_running() inspects the container via the API
+        - start() creates and starts the container via the API
+        - No docker CLI process is spawned
+        """
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        mock_api = Mock()
+        mock_api.inspect_container.return_value = {"State": {"Running": False}}
+        manager = KrokiManager(port=8001, docker_api=mock_api)
+
+        with patch('subprocess.run') as mock_run:
+            # Act
+            running = manager.is_running()
+            manager.start()
+
+        # Assert
+        assert running is False
+        mock_api.create_container.assert_called_once_with(
+            "kroki", "yuzutech/kroki", {8000: 8001}, env=manager._gateway_env()
+        )
+        mock_api.start_container.assert_called_once_with("kroki")
+        mock_run.assert_not_called()
+
+    def test_docker_api_falls_back_to_cli(self):
+        """Test the CLI is used when the API cannot do the job.
+
+        Validates:
+        - An unreachable daemon switches the manager to the CLI
+        - A missing image (404) on start uses `docker run`, which pulls it
+        """
+        from diag_agent.kroki.docker_api import DockerApiError
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        unreachable_api = Mock()
+        unreachable_api.inspect_container.side_effect = DockerApiError("Permission denied")
+        unreachable = KrokiManager(docker_api=unreachable_api)
+        no_image_api = Mock()
+        no_image_api.inspect_container.return_value = None
+        no_image_api.create_container.side_effect = DockerApiError("No such image", 404)
+        no_image = KrokiManager(docker_api=no_image_api)
+
+        with patch('subprocess.run') as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout='kroki\n')
+
+            # Act
+            running = unreachable.is_running()
+            no_image.start()
+
+        # Assert
+        assert running is True
+        assert unreachable.docker_api is None
+        assert mock_run.call_args_list[0][0][0][:2] == ["docker", "ps"]
+        assert mock_run.call_args_list[1][0][0][:2] == ["docker", "run"]
+        no_image_api.start_container.assert_not_called()
+
+    def test_ensure_companion_starts_on_first_use(self):
+        """Test companions are started on first use of their diagram type.
+
+        Validates:
+        - The gateway is pointed at the companions on the private network
+        - Types rendered by the gateway itself need no companion
+        - A missing companion is started on the network and the gateway attached
+        - A running companion is reused
+        """
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        running = {"kroki"}
+        mock_api = Mock()
+        mock_api.inspect_container.side_effect = lambda name: {"State": {"Running": name in running}}
+        mock_api.start_container.side_effect = running.add
+        mock_api.list_containers.return_value = [{"Names": ["/kroki"]}]
+        manager = KrokiManager(docker_api=mock_api)
+
+        with patch.object(manager, "_wait_for_render", return_value=1.5) as mock_wait:
+            # Act
+            plantuml_ready = manager.ensure_companion("plantuml")
+            first_ready = manager.ensure_companion("mermaid")
+            second_ready = manager.ensure_companion("mermaid")
+
+        # Assert
+        assert manager._gateway_env()["KROKI_MERMAID_HOST"] == "kroki-mermaid"
+        assert manager.companion_for("plantuml") is None
+        assert plantuml_ready == 0.0
+        assert first_ready is not None and first_ready >= 0.0
+        assert second_ready == 0.0
+        mock_api.create_network.assert_called_once_with("kroki-net")
+        mock_api.create_container.assert_called_once_with(
+            "kroki-mermaid", "yuzutech/kroki-mermaid", {}, network="kroki-net"
+        )
+        mock_api.connect_network.assert_called_once_with("kroki-net", "kroki")
+        mock_wait.assert_called_once_with("mermaid", manager.COMPANION_STARTUP_TIMEOUT)
+
+    def test_stop_idle_companions(self):
+        """Test idle companions are stopped based on the recorded uses.
+
+        Validates:
+        - A companion unused for idle_timeout is stopped and removed
+        - A running companion without a recorded use is kept
+        - Starting a companion reaps idle ones, but keeps the started one
+        """
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        running = {"kroki", "kroki-mermaid", "kroki-bpmn"}
+        mock_api = Mock()
+        mock_api.inspect_container.side_effect = lambda name: {"State": {"Running": name in running}}
+        mock_api.start_container.side_effect = running.add
+        mock_api.stop_container.side_effect = running.discard
+        mock_api.list_containers.return_value = [{"Names": ["/kroki"]}]
+        manager = KrokiManager(docker_api=mock_api)
+
+        # Act
+        stopped = manager.stop_idle_companions({"mermaid": 1000.0, "plantuml": 1000.0}, idle_timeout=60, now=1120.0)
+        running.add("kroki-mermaid")
+        with patch.object(manager, "_wait_for_render", return_value=1.0):
+            manager.ensure_companion(
+                "excalidraw", idle_timeout=60, last_used={"mermaid": 0.0, "excalidraw": 0.0}
+            )
+
+        # Assert
+        assert stopped == ["mermaid"]
+        mock_api.remove_container.assert_any_call("kroki-mermaid")
+        assert running == {"kroki", "kroki-bpmn", "kroki-excalidraw"}
+
+    def test_started_replica_joins_companion_network(self):
+        """Test a replica started after the companions can reach them.
+
+        Validates:
+        - A newly started gateway is attached to the companions' network
+        - A missing network (no companion started yet) is ignored
+        """
+        from diag_agent.kroki.docker_api import DockerApiError
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        mock_api = Mock()
+        manager = KrokiManager(docker_api=mock_api, replicas=2)
+
+        # Act
+        manager.start_replica(1)
+        mock_api.connect_network.side_effect = DockerApiError("network kroki-net not found", 404)
+        manager.start_replica(0)
+
+        # Assert
+        assert mock_api.connect_network.call_args_list[0][0] == ("kroki-net", "kroki-2")
+        assert mock_api.connect_network.call_args_list[1][0] == ("kroki-net", "kroki")
+        assert manager.docker_api is mock_api
+
+    def test_start_reuses_stopped_container(self, tmp_path):
+        """Test a stopped container is started instead of failing on the name conflict.
+
+        Validates:
+        - `docker run` failing with a name conflict falls back to `docker start kroki`
+        """
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        manager = KrokiManager(lock_file=tmp_path / "kroki.lock")
+        conflict = subprocess.CalledProcessError(
+            125, "docker run", stderr='Conflict. The container name "/kroki" is already in use'
+        )
+
+        with patch('subprocess.run') as mock_run:
+            mock_run.side_effect = [Mock(stdout=""), conflict, Mock(stdout="kroki"), Mock(stdout="")]
+
+            # Act
+            manager.start()
+
+        # Assert
+        assert mock_run.call_args_list[2][0][0] == ["docker", "start", "kroki"]
+
+    def test_parallel_start_waits_for_lifecycle_lock(self, tmp_path):
+        """Test concurrent starts are serialized across managers (processes).
+
+        Validates:
+        - start() waits while another manager holds the lifecycle lock
+        - Afterwards it finds the container running and does not create another one
+        """
+        import threading
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        running = set()
+        mock_api = Mock()
+        mock_api.inspect_container.side_effect = lambda name: {"State": {"Running": name in running}}
+        winner = KrokiManager(docker_api=mock_api, lock_file=tmp_path / "kroki.lock")
+        waiter = KrokiManager(docker_api=mock_api, lock_file=tmp_path / "kroki.lock")
+        waiter_thread = threading.Thread(target=waiter.start)
+
+        # Act
+        with winner.lifecycle_lock():
+            waiter_thread.start()
+            waiter_thread.join(timeout=0.3)
+            blocked = waiter_thread.is_alive()
+            running.add("kroki")  # the winner's container is up
+        waiter_thread.join(timeout=5)
+
+        # Assert
+        assert blocked is True
+        assert not waiter_thread.is_alive()
+        mock_api.create_container.assert_not_called()
+
+    def test_is_starting_while_locked_or_recently_started(self, tmp_path):
+        """Test a start is in progress only while locked or within the grace period.
+
+        Validates:
+        - Another manager holding the lifecycle lock means starting
+        - A container started seconds ago is still booting
+        - A container started long ago (hung JVM) is not waited for
+        """
+        from datetime import datetime, timedelta, timezone
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        def started(seconds_ago):
+            moment = datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)
+            return {"State": {"Running": True, "StartedAt": moment.strftime("%Y-%m-%dT%H:%M:%S.%f000Z")}}
+
+        mock_api = Mock()
+        manager = KrokiManager(docker_api=mock_api, lock_file=tmp_path / "kroki.lock")
+        other = KrokiManager(docker_api=mock_api, lock_file=tmp_path / "kroki.lock")
+
+        # Act & Assert
+        mock_api.inspect_container.return_value = started(600)
+        with other.lifecycle_lock():
+            assert manager.is_starting() is True
+        assert manager.is_starting() is False
+        mock_api.inspect_container.return_value = started(5)
+        assert manager.is_starting(grace=30) is True
+        assert manager.is_starting(grace=2) is False
+
+    def test_warm_up_runs_on_each_replica(self):
+        """Test warm_up() warms up every replica.
+
+        Validates:
+        - run_warmup() is called once per replica URL with the given options
+        - Timings are returned by replica URL
+        """
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        manager = KrokiManager(replicas=2)
+
+        with patch("diag_agent.kroki.manager.run_warmup", side_effect=lambda url, *args: [url]) as mock_run:
+            # Act
+            results = manager.warm_up(["mermaid"], ["svg"], 4)
+
+        # Assert
+        assert results == {
+            "http://localhost:8000": ["http://localhost:8000"],
+            "http://localhost:8001": ["http://localhost:8001"],
+        }
+        assert sorted(call[0] for call in mock_run.call_args_list) == [
+            ("http://localhost:8000", ["mermaid"], ["svg"], 4),
+            ("http://localhost:8001", ["mermaid"], ["svg"], 4),
+        ]
+
+    def test_replica_pool(self):
+        """Test a pool of replicas on consecutive ports.
+
+        Validates:
+        - Replicas are named kroki, kroki-2, ... and use ports 8000, 8001, ...
+        - start() runs one container per replica
+        - replica_status() covers configured and other existing replicas
+        """
+        from diag_agent.kroki.manager import KrokiManager
+
+        # Arrange
+        mock_api = Mock()
+        mock_api.list_containers.return_value = [
+            {"Names": ["/kroki"]}, {"Names": ["/kroki-2"]}, {"Names": ["/kroki-4"]}, {"Names": ["/kroki-web"]}
+        ]
+        running = set()
+        mock_api.inspect_container.side_effect = lambda name: {"State": {"Running": name in running}}
+        mock_api.start_container.side_effect = running.add
+        manager = KrokiManager(docker_api=mock_api, replicas=2)
+
+        with patch('httpx.get', return_value=Mock(status_code=200)):
+            # Act
+            manager.start()
+            statuses = manager.replica_status()
+
+        # Assert
+        assert manager.endpoints == ["http://localhost:8000", "http://localhost:8001"]
+        assert [call[0] for call in mock_api.create_container.call_args_list] == [
+            ("kroki", "yuzutech/kroki", {8000: 8000}),
+            ("kroki-2", "yuzutech/kroki", {8000: 8001}),
+        ]
+        assert [(status["name"], status["running"], status["healthy"]) for status in statuses] == [
+            ("kroki", True, True), ("kroki-2", True, True), ("kroki-4", False, False)
+        ]
+        assert statuses[2]["url"] == "http://localhost:8003"
+
+    def test_rolling_restart_stops_on_unhealthy_replica(self):
+        """Test rolling restart restarts one replica at a time.
+
+        Validates:
+        - Each replica is recreated and awaited before the next one
+        - A replica that does not become healthy aborts the restart
+        """
+        import httpx
+        from diag_agent.kroki.manager import KrokiManager, KrokiManagerError
+
+        # Arrange
+        mock_api = Mock()
+        mock_api.list_containers.return_value = [{"Names": ["/kroki"]}, {"Names": ["/kroki-2"]}]
+        manager = KrokiManager(docker_api=mock_api)
+
+        def get(url, timeout):
+            # kroki comes back, kroki-2 (port 8001) never does
+            if url.startswith("http://localhost:8001"):
+                raise httpx.ConnectError("Connection refused")
+            return Mock(status_code=200)
+
+        mock_http = MagicMock()
+        mock_http.__enter__.return_value.get.side_effect = get
+
+        with patch('httpx.Client', return_value=mock_http):
+            # Act
+            with pytest.raises(KrokiManagerError) as exc_info:
+                manager.rolling_restart(timeout=0.2)
+
+        # Assert
+        assert "kroki-2" in str(exc_info.value)
+        assert [call[0][0] for call in mock_api.start_container.call_args_list] == ["kroki", "kroki-2"]
+        assert mock_api.stop_container.call_count == 2
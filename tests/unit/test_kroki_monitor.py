@@ -0,0 +1,81 @@
+"""Unit tests for the Kroki status monitor."""
+
+from unittest.mock import Mock, patch
+
+
+class TestFormatBytes:
+    """Tests for format_bytes function."""
+
+    def test_formats_binary_units(self):
+        """Test byte counts are shown with binary units like `docker stats`.
+
+        Validates that:
+        - Small sizes are shown in bytes
+        - Larger sizes use KiB, MiB and GiB
+        """
+        from diag_agent.kroki.monitor import format_bytes
+
+        # Act & Assert
+        assert format_bytes(512) == "512B"
+        assert format_bytes(1536) == "1.5KiB"
+        assert format_bytes(151.2 * 1024 ** 2) == "151.2MiB"
+        assert format_bytes(3 * 1024 ** 4) == "3072.0GiB"
+
+
+class TestStatusMonitor:
+    """Tests for StatusMonitor."""
+
+    def test_sample_reports_stats_rates_and_latency(self):
+        """Test samples combine Docker stats, throughput rates and render latency.
+
+        Validates that:
+        - Docker stats of running replicas are included
+        - Network rates are None on the first sample and computed from
+          counter deltas on later samples
+        - Render latency is measured for healthy replicas only, without
+          retries and with the probe timeout
+        - Render errors are reported per diagram type
+        """
+        from diag_agent.kroki.monitor import StatusMonitor
+        from diag_agent.kroki.warmup import WarmupTiming
+
+        # Arrange
+        now = [100.0]
+        mock_manager = Mock()
+        mock_manager.replica_status.return_value = [
+            {"index": 0, "name": "kroki", "url": "http://localhost:8000", "running": True, "healthy": True},
+            {"index": 1, "name": "kroki-2", "url": "http://localhost:8001", "running": False, "healthy": False},
+        ]
+        mock_manager.stats.side_effect = [
+            {"cpu_percent": 5.0, "memory_usage": 100.0, "memory_limit": 1000.0,
+             "network_rx": 1000.0, "network_tx": 500.0},
+            {"cpu_percent": 50.0, "memory_usage": 200.0, "memory_limit": 1000.0,
+             "network_rx": 6000.0, "network_tx": 1500.0},
+        ]
+        timings = [
+            WarmupTiming("plantuml", "svg", timings=[0.25]),
+            WarmupTiming("mermaid", "svg", error="Kroki HTTP 503"),
+        ]
+        monitor = StatusMonitor(mock_manager, ["plantuml", "mermaid"], clock=lambda: now[0])
+
+        with patch("diag_agent.kroki.monitor.run_warmup", return_value=timings) as mock_warmup:
+            # Act
+            first = monitor.sample()
+            now[0] += 10
+            second = monitor.sample()
+
+        # Assert
+        kroki, stopped = second["replicas"]
+        assert first["replicas"][0]["network_rx_rate"] is None
+        assert kroki["cpu_percent"] == 50.0
+        assert kroki["network_rx_rate"] == 500.0
+        assert kroki["network_tx_rate"] == 100.0
+        assert kroki["render_latency"] == {"plantuml": 0.25}
+        assert kroki["render_errors"] == {"mermaid": "Kroki HTTP 503"}
+        assert stopped["render_latency"] == {} and stopped["network_rx_rate"] is None
+        mock_manager.stats.assert_called_with(0)
+        args, kwargs = mock_warmup.call_args
+        assert args == ("http://localhost:8000", ["plantuml", "mermaid"], ["svg"])
+        assert kwargs["rounds"] == 1
+        assert kwargs["retry_policy"].max_retries == 0
+        assert kwargs["timeout"] == StatusMonitor.PROBE_TIMEOUT
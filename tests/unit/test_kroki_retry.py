@@ -0,0 +1,57 @@
+"""Unit tests for Kroki retry policy and retry budget."""
+
+from unittest.mock import patch
+
+
+class TestRetryPolicy:
+    """Tests for RetryPolicy class."""
+
+    def test_delay_uses_capped_exponential_backoff_with_jitter(self):
+        """Test backoff doubles per retry, is capped and jittered.
+
+        Validates that:
+        - The jitter range doubles with each retry
+        - The range never exceeds max_delay
+        - Delays are drawn uniformly from 0 up to the bound (full jitter)
+        """
+        from diag_agent.kroki.retry import RetryPolicy
+
+        # Arrange
+        policy = RetryPolicy(max_retries=5, base_delay=0.5, max_delay=3.0)
+
+        # Act - pick the upper bound of the jitter range
+        with patch("diag_agent.kroki.retry.random.uniform", side_effect=lambda low, high: high):
+            bounds = [policy.delay(retry) for retry in range(1, 6)]
+        with patch("diag_agent.kroki.retry.random.uniform", side_effect=lambda low, high: low):
+            lowest = policy.delay(3)
+
+        # Assert
+        assert bounds == [0.5, 1.0, 2.0, 3.0, 3.0]
+        assert lowest == 0
+
+
+class TestRetryBudget:
+    """Tests for RetryBudget class."""
+
+    def test_budget_is_spent_and_reset(self):
+        """Test the budget hands out a fixed number of retries until reset.
+
+        Validates that:
+        - try_acquire() succeeds until max_retries are used
+        - remaining reflects the unused retries
+        - reset() refills the budget
+        """
+        from diag_agent.kroki.retry import RetryBudget
+
+        # Arrange
+        budget = RetryBudget(max_retries=2)
+
+        # Act
+        acquired = [budget.try_acquire() for _ in range(3)]
+        remaining_after = budget.remaining
+        budget.reset()
+
+        # Assert
+        assert acquired == [True, True, False]
+        assert remaining_after == 0
+        assert budget.remaining == 2
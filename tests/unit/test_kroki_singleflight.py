@@ -0,0 +1,128 @@
+"""Unit tests for single-flight coalescing of Kroki renders."""
+
+import asyncio
+import threading
+import time
+import httpx
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight and AsyncSingleFlight."""
+
+    def test_concurrent_identical_renders_share_one_request(self):
+        """Test concurrent identical KrokiClient renders hit Kroki only once.
+
+        Validates that:
+        - Identical renders in flight at the same time are coalesced
+        - All callers receive the same bytes
+        - Different content is not coalesced
+        """
+        from diag_agent.kroki.client import KrokiClient
+
+        # Arrange - slow Kroki so all callers overlap
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            time.sleep(0.2)
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        client = KrokiClient("http://localhost:8000", transport=httpx.MockTransport(handler))
+        results = []
+
+        def render(source):
+            results.append(client.render_diagram(source, "plantuml", "svg"))
+
+        sources = ["@startuml\nA -> B\n@enduml"] * 5 + ["@startuml\nC -> D\n@enduml"]
+        threads = [threading.Thread(target=render, args=(source,)) for source in sources]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert - one request per distinct source
+        assert len(requests) == 2
+        assert results == [b"<svg/>"] * 6
+        assert client._single_flight.coalesced == 4
+
+    def test_waiters_share_leader_error(self):
+        """Test waiting callers receive the leader's error.
+
+        Validates that:
+        - An error raised by the in-flight call is re-raised in every waiter
+        - The key is released afterwards so the next call runs again
+        """
+        from diag_agent.kroki.singleflight import SingleFlight
+
+        # Arrange
+        group = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing_render():
+            started.set()
+            release.wait(timeout=5)
+            raise ValueError("Kroki syntax error")
+
+        def call():
+            try:
+                group.do("key", failing_render)
+            except ValueError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(timeout=5)
+        waiter = threading.Thread(target=call)
+        waiter.start()
+
+        # Act - let the waiter join the in-flight call, then fail it
+        while group.coalesced == 0:
+            time.sleep(0.01)
+        release.set()
+        leader.join()
+        waiter.join()
+
+        # Assert
+        assert errors == ["Kroki syntax error", "Kroki syntax error"]
+        assert group.do("key", lambda: "fresh") == "fresh"
+
+    def test_async_single_flight_coalesces(self):
+        """Test AsyncSingleFlight runs one coroutine for concurrent identical keys.
+
+        Validates that:
+        - Concurrent awaits with the same key execute the work once
+        - Errors propagate to all awaiting callers
+        """
+        from diag_agent.kroki.singleflight import AsyncSingleFlight
+
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return b"png"
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def run():
+            group = AsyncSingleFlight()
+            shared = await asyncio.gather(*(group.do("a", work) for _ in range(3)))
+            failed = await asyncio.gather(
+                *(group.do("b", fail) for _ in range(2)), return_exceptions=True
+            )
+            return shared, failed
+
+        # Act
+        shared, failed = asyncio.run(run())
+
+        # Assert
+        assert shared == [b"png"] * 3
+        assert calls == 1
+        assert all(isinstance(error, RuntimeError) for error in failed)
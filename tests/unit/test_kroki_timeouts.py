@@ -0,0 +1,52 @@
+"""Unit tests for per-diagram-type Kroki timeouts."""
+
+
+class TestTimeoutPolicy:
+    """Tests for TimeoutPolicy class."""
+
+    def test_overrides_take_precedence(self):
+        """Test explicit per-type and per-format timeouts.
+
+        Validates that:
+        - "type/format" overrides win over "type" overrides
+        - Other pairs use the default timeout
+        """
+        from diag_agent.kroki.timeouts import TimeoutPolicy
+
+        # Arrange
+        policy = TimeoutPolicy(default=30.0, overrides={"mermaid": 10.0, "BPMN/png": 90.0})
+
+        # Act & Assert
+        assert policy.timeout_for("mermaid", "svg") == 10.0
+        assert policy.timeout_for("bpmn", "png") == 90.0
+        assert policy.timeout_for("bpmn", "svg") == 30.0
+        assert policy.timeout_for("plantuml", "png") == 30.0
+
+    def test_adaptive_timeout_is_clamped_multiple_of_p99(self):
+        """Test adaptive timeouts follow observed latency percentiles.
+
+        Validates that:
+        - The default applies until MIN_SAMPLES latencies are recorded
+        - Afterwards the timeout is multiplier x p99 of the pair
+        - The result is clamped to floor and ceiling
+        """
+        from diag_agent.kroki.timeouts import TimeoutPolicy
+
+        # Arrange
+        policy = TimeoutPolicy(default=30.0, adaptive=True, multiplier=3.0, floor=2.0, ceiling=60.0)
+
+        # Act
+        before = policy.timeout_for("plantuml", "svg")
+        for latency in [0.2] * 9 + [1.0]:
+            policy.record("plantuml", "svg", latency)
+        for _ in range(10):
+            policy.record("mermaid", "svg", 0.1)
+            policy.record("bpmn", "png", 40.0)
+
+        # Assert
+        assert before == 30.0
+        assert policy.percentile("plantuml", "svg", 0.99) == 1.0
+        assert policy.timeout_for("plantuml", "svg") == 3.0
+        assert policy.timeout_for("mermaid", "svg") == 2.0  # floor
+        assert policy.timeout_for("bpmn", "png") == 60.0  # ceiling
+        assert policy.timeout_for("plantuml", "png") == 30.0  # no samples
@@ -0,0 +1,70 @@
+"""Unit tests for the Kroki JVM warm-up."""
+
+import httpx
+
+
+class TestRunWarmup:
+    """Tests for run_warmup function."""
+
+    def test_renders_each_pair_for_each_round(self):
+        """Test every (type, format) pair is rendered once per round.
+
+        Validates that:
+        - Each pair reaches Kroki `rounds` times (no caching)
+        - One timing per round is recorded
+        """
+        from diag_agent.kroki.warmup import run_warmup
+
+        # Arrange
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        # Act
+        results = run_warmup(
+            "http://localhost:8000", ["plantuml", "mermaid"], ["svg"], rounds=3,
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Assert
+        assert [(r.diagram_type, r.output_format) for r in results] == [("plantuml", "svg"), ("mermaid", "svg")]
+        assert all(len(r.timings) == 3 and r.error is None for r in results)
+        assert sorted(path.split("/")[1] for path in paths) == ["mermaid"] * 3 + ["plantuml"] * 3
+
+    def test_failed_pairs_are_not_retried(self):
+        """Test pairs that fail are reported and skipped in later rounds.
+
+        Validates that:
+        - An unsupported format is rendered only once and its error recorded
+        - Types without a bundled example are reported without a request
+        - Summaries show timings or the failure
+        """
+        from diag_agent.kroki.warmup import run_warmup
+
+        # Arrange
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            if request.url.path.startswith("/bpmn/png"):
+                return httpx.Response(400, text="Unsupported output format: png for bpmn. Must be one of svg.")
+            return httpx.Response(200, headers={"Content-Type": "image/svg+xml"}, content=b"<svg/>")
+
+        # Act
+        results = run_warmup(
+            "http://localhost:8000", ["bpmn", "vega"], ["svg", "png"], rounds=2,
+            transport=httpx.MockTransport(handler)
+        )
+
+        # Assert
+        bpmn_svg, bpmn_png, vega_svg, vega_png = results
+        assert len(bpmn_svg.timings) == 2
+        assert bpmn_png.timings == []
+        assert "Unsupported output format" in bpmn_png.error
+        assert vega_svg.error == vega_png.error == "no warm-up example for this diagram type"
+        assert sum(path.startswith("/bpmn/png") for path in paths) == 1
+        assert not any(path.startswith("/vega") for path in paths)
+        assert bpmn_png.summary().startswith("bpmn/png: failed - Unsupported output format")
+        assert bpmn_svg.summary().endswith("(2 renders)")
@@ -0,0 +1,51 @@
+"""Unit tests for inter-process file locks."""
+
+import pytest
+
+
+class TestFileLock:
+    """Tests for FileLock."""
+
+    def test_lock_is_exclusive_and_reentrant(self, tmp_path):
+        """Test a held lock blocks other holders until released.
+
+        Validates that:
+        - A second lock on the same file times out while the first is held
+        - The holder can acquire its lock again (re-entrant)
+        - The lock is free once the outermost acquire() is released
+        """
+        from diag_agent.utils.locks import FileLock, LockTimeout
+
+        # Arrange
+        first = FileLock(tmp_path / "kroki.lock")
+        second = FileLock(tmp_path / "kroki.lock")
+
+        # Act & Assert
+        with first:
+            with first:
+                with pytest.raises(LockTimeout):
+                    second.acquire(timeout=0.1)
+            with pytest.raises(LockTimeout):
+                second.acquire(timeout=0.1)
+        second.acquire(timeout=0.1)
+        second.release()
+
+    def test_is_locked_reports_holder_elsewhere(self, tmp_path):
+        """Test is_locked() probes the lock without waiting or taking it.
+
+        Validates that:
+        - A lock held by another FileLock on the same file is reported
+        - A free lock is reported free and stays free
+        """
+        from diag_agent.utils.locks import FileLock
+
+        # Arrange
+        holder = FileLock(tmp_path / "kroki.lock")
+        probe = FileLock(tmp_path / "kroki.lock")
+
+        # Act & Assert
+        with holder:
+            assert probe.is_locked() is True
+        assert probe.is_locked() is False
+        holder.acquire(timeout=0.1)
+        holder.release()
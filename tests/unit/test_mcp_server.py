@@ -174,3 +174,49 @@ class TestMCPServer:
                     create_diagram("test description")
 
                 assert "Kroki" in str(exc_info.value) or "unavailable" in str(exc_info.value)
+
+    def test_create_diagram_shares_one_kroki_client(self):
+        """Test concurrent tool calls create the shared Kroki client only once.
+
+        Validates that:
+        - Only the first Orchestrator determines the Kroki client
+        - Concurrent calls reuse the published client and manager
+        - The client is published before the run
+        """
+        import threading
+        from diag_agent.mcp import server
+
+        # Arrange
+        shared_client = Mock()
+        shared_manager = Mock()
+        created = []
+        barrier = threading.Barrier(4)
+
+        def make_orchestrator(settings, kroki_client=None, kroki_manager=None):
+            orchestrator = Mock()
+            orchestrator.kroki_client = kroki_client or shared_client
+            orchestrator.kroki_manager = kroki_manager or shared_manager
+            orchestrator.execute.return_value = {"stopped_reason": "success"}
+            created.append((kroki_client, kroki_manager))
+            return orchestrator
+
+        def call():
+            barrier.wait()
+            server.create_diagram("test description")
+
+        with patch.object(server, "_kroki_client", None), patch.object(server, "_kroki_manager", None):
+            with patch("diag_agent.mcp.server.Orchestrator", side_effect=make_orchestrator):
+                with patch("diag_agent.mcp.server.Settings"):
+                    # Act
+                    threads = [threading.Thread(target=call) for _ in range(4)]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+
+                    published = (server._kroki_client, server._kroki_manager)
+
+        # Assert
+        assert created.count((None, None)) == 1
+        assert created.count((shared_client, shared_manager)) == 3
+        assert published == (shared_client, shared_manager)
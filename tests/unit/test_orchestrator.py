@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import Mock, patch
 import time
+import json
 
 
 class TestOrchestrator:
@@ -214,12 +215,14 @@ class TestOrchestrator:
             )
 
         # Assert
-        # Verify KrokiClient.render_diagram() was called (validation + file writing)
-        assert mock_kroki_client.render_diagram.call_count == 2  # 1 validation + 1 file write
+        # Verify KrokiClient.render_diagram() was called for validation
+        assert mock_kroki_client.render_diagram.call_count == 1  # 1 validation
         call_args = mock_kroki_client.render_diagram.call_args
         rendered_source = call_args[1]["diagram_source"]
         assert rendered_source == "@startuml\nAlice -> Bob: Hello\n@enduml"
         assert call_args[1]["diagram_type"] == diagram_type
+        # File writing streams the png via render_to_path()
+        mock_kroki_client.render_to_path.assert_called_once()
 
         # Verify only 1 iteration (no retry needed)
         assert result["iterations_used"] == 1
@@ -267,7 +270,6 @@ class TestOrchestrator:
         mock_kroki_client.render_diagram.side_effect = [
             KrokiRenderError(error_message),  # Iteration 1: validation error
             png_bytes,                        # Iteration 2: validation success
-            png_bytes                         # File writing: png
         ]
 
         description = "Test diagram"
@@ -297,13 +299,247 @@ class TestOrchestrator:
             f"Refinement prompt should contain Kroki error details: {refinement_prompt}"
 
         # Verify Kroki calls: 2 validation + 1 file write
-        assert mock_kroki_client.render_diagram.call_count == 3
+        assert mock_kroki_client.render_diagram.call_count == 2
+        mock_kroki_client.render_to_path.assert_called_once()
 
         # Verify result shows 2 iterations and success
         assert result["iterations_used"] == 2
         assert result["stopped_reason"] == "success"
         assert result["diagram_source"] == "@startuml\nAlice -> Bob: Fixed\n@enduml"
 
+    def test_orchestrator_starts_companion_for_diagram_type(self, tmp_path):
+        """Test the companion container of a diagram type is started before rendering.
+
+        Validates that:
+        - ensure_companion() is called for the diagram type with the idle timeout
+          and the companion uses recorded in the shared heartbeat file
+        - The companion start is logged to generation.log
+        - The use is recorded in the keepalive heartbeat file
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.validate_design = False
+        mock_settings.kroki_companions = True
+        mock_settings.kroki_companion_idle_seconds = 600
+        mock_settings.kroki_heartbeat_file = str(tmp_path / "heartbeat.json")
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.side_effect = ["flowchart", "graph TD\nA --> B"]
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.return_value = b"<svg>"
+        mock_kroki_client.render_cache = None
+        mock_manager = Mock()
+        mock_manager.companion_for.return_value = "mermaid"
+        mock_manager.ensure_companion.return_value = 2.0
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client):
+            orchestrator = Orchestrator(
+                mock_settings, kroki_client=mock_kroki_client, kroki_manager=mock_manager
+            )
+
+            # Act
+            orchestrator.execute(
+                description="Test diagram",
+                diagram_type="mermaid",
+                output_dir=str(tmp_path),
+                output_formats="svg"
+            )
+
+        # Assert
+        mock_manager.ensure_companion.assert_called_once()
+        args, kwargs = mock_manager.ensure_companion.call_args
+        assert args == ("mermaid",)
+        assert kwargs["idle_timeout"] == 600
+        assert set(kwargs["last_used"]) == {"mermaid"}
+        log_content = (tmp_path / "generation.log").read_text()
+        assert "Kroki companion: started, ready after 2.0s" in log_content
+        heartbeat = json.loads((tmp_path / "heartbeat.json").read_text())
+        assert "mermaid" in heartbeat["types"]
+
+    def test_orchestrator_starts_companion_after_background_discovery(self, tmp_path):
+        """Test a cold start records the use and starts the companion once discovery is done.
+
+        Validates that:
+        - A kroki_manager set by background discovery (after execute started)
+          still gets the companion started and the heartbeat recorded
+        """
+        import threading
+
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange - discovery finishes only once the LLM generates the source
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.validate_design = False
+        mock_settings.render_cache_enabled = False
+        mock_settings.kroki_companions = True
+        mock_settings.kroki_companion_idle_seconds = 600
+        mock_settings.kroki_heartbeat_file = str(tmp_path / "heartbeat.json")
+
+        discovery_may_finish = threading.Event()
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.return_value = b"<svg>"
+        mock_manager = Mock()
+        mock_manager.companion_for.return_value = "mermaid"
+        mock_manager.ensure_companion.return_value = 2.0
+
+        def connect_kroki(orchestrator, settings):
+            discovery_may_finish.wait(timeout=5)
+            orchestrator.kroki_manager = mock_manager
+            return mock_kroki_client
+
+        responses = iter(["flowchart", "graph TD\nA --> B"])
+
+        def generate(prompt):
+            response = next(responses)
+            if response != "flowchart":
+                # Subtype detected, source generated - execute already asked for the companion
+                discovery_may_finish.set()
+            return response
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.side_effect = generate
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch.object(Orchestrator, "_connect_kroki", autospec=True, side_effect=connect_kroki):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act
+            orchestrator.execute(
+                description="Test diagram",
+                diagram_type="mermaid",
+                output_dir=str(tmp_path),
+                output_formats="svg"
+            )
+
+        # Assert
+        mock_manager.ensure_companion.assert_called_once()
+        assert mock_manager.ensure_companion.call_args.args == ("mermaid",)
+        log_content = (tmp_path / "generation.log").read_text()
+        assert "Kroki companion: started, ready after 2.0s" in log_content
+        heartbeat = json.loads((tmp_path / "heartbeat.json").read_text())
+        assert "mermaid" in heartbeat["types"]
+
+    def test_orchestrator_sends_focused_fix_prompt_for_located_errors(self, tmp_path):
+        """Test structured Kroki errors produce a focused fix prompt.
+
+        Validates that:
+        - Error summary and offending lines are sent to the LLM
+        - The raw Kroki error body and the syntax example are not
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.client import KrokiRenderError
+        from diag_agent.kroki.errors import KrokiErrorDetails
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.kroki_mode = "remote"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.validate_design = False
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.side_effect = [
+            "flowchart",  # Subtype detection
+            "graph TD\nA -->",  # Iteration 1: invalid
+            "graph TD\nA --> B",  # Iteration 2: valid
+        ]
+
+        details = KrokiErrorDetails(
+            message="Expecting 'ALPHA', got 'EOF'",
+            error_class="Parse error",
+            line=2,
+            column=6,
+            snippet="> 2 | A -->\n    |      ^"
+        )
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.side_effect = [
+            KrokiRenderError("Kroki rendering failed: <long raw body>", details),
+            b"<svg>",
+        ]
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act
+            result = orchestrator.execute(
+                description="Test diagram",
+                diagram_type="mermaid",
+                output_dir=str(tmp_path),
+                output_formats="svg"
+            )
+
+        # Assert
+        fix_prompt = mock_llm_client.generate.call_args_list[2][0][0]
+        assert "Parse error at line 2, column 6: Expecting 'ALPHA', got 'EOF'" in fix_prompt
+        assert "> 2 | A -->" in fix_prompt
+        assert "<long raw body>" not in fix_prompt
+        assert "Reference example" not in fix_prompt
+        assert result["iterations_used"] == 2
+
+    def test_orchestrator_raises_when_kroki_unavailable(self, tmp_path):
+        """Test orchestrator does not ask the LLM to fix a Kroki outage.
+
+        Validates that:
+        - Renders take their retries from a budget of this run
+        - KrokiUnavailableError (retries exhausted) propagates to the caller
+        - No refinement prompt is sent for a transport failure
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.client import KrokiUnavailableError
+        from diag_agent.kroki.retry import RetryBudget
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.kroki_mode = "remote"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.validate_design = False
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.side_effect = ["sequence", "@startuml\nA -> B\n@enduml"]
+
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.side_effect = KrokiUnavailableError(
+            "Kroki request failed for diagram type 'plantuml': ConnectError: refused"
+        )
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act & Assert
+            with pytest.raises(KrokiUnavailableError):
+                orchestrator.execute(
+                    description="Test diagram",
+                    diagram_type="plantuml",
+                    output_dir=str(tmp_path),
+                    output_formats="png"
+                )
+
+        retry_budget = mock_kroki_client.render_diagram.call_args[1]["retry_budget"]
+        assert retry_budget.max_retries == RetryBudget.DEFAULT_MAX_RETRIES
+        assert mock_llm_client.generate.call_count == 2  # subtype + initial, no fix prompt
+        mock_kroki_client.render_to_path.assert_not_called()
+
     def test_orchestrator_writes_single_format_file(self, tmp_path):
         """Test orchestrator writes diagram file for single output format.
 
@@ -330,10 +566,13 @@ class TestOrchestrator:
         mock_llm_client.validate_description.return_value = (True, None)  # Validation passes
         mock_llm_client.generate.return_value = "@startuml\\nAlice -> Bob\\n@enduml"
 
-        # Mock KrokiClient - returns PNG bytes
+        # Mock KrokiClient - returns PNG bytes (streamed to the output file)
         mock_kroki_client = Mock()
         png_bytes = b"\\x89PNG\\r\\n\\x1a\\n\\x00\\x00\\x00\\rIHDR"
         mock_kroki_client.render_diagram.return_value = png_bytes
+        mock_kroki_client.render_to_path.side_effect = (
+            lambda diagram_source, diagram_type, output_format, path, retry_budget, cache_hits: path.write_bytes(png_bytes)
+        )
 
         output_dir = tmp_path / "diagrams"
         
@@ -397,13 +636,17 @@ class TestOrchestrator:
         png_bytes = b"\\x89PNG\\r\\n\\x1a\\n"
         svg_bytes = b"<svg>test</svg>"
         
-        def render_side_effect(diagram_source, diagram_type, output_format):
+        def render_side_effect(diagram_source, diagram_type, output_format, retry_budget, cache_hits):
             if output_format == "png":
                 return png_bytes
             elif output_format == "svg":
                 return svg_bytes
         
         mock_kroki_client.render_diagram.side_effect = render_side_effect
+        mock_kroki_client.render_to_path.side_effect = (
+            lambda diagram_source, diagram_type, output_format, path, retry_budget, cache_hits:
+                path.write_bytes(render_side_effect(diagram_source, diagram_type, output_format, retry_budget, cache_hits))
+        )
 
         output_dir = tmp_path / "diagrams"
         
@@ -437,6 +680,172 @@ class TestOrchestrator:
         # Verify result points to first format (PNG)
         assert result["output_path"] == str(png_file)
 
+    def test_orchestrator_reuses_validation_renders_for_output(self, tmp_path):
+        """Test orchestrator writes validation/design renders without re-rendering.
+
+        Validates that:
+        - SVG from syntax validation and PNG from design check are reused
+        - Only formats not rendered during iteration (pdf) go to Kroki again
+        - Written files contain the reused bytes
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.kroki_mode = "remote"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.validate_design = True
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.return_value = "@startuml\nAlice -> Bob\n@enduml"
+        mock_llm_client.vision_analyze.return_value = "approved"
+
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.side_effect = (
+            lambda diagram_source, diagram_type, output_format, retry_budget, cache_hits: f"<{output_format}>".encode()
+        )
+        mock_kroki_client.render_to_path.side_effect = (
+            lambda diagram_source, diagram_type, output_format, path, retry_budget, cache_hits:
+                path.write_bytes(f"<{output_format}>".encode())
+        )
+
+        output_dir = tmp_path / "diagrams"
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act
+            orchestrator.execute(
+                description="Test diagram",
+                diagram_type="plantuml",
+                output_dir=str(output_dir),
+                output_formats="png,svg,pdf,source"
+            )
+
+        # Assert - svg (validation) + png (design check) + pdf (output only)
+        rendered_formats = [
+            call[1]["output_format"] for call in mock_kroki_client.render_diagram.call_args_list
+        ]
+        assert rendered_formats == ["svg", "png"]
+        mock_kroki_client.render_to_path.assert_called_once()
+        assert mock_kroki_client.render_to_path.call_args[1]["output_format"] == "pdf"
+        assert (output_dir / "diagram.svg").read_bytes() == b"<svg>"
+        assert (output_dir / "diagram.png").read_bytes() == b"<png>"
+        assert (output_dir / "diagram.pdf").read_bytes() == b"<pdf>"
+
+    def test_orchestrator_skips_unsupported_output_formats(self, tmp_path):
+        """Test formats the Kroki server cannot produce are skipped.
+
+        Validates that:
+        - Formats reported unsupported by supports_format() are not rendered
+        - Supported formats and the source file are still written
+        - Result output_path points to the first written format
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.kroki_mode = "remote"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.validate_design = False
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.return_value = "<bpmn/>"
+
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.return_value = b"<svg>"
+        mock_kroki_client.supports_format.side_effect = (
+            lambda diagram_type, output_format: output_format != "png"
+        )
+
+        output_dir = tmp_path / "diagrams"
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act
+            result = orchestrator.execute(
+                description="Test diagram",
+                diagram_type="bpmn",
+                output_dir=str(output_dir),
+                output_formats="png,svg,source"
+            )
+
+        # Assert
+        mock_kroki_client.render_to_path.assert_not_called()
+        assert not (output_dir / "diagram.png").exists()
+        assert (output_dir / "diagram.svg").read_bytes() == b"<svg>"
+        assert (output_dir / "diagram.bpmn").exists()
+        assert result["output_path"] == str(output_dir / "diagram.svg")
+
+    def test_orchestrator_renders_output_formats_concurrently(self, tmp_path):
+        """Test output formats are rendered in parallel and timed per format.
+
+        Validates that:
+        - Formats not reused from validation are rendered concurrently
+        - Result contains format_timings for every requested format
+        - No temp files are left behind by the atomic writes
+        """
+        import threading
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.kroki_mode = "remote"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.validate_design = False
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.return_value = "@startuml\nAlice -> Bob\n@enduml"
+
+        # png and pdf renders only complete if both are in flight at the same time
+        barrier = threading.Barrier(2, timeout=5)
+
+        def render_to_path_side_effect(diagram_source, diagram_type, output_format, path, retry_budget, cache_hits):
+            barrier.wait()
+            path.write_bytes(f"<{output_format}>".encode())
+
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.return_value = b"<svg>"
+        mock_kroki_client.render_to_path.side_effect = render_to_path_side_effect
+
+        output_dir = tmp_path / "diagrams"
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act
+            result = orchestrator.execute(
+                description="Test diagram",
+                diagram_type="plantuml",
+                output_dir=str(output_dir),
+                output_formats="png,svg,pdf,source"
+            )
+
+        # Assert
+        assert set(result["format_timings"]) == {"png", "svg", "pdf", "source"}
+        assert result["output_path"] == str(output_dir / "diagram.png")
+        assert (output_dir / "diagram.pdf").read_bytes() == b"<pdf>"
+        assert not list(output_dir.glob("*.tmp"))
+
     def test_orchestrator_uses_correct_source_extension(self, tmp_path):
         """Test orchestrator uses correct file extension for source format.
 
@@ -487,6 +896,54 @@ class TestOrchestrator:
         assert source_file.exists(), f"Mermaid source file not created: {source_file}"
         assert source_file.read_text() == diagram_source
 
+    def test_orchestrator_refines_after_render_timeout(self, tmp_path):
+        """Test a render timeout is handled like a render failure.
+
+        Validates that:
+        - KrokiRenderTimeout does not abort the run
+        - The next iteration asks the LLM to fix the diagram, citing the timeout
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.client import KrokiRenderTimeout
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.kroki_mode = "remote"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.validate_design = False
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.side_effect = ["sequence", "@startuml\nhuge\n@enduml", "@startuml\nA -> B\n@enduml"]
+
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.side_effect = [
+            KrokiRenderTimeout("Kroki rendering timed out for diagram type 'plantuml' after 30s"),
+            b"<svg/>",
+        ]
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act
+            result = orchestrator.execute(
+                description="Test diagram",
+                diagram_type="plantuml",
+                output_dir=str(tmp_path),
+                output_formats="svg"
+            )
+
+        # Assert
+        assert result["iterations_used"] == 2
+        assert result["stopped_reason"] == "success"
+        fix_prompt = mock_llm_client.generate.call_args_list[2][0][0]
+        assert "timed out" in fix_prompt
+
     def test_orchestrator_design_approved_first_iteration(self, tmp_path):
         """Test orchestrator design feedback - approved on first iteration.
 
@@ -727,7 +1184,7 @@ class TestOrchestrator:
         Validates:
         - Detects container not running
         - Calls start()
-        - Performs health check after start
+        - Waits until the started container is healthy (JVM boot)
         - Uses localhost:8000 after successful start
         """
         from diag_agent.agent.orchestrator import Orchestrator
@@ -741,11 +1198,12 @@ class TestOrchestrator:
         mock_settings.max_iterations = 5
         mock_settings.max_time_seconds = 60
         mock_settings.validate_design = False
+        mock_settings.kroki_startup_timeout = 45
 
-        # Mock KrokiManager - not running, start succeeds, then healthy
+        # Mock KrokiManager - not running, start succeeds, healthy after 3.5s
         mock_kroki_manager = Mock()
         mock_kroki_manager.is_running.return_value = False
-        mock_kroki_manager.health_check.return_value = True
+        mock_kroki_manager.wait_until_healthy.return_value = 3.5
 
         mock_llm_client = Mock()
         mock_kroki_client = Mock()
@@ -756,16 +1214,148 @@ class TestOrchestrator:
             
             # Act
             orchestrator = Orchestrator(mock_settings)
+            orchestrator.kroki_client  # Wait for background Kroki discovery
 
             # Assert
             mock_kroki_manager.is_running.assert_called_once()
             mock_kroki_manager.start.assert_called_once()  # Should start
-            mock_kroki_manager.health_check.assert_called_once()
+            mock_kroki_manager.wait_until_healthy.assert_called_once_with(45)
+            mock_kroki_manager.health_check.assert_not_called()
             
             # Should use local URL
             from diag_agent.agent import orchestrator as orch_module
             orch_module.KrokiClient.assert_called_with("http://localhost:8000")
 
+    def test_orchestrator_auto_mode_warms_up_started_container(self):
+        """Test auto-mode warms up the JVM of a container it started.
+
+        Validates:
+        - warm_up() runs in the background with the configured types, formats and rounds
+        - The warm-up timings are logged once it finished
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.warmup import WarmupTiming
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "auto"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.kroki_warmup = True
+        mock_settings.kroki_warmup_types = ["plantuml"]
+        mock_settings.kroki_warmup_formats = ["svg"]
+        mock_settings.kroki_warmup_rounds = 2
+
+        mock_kroki_manager = Mock()
+        mock_kroki_manager.is_running.return_value = False
+        mock_kroki_manager.wait_until_healthy.return_value = 3.5
+        mock_kroki_manager.warm_up.return_value = {
+            "http://localhost:8000": [WarmupTiming("plantuml", "svg", timings=[1.8, 0.2])]
+        }
+        mock_logger = Mock()
+
+        with patch("diag_agent.agent.orchestrator.LLMClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiManager", return_value=mock_kroki_manager):
+
+            # Act
+            orchestrator = Orchestrator(mock_settings)
+            orchestrator.kroki_client  # Wait for background Kroki discovery
+            orchestrator.kroki_warmup.result(timeout=5)
+            orchestrator._log_warmup(mock_logger)
+            orchestrator._log_warmup(mock_logger)
+
+        # Assert
+        mock_kroki_manager.warm_up.assert_called_once_with(["plantuml"], ["svg"], 2)
+        logged = [call[0][0] for call in mock_logger.info.call_args_list]
+        assert logged == [
+            "Kroki warm-up (http://localhost:8000):",
+            "  plantuml/svg: 1.80s -> 0.20s (2 renders)",
+        ]
+
+    def test_orchestrator_reuses_persisted_discovery(self, tmp_path):
+        """Test a later run reuses the persisted Kroki discovery.
+
+        Validates:
+        - A full discovery stores endpoint and container ID in the state file
+        - A later run within the TTL skips the Docker probe and only pings Kroki
+        - A failed ping falls back to a full discovery
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "auto"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.kroki_discovery_file = str(tmp_path / "discovery.json")
+        mock_settings.kroki_discovery_ttl = 300
+
+        mock_kroki_manager = Mock()
+        mock_kroki_manager.is_running.return_value = True
+        mock_kroki_manager.health_check.return_value = True
+        mock_kroki_client = Mock()
+        mock_kroki_client.warm_up.return_value = True
+
+        with patch("diag_agent.agent.orchestrator.LLMClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client), \
+             patch("diag_agent.agent.orchestrator.KrokiManager", return_value=mock_kroki_manager):
+
+            # Act
+            Orchestrator(mock_settings).kroki_client  # Full discovery
+            state = json.loads((tmp_path / "discovery.json").read_text())
+            cached_run = Orchestrator(mock_settings)
+            cached_run.kroki_client
+            probes_after_cached_run = mock_kroki_manager.is_running.call_count
+            mock_kroki_client.warm_up.side_effect = [False, True]  # Kroki went away meanwhile
+            Orchestrator(mock_settings).kroki_client
+
+        # Assert
+        assert state["urls"] == ["http://localhost:8000"]
+        assert state["local"] is True
+        assert probes_after_cached_run == 1
+        assert cached_run.kroki_manager is mock_kroki_manager
+        assert mock_kroki_manager.is_running.call_count == 2
+
+    def test_orchestrator_does_not_persist_remote_fallback(self, tmp_path):
+        """Test an auto-mode fallback to remote Kroki is not persisted.
+
+        Validates:
+        - No discovery state is stored when local Kroki was not available
+        - The next run probes local Kroki again
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.manager import KrokiManagerError
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "auto"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.kroki_discovery_file = str(tmp_path / "discovery.json")
+        mock_settings.kroki_discovery_ttl = 300
+
+        mock_kroki_manager = Mock()
+        mock_kroki_manager.is_running.side_effect = KrokiManagerError("Docker not installed")
+        mock_kroki_client = Mock()
+        mock_kroki_client.warm_up.return_value = True
+
+        with patch("diag_agent.agent.orchestrator.LLMClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client) as kc, \
+             patch("diag_agent.agent.orchestrator.KrokiManager", return_value=mock_kroki_manager):
+
+            # Act
+            Orchestrator(mock_settings).kroki_client
+            Orchestrator(mock_settings).kroki_client
+
+        # Assert
+        assert kc.call_args.args == ("https://kroki.io",)
+        assert not (tmp_path / "discovery.json").exists()
+        assert mock_kroki_manager.is_running.call_count == 2
+
     def test_orchestrator_auto_mode_fallback_when_docker_not_available(self):
         """Test auto-mode falls back to remote when Docker not installed.
 
@@ -800,6 +1390,7 @@ class TestOrchestrator:
             
             # Act
             orchestrator = Orchestrator(mock_settings)
+            orchestrator.kroki_client  # Wait for background Kroki discovery
 
             # Assert - should fallback to remote
             from diag_agent.agent import orchestrator as orch_module
@@ -809,8 +1400,8 @@ class TestOrchestrator:
         """Test auto-mode falls back to remote when health check fails.
 
         Validates:
-        - Container running but health check fails
-        - Falls back to kroki.io
+        - Container running but health check fails, with no start in progress
+        - Falls back to kroki.io without waiting for a hung container
         - Graceful degradation
         """
         from diag_agent.agent.orchestrator import Orchestrator
@@ -829,6 +1420,7 @@ class TestOrchestrator:
         mock_kroki_manager = Mock()
         mock_kroki_manager.is_running.return_value = True
         mock_kroki_manager.health_check.return_value = False  # Health check fails
+        mock_kroki_manager.is_starting.return_value = False  # ...and nobody is starting it
 
         mock_llm_client = Mock()
         mock_kroki_client = Mock()
@@ -839,10 +1431,48 @@ class TestOrchestrator:
             
             # Act
             orchestrator = Orchestrator(mock_settings)
+            orchestrator.kroki_client  # Wait for background Kroki discovery
 
             # Assert - should fallback to remote
             from diag_agent.agent import orchestrator as orch_module
             orch_module.KrokiClient.assert_called_with("https://kroki.io")
+        mock_kroki_manager.wait_until_healthy.assert_not_called()
+
+    def test_orchestrator_auto_mode_waits_for_container_being_started(self):
+        """Test auto-mode waits for a container another run is starting.
+
+        Validates:
+        - Container running but not healthy yet while a start is in progress
+        - Waits for the JVM (startup timeout) and then uses local Kroki
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "auto"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.kroki_startup_timeout = 30
+
+        mock_kroki_manager = Mock()
+        mock_kroki_manager.is_running.return_value = True
+        mock_kroki_manager.health_check.return_value = False
+        mock_kroki_manager.is_starting.return_value = True  # started a moment ago
+        mock_kroki_manager.wait_until_healthy.return_value = 4.2
+
+        with patch("diag_agent.agent.orchestrator.LLMClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiClient") as mock_client_class, \
+             patch("diag_agent.agent.orchestrator.KrokiManager", return_value=mock_kroki_manager):
+
+            # Act
+            orchestrator = Orchestrator(mock_settings)
+            orchestrator.kroki_client  # Wait for background Kroki discovery
+
+        # Assert
+        mock_kroki_manager.is_starting.assert_called_once_with(30)
+        mock_kroki_manager.wait_until_healthy.assert_called_once_with(30)
+        mock_client_class.assert_called_with("http://localhost:8000")
 
     def test_orchestrator_local_mode_no_fallback(self):
         """Test local mode uses KrokiManager without fallback logic.
@@ -878,6 +1508,7 @@ class TestOrchestrator:
             
             # Act
             orchestrator = Orchestrator(mock_settings)
+            orchestrator.kroki_client  # Wait for background Kroki discovery
 
             # Assert - should use local
             from diag_agent.agent import orchestrator as orch_module
@@ -885,3 +1516,192 @@ class TestOrchestrator:
             
             # Verify KrokiManager was used
             mock_kroki_manager.is_running.assert_called_once()
+
+    def test_orchestrator_discovers_kroki_while_llm_runs(self, tmp_path):
+        """Test Kroki discovery overlaps with the first LLM calls.
+
+        Validates:
+        - Docker probing runs in the background (not in __init__)
+        - The client connection is warmed up after discovery
+        - The first render waits for discovery and uses the discovered client
+        """
+        import threading
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+
+        # Arrange
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "auto"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.validate_design = False
+
+        llm_started = threading.Event()
+        overlapped = []
+
+        def is_running():
+            # Only completes if the LLM is called while discovery is in progress
+            overlapped.append(llm_started.wait(timeout=5))
+            return True
+
+        mock_kroki_manager = Mock()
+        mock_kroki_manager.is_running.side_effect = is_running
+        mock_kroki_manager.health_check.return_value = True
+
+        def validate_description(description, diagram_type):
+            llm_started.set()
+            return True, None
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.side_effect = validate_description
+        mock_llm_client.generate.return_value = "@startuml\nA -> B\n@enduml"
+
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.return_value = b"<svg>"
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client), \
+             patch("diag_agent.agent.orchestrator.KrokiClient", return_value=mock_kroki_client), \
+             patch("diag_agent.agent.orchestrator.KrokiManager", return_value=mock_kroki_manager):
+            orchestrator = Orchestrator(mock_settings)
+
+            # Act
+            result = orchestrator.execute(
+                description="Test diagram",
+                output_dir=str(tmp_path),
+                output_formats="svg"
+            )
+
+        # Assert
+        assert overlapped == [True]
+        mock_kroki_client.warm_up.assert_called_once()
+        mock_kroki_client.render_diagram.assert_called_once()
+        assert result["stopped_reason"] == "success"
+
+    def test_orchestrator_auto_mode_configures_failover(self):
+        """Test auto-mode guards local Kroki with a circuit breaker and remote failover.
+
+        Validates:
+        - The shared breaker of the local URL is passed to KrokiClient
+        - kroki_remote_url is the failover target in auto mode
+        - Local mode gets the breaker but no failover target
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.breaker import get_breaker, reset_breakers
+
+        # Arrange
+        reset_breakers()
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "auto"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.kroki_breaker_threshold = 3
+        mock_settings.kroki_breaker_reset_seconds = 30
+
+        mock_kroki_manager = Mock()
+        mock_kroki_manager.is_running.return_value = True
+        mock_kroki_manager.health_check.return_value = True
+
+        with patch("diag_agent.agent.orchestrator.LLMClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiClient") as mock_kroki_class, \
+             patch("diag_agent.agent.orchestrator.KrokiManager", return_value=mock_kroki_manager):
+
+            # Act
+            Orchestrator(mock_settings).kroki_client
+            auto_kwargs = mock_kroki_class.call_args[1]
+            mock_settings.kroki_mode = "local"
+            Orchestrator(mock_settings).kroki_client
+            local_kwargs = mock_kroki_class.call_args[1]
+
+        # Assert
+        assert auto_kwargs["circuit_breaker"] is get_breaker("http://localhost:8000")
+        assert auto_kwargs["fallback_url"] == "https://kroki.io"
+        assert local_kwargs["circuit_breaker"] is get_breaker("http://localhost:8000")
+        assert "fallback_url" not in local_kwargs
+        reset_breakers()
+
+    def test_orchestrator_starts_local_replicas(self):
+        """Test kroki_replicas > 1 starts a local replica pool and balances across it.
+
+        Validates:
+        - Missing replicas are started and awaited
+        - KrokiClient gets a balancer across the healthy replicas
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.breaker import reset_breakers
+
+        # Arrange
+        reset_breakers()
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "local"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.kroki_replicas = 2
+        mock_settings.kroki_breaker_threshold = 3
+        mock_settings.kroki_breaker_reset_seconds = 30
+
+        running = {0}
+
+        def replica_status():
+            return [
+                {"index": index, "url": f"http://localhost:{8000 + index}",
+                 "running": index in running, "healthy": index in running}
+                for index in range(2)
+            ]
+
+        mock_kroki_manager = Mock()
+        mock_kroki_manager.replica_status.side_effect = replica_status
+        mock_kroki_manager.start_replica.side_effect = running.add
+
+        with patch("diag_agent.agent.orchestrator.LLMClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiClient") as mock_kroki_class, \
+             patch("diag_agent.agent.orchestrator.KrokiManager", return_value=mock_kroki_manager):
+
+            # Act
+            Orchestrator(mock_settings).kroki_client
+
+        # Assert
+        mock_kroki_manager.start_replica.assert_called_once_with(1)
+        mock_kroki_manager.wait_until_healthy.assert_called_once()
+        kwargs = mock_kroki_class.call_args[1]
+        assert kwargs["balancer"].urls == ["http://localhost:8000", "http://localhost:8001"]
+        reset_breakers()
+
+    def test_orchestrator_balances_configured_endpoints(self):
+        """Test configured Kroki endpoints are load-balanced without Docker discovery.
+
+        Validates:
+        - KrokiManager is not used when kroki_endpoints is set
+        - KrokiClient gets a balancer across all endpoints
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.breaker import reset_breakers
+
+        # Arrange
+        reset_breakers()
+        mock_settings = Mock(spec=Settings)
+        mock_settings.kroki_mode = "local"
+        mock_settings.kroki_local_url = "http://localhost:8000"
+        mock_settings.kroki_remote_url = "https://kroki.io"
+        mock_settings.kroki_endpoints = ["http://localhost:8001", "http://localhost:8002"]
+        mock_settings.kroki_breaker_threshold = 3
+        mock_settings.kroki_breaker_reset_seconds = 30
+
+        with patch("diag_agent.agent.orchestrator.LLMClient"), \
+             patch("diag_agent.agent.orchestrator.KrokiClient") as mock_kroki_class, \
+             patch("diag_agent.agent.orchestrator.KrokiManager") as mock_manager_class:
+
+            # Act
+            Orchestrator(mock_settings).kroki_client
+
+        # Assert
+        mock_manager_class.assert_not_called()
+        args, kwargs = mock_kroki_class.call_args
+        assert args == ("http://localhost:8001",)
+        assert kwargs["balancer"].urls == ["http://localhost:8001", "http://localhost:8002"]
+        assert "fallback_url" not in kwargs
+        reset_breakers()
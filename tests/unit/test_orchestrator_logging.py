@@ -308,6 +308,53 @@ class TestOrchestratorLogging:
         log_content = (output_dir / "generation.log").read_text()
         assert "LLM Prompt (syntax fix):" in log_content
 
+    def test_orchestrator_logs_adaptive_concurrency(self, tmp_path):
+        """Test orchestrator logs the Kroki concurrency limits with adaptive concurrency.
+
+        Validates that:
+        - The limit, in-flight, queued and completed requests of each
+          endpoint limiter are written to generation.log
+        """
+        from diag_agent.agent.orchestrator import Orchestrator
+        from diag_agent.config.settings import Settings
+        from diag_agent.kroki.limiter import get_limiter, reset_limiters
+
+        # Arrange
+        reset_limiters()
+        get_limiter("http://localhost:8000", max_limit=8)
+        mock_settings = Mock(spec=Settings)
+        mock_settings.max_iterations = 5
+        mock_settings.max_time_seconds = 60
+        mock_settings.validate_design = False
+        mock_settings.kroki_adaptive_concurrency = True
+
+        mock_llm_client = Mock()
+        mock_llm_client.validate_description.return_value = (True, None)
+        mock_llm_client.generate.return_value = "@startuml\nTest\n@enduml"
+
+        mock_kroki_client = Mock()
+        mock_kroki_client.render_diagram.return_value = b"<svg>"
+        mock_kroki_client.render_cache = None
+
+        output_dir = tmp_path / "diagrams"
+
+        with patch("diag_agent.agent.orchestrator.LLMClient", return_value=mock_llm_client):
+            orchestrator = Orchestrator(mock_settings, kroki_client=mock_kroki_client)
+
+            # Act
+            orchestrator.execute(
+                description="Test",
+                diagram_type="plantuml",
+                output_dir=str(output_dir),
+                output_formats="svg"
+            )
+
+        # Assert
+        log_content = (output_dir / "generation.log").read_text()
+        assert "Kroki concurrency (http://localhost:8000): limit " in log_content
+        assert "in flight 0, queued 0, completed 0" in log_content
+        reset_limiters()
+
     def test_cli_shows_minimal_progress_updates(self, tmp_path, capsys):
         """Test CLI shows minimal progress updates to stdout.
         
@@ -3,6 +3,7 @@
 import pytest
 from unittest.mock import patch
 import os
+from pathlib import Path
 
 
 class TestSettings:
@@ -152,3 +153,288 @@ class TestSettings:
 
         # Assert - should fall back to local
         assert settings.kroki_url == "http://localhost:8000"
+
+    def test_render_cache_settings(self):
+        """Test render cache location and size limit settings.
+
+        Validates that:
+        - Render cache is enabled by default under the user cache directory
+        - DIAG_AGENT_CACHE_DIR moves the default render cache location
+        - Size limit and enabled flag can be set via ENV
+        - Capability matrices are stored next to the render cache
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act - defaults with XDG cache home
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/xdg"}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+
+        # Act - overrides
+        test_env = {
+            "DIAG_AGENT_CACHE_DIR": "/tmp/diag-cache",
+            "DIAG_AGENT_RENDER_CACHE": "false",
+            "DIAG_AGENT_RENDER_CACHE_MAX_MB": "16",
+        }
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.render_cache_enabled is True
+        assert defaults.render_cache_dir == os.path.join("/tmp/xdg", "diag-agent", "renders")
+        assert defaults.render_cache_max_mb == 256
+        assert custom.render_cache_enabled is False
+        assert custom.render_cache_dir == os.path.join("/tmp/diag-cache", "renders")
+        assert custom.render_cache_max_mb == 16
+        assert custom.capabilities_dir == os.path.join("/tmp/diag-cache", "capabilities")
+
+    def test_kroki_retry_settings(self):
+        """Test Kroki retry settings for transient failures.
+
+        Validates that:
+        - Per-request retries default to 2 and the per-run budget to 10
+        - Both can be overridden via ENV
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {
+            "DIAG_AGENT_KROKI_MAX_RETRIES": "0",
+            "DIAG_AGENT_KROKI_RETRY_BUDGET": "25",
+        }
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_max_retries == 2
+        assert defaults.kroki_retry_budget == 10
+        assert custom.kroki_max_retries == 0
+        assert custom.kroki_retry_budget == 25
+
+    def test_kroki_circuit_breaker_settings(self):
+        """Test Kroki circuit breaker settings.
+
+        Validates that:
+        - The breaker opens after 3 failures and probes after 30s by default
+        - Both can be overridden via ENV
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {
+            "DIAG_AGENT_KROKI_BREAKER_THRESHOLD": "5",
+            "DIAG_AGENT_KROKI_BREAKER_RESET_SECONDS": "120",
+        }
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_breaker_threshold == 3
+        assert defaults.kroki_breaker_reset_seconds == 30
+        assert custom.kroki_breaker_threshold == 5
+        assert custom.kroki_breaker_reset_seconds == 120
+
+    def test_kroki_local_container_settings(self):
+        """Test startup timeout and replica count of local Kroki containers.
+
+        Validates that:
+        - Defaults are 60 seconds and a single replica
+        - DIAG_AGENT_KROKI_STARTUP_TIMEOUT and DIAG_AGENT_KROKI_REPLICAS override them
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {"DIAG_AGENT_KROKI_STARTUP_TIMEOUT": "90", "DIAG_AGENT_KROKI_REPLICAS": "3"}
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_startup_timeout == 60
+        assert defaults.kroki_replicas == 1
+        assert custom.kroki_startup_timeout == 90
+        assert custom.kroki_replicas == 3
+
+    def test_kroki_warmup_settings(self):
+        """Test JVM warm-up settings.
+
+        Validates that:
+        - Warm-up is enabled by default for plantuml, c4plantuml, mermaid and bpmn
+          as svg and png, 3 rounds each
+        - The DIAG_AGENT_KROKI_WARMUP_* variables override them
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {
+            "DIAG_AGENT_KROKI_WARMUP": "false",
+            "DIAG_AGENT_KROKI_WARMUP_TYPES": "plantuml, graphviz",
+            "DIAG_AGENT_KROKI_WARMUP_FORMATS": "svg",
+            "DIAG_AGENT_KROKI_WARMUP_ROUNDS": "5",
+        }
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_warmup is True
+        assert defaults.kroki_warmup_types == ["plantuml", "c4plantuml", "mermaid", "bpmn"]
+        assert defaults.kroki_warmup_formats == ["svg", "png"]
+        assert defaults.kroki_warmup_rounds == 3
+        assert custom.kroki_warmup is False
+        assert custom.kroki_warmup_types == ["plantuml", "graphviz"]
+        assert custom.kroki_warmup_formats == ["svg"]
+        assert custom.kroki_warmup_rounds == 5
+
+    def test_kroki_companion_settings(self):
+        """Test companion container settings.
+
+        Validates that:
+        - Companions are started on demand and stopped after 15 idle minutes by default
+        - DIAG_AGENT_KROKI_COMPANIONS and DIAG_AGENT_KROKI_COMPANION_IDLE_SECONDS override them
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {
+            "DIAG_AGENT_KROKI_COMPANIONS": "false",
+            "DIAG_AGENT_KROKI_COMPANION_IDLE_SECONDS": "120",
+        }
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_companions is True
+        assert defaults.kroki_companion_idle_seconds == 900
+        assert custom.kroki_companions is False
+        assert custom.kroki_companion_idle_seconds == 120
+
+    def test_kroki_keepalive_settings(self):
+        """Test keepalive supervisor and discovery cache settings.
+
+        Validates that:
+        - Heartbeat and discovery state files live in the cache directory by default
+        - Discovery results are reused for 5 minutes by default
+        - Idle period (30 min) and pre-warm lead time (10 min) can be overridden
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {"DIAG_AGENT_CACHE_DIR": "/tmp/diag-cache"}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {"DIAG_AGENT_KROKI_IDLE_MINUTES": "15", "DIAG_AGENT_KROKI_PREWARM_MINUTES": "5"}
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_heartbeat_file == str(Path("/tmp/diag-cache") / "kroki-heartbeat.json")
+        assert defaults.kroki_discovery_file == str(Path("/tmp/diag-cache") / "kroki-discovery.json")
+        assert defaults.kroki_discovery_ttl == 300
+        assert defaults.kroki_idle_minutes == 30
+        assert defaults.kroki_prewarm_minutes == 10
+        assert custom.kroki_idle_minutes == 15
+        assert custom.kroki_prewarm_minutes == 5
+
+    def test_kroki_endpoints_setting(self):
+        """Test Kroki replica endpoints are parsed from a comma-separated list.
+
+        Validates that:
+        - No endpoints are configured by default
+        - Whitespace and empty items are ignored
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {"DIAG_AGENT_KROKI_ENDPOINTS": "http://kroki-1:8000, http://kroki-2:8000,"}
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_endpoints == []
+        assert custom.kroki_endpoints == ["http://kroki-1:8000", "http://kroki-2:8000"]
+
+    def test_kroki_adaptive_concurrency_settings(self):
+        """Test adaptive concurrency settings for Kroki endpoints.
+
+        Validates that:
+        - Adaptive concurrency is disabled by default, with a limit of 32
+        - Both can be overridden via ENV
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {
+            "DIAG_AGENT_KROKI_ADAPTIVE_CONCURRENCY": "true",
+            "DIAG_AGENT_KROKI_MAX_CONCURRENCY": "8",
+        }
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_adaptive_concurrency is False
+        assert defaults.kroki_max_concurrency == 32
+        assert custom.kroki_adaptive_concurrency is True
+        assert custom.kroki_max_concurrency == 8
+
+    def test_kroki_timeout_settings(self):
+        """Test per-diagram-type and adaptive timeout settings.
+
+        Validates that:
+        - No overrides and no adaptive timeouts by default
+        - "type=seconds" and "type/format=seconds" entries are parsed
+        - Invalid entries are ignored
+        """
+        from diag_agent.config.settings import Settings
+
+        # Act
+        with patch.dict(os.environ, {}, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            defaults = Settings()
+        test_env = {
+            "DIAG_AGENT_KROKI_TIMEOUTS": "Mermaid=10, bpmn/png=90, broken=fast",
+            "DIAG_AGENT_KROKI_ADAPTIVE_TIMEOUTS": "true",
+            "DIAG_AGENT_KROKI_TIMEOUT_FLOOR": "1",
+            "DIAG_AGENT_KROKI_TIMEOUT_CEILING": "300",
+        }
+        with patch.dict(os.environ, test_env, clear=True), \
+             patch("diag_agent.config.settings.load_dotenv"):
+            custom = Settings()
+
+        # Assert
+        assert defaults.kroki_timeouts == {}
+        assert defaults.kroki_adaptive_timeouts is False
+        assert defaults.kroki_timeout_floor == 2
+        assert defaults.kroki_timeout_ceiling == 120
+        assert custom.kroki_timeouts == {"mermaid": 10.0, "bpmn/png": 90.0}
+        assert custom.kroki_adaptive_timeouts is True
+        assert custom.kroki_timeout_floor == 1
+        assert custom.kroki_timeout_ceiling == 300